@@ -0,0 +1,33 @@
+"""Memory of the object tree against the arena for the same source.
+
+    python -m benchmarks.arena_memory [statements]
+"""
+from __future__ import annotations
+
+import sys
+import tracemalloc
+
+from benchmarks.parser_throughput import generate
+from graph_compiler.arena import ArenaParser
+from graph_compiler.lexer import RegexLexer, TableLexer
+from graph_compiler.parser import Parser
+
+
+def measure(build) -> tuple[int, object]:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+if __name__ == '__main__':
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    table = RegexLexer(generate(statements)).tokenize()
+
+    tree, _ = measure(lambda: Parser(TableLexer(table)).parse())
+    flat, arena = measure(lambda: ArenaParser(table).parse())
+
+    print(f"nodes:           {len(arena)}")
+    print(f"AST objects:     {tree / len(arena):.1f} bytes/node")
+    print(f"arena:           {flat / len(arena):.1f} bytes/node")
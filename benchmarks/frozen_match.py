@@ -0,0 +1,55 @@
+"""Per-lookup latency of SubsetGraph.match against its frozen matcher.
+
+    python -m benchmarks.frozen_match [patterns ...]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from graph_compiler.regex_parsing import (
+    SubsetGraph,
+    check_dotstar,
+    check_equal,
+    check_fixed,
+    check_match,
+    check_prefixes,
+    check_suffixes,
+)
+
+
+TESTS = [
+    check_prefixes,
+    check_fixed,
+    check_dotstar,
+    check_suffixes,
+    check_equal,
+    check_match,
+]
+
+
+def build(patterns: int) -> SubsetGraph:
+    sg = SubsetGraph(TESTS)
+    for idx in range(patterns):
+        sg.add_expression(f"^host{idx:05d}\\..*")
+    return sg
+
+
+def per_lookup(match, texts: list[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        match(text, False)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 400, 1600]
+    for patterns in sizes:
+        sg = build(patterns)
+        frozen = sg.freeze()
+        texts = [f"host{idx % patterns:05d}.example" for idx in range(2_000)]
+        print(
+            f"{patterns:>6} patterns:  "
+            f"match {per_lookup(sg.match, texts):8.1f}us  "
+            f"frozen {per_lookup(frozen.match, texts):6.1f}us"
+        )
@@ -0,0 +1,57 @@
+"""SubsetGraph build time, scanning every root against the indexed path.
+
+    python -m benchmarks.graph_build [patterns ...]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from graph_compiler.regex_parsing import (
+    SubsetGraph,
+    check_dotstar,
+    check_equal,
+    check_fixed,
+    check_match,
+    check_prefixes,
+    check_suffixes,
+)
+
+
+TESTS = [
+    check_prefixes,
+    check_suffixes,
+    check_equal,
+    check_fixed,
+    check_dotstar,
+    check_match,
+]
+
+# Past this many patterns the unindexed build takes minutes, so skip it.
+SCAN_LIMIT = 10_000
+
+
+def expressions(patterns: int) -> list[str]:
+    # Every tenth pattern is a broader one that the next ones nest under.
+    return [
+        f"^host{idx // 10:05d}.*" if idx % 10 == 0 else f"^host{idx // 10:05d}{idx % 10}\\..*"
+        for idx in range(patterns)
+    ]
+
+
+def build(patterns: list[str], indexed: bool) -> float:
+    sg = SubsetGraph(TESTS, indexed=indexed)
+    start = time.perf_counter()
+    for expression in patterns:
+        sg.add_expression(expression)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    for size in sizes:
+        patterns = expressions(size)
+        line = f"{size:>7} patterns:  indexed {build(patterns, True):7.2f}s"
+        if size <= SCAN_LIMIT:
+            line += f"  scan {build(patterns, False):7.2f}s"
+        print(line)
@@ -0,0 +1,41 @@
+"""Building a SubsetGraph against loading a saved snapshot of it.
+
+    python -m benchmarks.graph_snapshot [patterns ...]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.graph_build import TESTS, expressions
+from graph_compiler.regex_parsing import SubsetGraph
+from graph_compiler.snapshot import load_graph, save_graph
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    with tempfile.TemporaryDirectory() as root:
+        for size in sizes:
+            patterns = expressions(size)
+            path = os.path.join(root, f'{size}.gsg')
+
+            start = time.perf_counter()
+            sg = SubsetGraph(TESTS, indexed=True)
+            for expression in patterns:
+                sg.add_expression(expression)
+            built = time.perf_counter() - start
+            save_graph(sg, path)
+
+            start = time.perf_counter()
+            loaded = load_graph(path, TESTS, indexed=True)
+            load = time.perf_counter() - start
+            start = time.perf_counter()
+            loaded.match(patterns[-1][1:].replace('\\', '').replace('.*', ''))
+            first = time.perf_counter() - start
+
+            print(
+                f"{size:>7} patterns:  build {built:7.2f}s  load {load * 1e3:7.1f}ms"
+                f"  first match {first * 1e3:6.1f}ms  file {os.path.getsize(path) / 1024:8.0f}KiB"
+            )
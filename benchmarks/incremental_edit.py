@@ -0,0 +1,39 @@
+"""Latency of one-character edits to an incremental ``Document``.
+
+Edits land in the middle of sources of growing size; the time per edit
+should stay flat as the file grows.
+
+    python -m benchmarks.incremental_edit [edits]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from graph_compiler.incremental import Document
+from graph_compiler.lexer import TokenTable
+
+
+def count(table: TokenTable, first: int, last: int) -> int:
+    return last - first + 1
+
+
+def generate(lines: int) -> str:
+    return ''.join(
+        f"node{i} {{ a = {i} + b * (c - 1) }}\n" if i % 2 else f"value{i} = {i} * 3;\n"
+        for i in range(lines)
+    )
+
+
+if __name__ == '__main__':
+    edits = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for lines in (1_000, 10_000, 100_000):
+        source = generate(lines)
+        document = Document(source, count)
+        best = float('inf')
+        for n in range(edits):
+            offset = len(source) // 2 + 7 * n
+            start = time.perf_counter()
+            document.edit(offset, 0, '1')
+            best = min(best, time.perf_counter() - start)
+        print(f"{lines:>7} lines {len(source) / 1e6:5.1f}MB: {best * 1e6:7.1f}us per edit")
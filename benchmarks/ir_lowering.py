@@ -0,0 +1,40 @@
+"""Node counts and lowering speed for the hash-consed ``Dag`` IR.
+
+Lowers the ``parser_throughput`` program, whose statements repeat the same
+few subexpressions, from both the tree and the ``Arena``, and compares the
+expression nodes in the tree with the nodes left after folding and sharing.
+
+    python -m benchmarks.ir_lowering [statements]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from benchmarks.parser_throughput import generate
+from graph_compiler.arena import ArenaParser
+from graph_compiler.ir import lower
+from graph_compiler.lexer import RegexLexer
+from graph_compiler.parser import Parser
+
+
+def timed(program) -> float:
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        lower(program)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    source = generate(statements)
+    tree = Parser(RegexLexer(source)).parse()
+    arena = ArenaParser(RegexLexer(source).tokenize()).parse()
+
+    dag = lower(tree)
+    print(dag.report())
+    print(f"dag columns: {3 * dag.ops.itemsize * len(dag) / 1e6:.2f}MB")
+    print(f"lower(tree)  {timed(tree) * 1e3:8.1f}ms")
+    print(f"lower(arena) {timed(arena) * 1e3:8.1f}ms")
@@ -0,0 +1,77 @@
+"""Token hand-off through the parser's lookahead ring buffer.
+
+Compares pulling every token straight from the lexer, as ``Parser.consume``
+used to, with ``Lookahead.advance``, ``peek`` and ``Parser.match``. Tokens
+are replayed from a prebuilt list, so only the hand-off itself is timed.
+
+    python -m benchmarks.lookahead [statements]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from benchmarks.parser_throughput import generate
+from graph_compiler.lexer import RegexLexer, Token
+from graph_compiler.parser import Lookahead, Parser
+
+
+class Replay:
+
+    def __init__(self, tokens: list[Token]) -> None:
+        self.tokens = tokens
+        self.idx: int = -1
+
+    def next_token(self) -> Token:
+        self.idx += 1
+        return self.tokens[self.idx]
+
+
+def direct(lexer: Replay, count: int) -> None:
+    for _ in range(count):
+        lookahead = lexer.next_token()
+
+
+def advance(tokens: Lookahead, count: int) -> None:
+    for _ in range(count):
+        lookahead = tokens.advance()
+
+
+def peek(tokens: Lookahead, count: int) -> None:
+    # Every grammar decision reads a couple of buffered tokens ahead.
+    for _ in range(count):
+        tokens.peek(1)
+        tokens.peek(2)
+        tokens.advance()
+
+
+def match(parser: Parser, count: int) -> None:
+    for _ in range(count - 1):
+        parser.match(parser.lookahead.token_type)
+
+
+def rate(run, make, count: int) -> float:
+    best = float('inf')
+    for _ in range(5):
+        subject = make()
+        start = time.perf_counter()
+        run(subject, count)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+if __name__ == '__main__':
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    tokens = list(RegexLexer(generate(statements)).tokenize())
+    # Headroom for the tokens peeked past the last one timed.
+    count = len(tokens) - 3
+
+    runs = [
+        ('lexer.next_token', direct, lambda: Replay(tokens)),
+        ('Lookahead.advance', advance, lambda: Lookahead(Replay(tokens))),
+        ('peek(1), peek(2), advance', peek, lambda: Lookahead(Replay(tokens))),
+        ('Parser.match', match, lambda: Parser(Replay(tokens))),
+    ]
+    print(f"tokens: {count}")
+    for label, run, make in runs:
+        print(f"{label:<28}{rate(run, make, count) / 1e6:6.2f}M tokens/sec")
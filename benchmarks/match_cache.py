@@ -0,0 +1,51 @@
+"""SubsetGraph.match latency with and without the result cache, on a
+Zipf-distributed stream of lookups.
+
+    python -m benchmarks.match_cache [lookups] [cache_size]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from benchmarks.frozen_match import TESTS
+from graph_compiler.regex_parsing import SubsetGraph
+
+
+PATTERNS = 200
+DISTINCT = 20_000
+
+
+def build(cache_size: int) -> SubsetGraph:
+    sg = SubsetGraph(TESTS, cache_size)
+    for idx in range(PATTERNS):
+        sg.add_expression(f"^host{idx:05d}\\..*")
+    return sg
+
+
+def zipf_texts(lookups: int, exponent: float = 1.1) -> list[str]:
+    rng = random.Random(0)
+    weights = [1 / rank ** exponent for rank in range(1, DISTINCT + 1)]
+    ranks = rng.choices(range(DISTINCT), weights, k=lookups)
+    return [f"host{rank % PATTERNS:05d}.n{rank}" for rank in ranks]
+
+
+if __name__ == '__main__':
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    cache_size = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    texts = zipf_texts(lookups)
+
+    for size in (0, cache_size):
+        sg = build(size)
+        start = time.perf_counter()
+        for text in texts:
+            sg.match(text, False)
+        latency = (time.perf_counter() - start) / lookups * 1e6
+        line = f"cache {size:>6}:    {latency:6.1f}us/lookup"
+        if sg.cache is not None:
+            line += (
+                f"  hit rate {sg.cache.hit_rate:.1%}"
+                f"  evictions {sg.cache.evictions}"
+            )
+        print(line)
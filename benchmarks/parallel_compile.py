@@ -0,0 +1,36 @@
+"""Serial against process-pool compilation of many generated files.
+
+    python -m benchmarks.parallel_compile [files] [statements]
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.parser_throughput import generate
+from graph_compiler.driver import compile_files
+
+
+if __name__ == '__main__':
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    statements = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    source = generate(statements)
+
+    with tempfile.TemporaryDirectory() as root:
+        paths = []
+        for idx in range(files):
+            path = os.path.join(root, f"{idx}.graph")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(source)
+            paths.append(path)
+
+        timings = {}
+        for workers in (1, os.cpu_count() or 1):
+            start = time.perf_counter()
+            compile_files(paths, workers)
+            timings[workers] = time.perf_counter() - start
+            print(f"{workers:>3} worker(s):    {timings[workers]:.2f}s")
+
+        print(f"speedup:         {timings[1] / timings[max(timings)]:.1f}x")
@@ -0,0 +1,40 @@
+"""Parser throughput in tokens/sec on a generated source.
+
+    python -m benchmarks.parser_throughput [statements]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from graph_compiler.lexer import Lexer, RegexLexer
+from graph_compiler.parser import Parser
+
+
+def name(i: int) -> str:
+    # Identifiers are letters only, so spell the digits out.
+    return ''.join(chr(ord('a') + int(digit)) for digit in str(i))
+
+
+def generate(statements: int) -> str:
+    return ''.join(
+        f"node{name(i)} {{ a = {i} + b * (c - {i % 13}) / d; e = a - 1 }};\n"
+        for i in range(statements)
+    )
+
+
+def measure(lexer_class: type[Lexer], source: str, tokens: int) -> float:
+    start = time.perf_counter()
+    Parser(lexer_class(source)).parse()
+    return tokens / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    source = generate(statements)
+    tokens = len(RegexLexer(source).tokenize())
+
+    print(f"tokens:          {tokens}")
+    for lexer_class in (Lexer, RegexLexer):
+        rate = measure(lexer_class, source, tokens)
+        print(f"{lexer_class.__name__ + ':':<16} {rate:,.0f} tokens/sec")
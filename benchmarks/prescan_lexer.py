@@ -0,0 +1,28 @@
+"""Tokens per second of the regex scan against the NumPy prescan.
+
+    python -m benchmarks.prescan_lexer [statements]
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from benchmarks.token_memory import generate
+from graph_compiler.lexer import PrescanLexer, RegexLexer
+
+
+def rate(lexer: RegexLexer) -> tuple[float, int]:
+    start = time.perf_counter()
+    table = lexer.tokenize()
+    return len(table) / (time.perf_counter() - start), len(table)
+
+
+if __name__ == '__main__':
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    source = generate(statements)
+
+    regex, count = rate(RegexLexer(source))
+    prescan, _ = rate(PrescanLexer(source, threshold=0))
+    print(f"tokens:   {count}  ({len(source) / 1e6:.1f} MB)")
+    print(f"regex:    {regex / 1e3:8.0f}k tokens/s")
+    print(f"prescan:  {prescan / 1e3:8.0f}k tokens/s")
@@ -0,0 +1,57 @@
+"""Bytes-per-token for a large generated source.
+
+Compares the slotted, flyweight ``Token`` against a copy of the original
+dict-backed representation that allocated a new object for every token.
+
+    python -m benchmarks.token_memory [statements]
+"""
+from __future__ import annotations
+
+import sys
+import tracemalloc
+
+from graph_compiler.lexer import RegexLexer, Token, TokenType
+
+
+class DictToken:
+
+    def __init__(self, token_type: TokenType, text: str) -> None:
+        self.token_type = token_type
+        self.text = text
+
+
+def generate(statements: int) -> str:
+    return ''.join(
+        f"node{i % 997} {{ a = {i} + b * (c - {i % 13}) }};\n"
+        for i in range(statements)
+    )
+
+
+def measure(source: str, copy: bool) -> tuple[int, int]:
+    lexer = RegexLexer(source)
+    tracemalloc.start()
+    tokens = []
+    while True:
+        token = lexer.next_token()
+        if copy:
+            # Fresh text and object per token, as the old lexer built them.
+            token = DictToken(token.token_type, ''.join(list(token.text)))
+        tokens.append(token)
+        if token.token_type == TokenType.EOF:
+            break
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, len(tokens)
+
+
+if __name__ == '__main__':
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    source = generate(statements)
+
+    before, count = measure(source, copy=True)
+    after, _ = measure(source, copy=False)
+
+    print(f"tokens:          {count}")
+    print(f"before:          {before / count:.1f} bytes/token")
+    print(f"after:           {after / count:.1f} bytes/token")
+    print(f"Token instance:  {sys.getsizeof(Token(TokenType.ID, 'a'))} bytes")
@@ -0,0 +1,208 @@
+from __future__ import annotations
+from beartype.typing import AsyncIterator
+
+from array import array
+import asyncio
+from codecs import getincrementaldecoder
+from collections import deque
+from concurrent.futures import Executor
+
+from graph_compiler.incremental import Boundaries
+from graph_compiler.lexer import EOF_TOKEN, Positions, RegexLexer, Token, TokenType
+from graph_compiler.parser import AST, Parser, Program
+
+
+def lex_window(
+    window: str,
+    offset: int,
+    lines: int,
+    tabs: int,
+    final: bool
+) -> tuple[list[Token], array, int]:
+    """Lex the complete tokens at the front of ``window``.
+
+    ``window`` starts ``offset`` characters into the stream, behind
+    ``lines`` line breaks and ``tabs`` tabs. A token reaching the end of the
+    window may carry on in text that has not arrived yet, so unless
+    ``final`` is set it is left for the next window. Returns the tokens,
+    their end offsets in ``window``, and how much of ``window`` they used.
+    """
+    lexer = RegexLexer(window)
+    lexer.positions = Positions(window, offset, lines, tabs)
+    tokens: list[Token] = []
+    ends = array('i')
+    while True:
+        start = lexer.idx
+        token = lexer.next_token()
+        if token.token_type == TokenType.EOF:
+            # Only skipped text is left; none of it can start a token.
+            return tokens, ends, lexer.idx
+        if lexer.idx >= len(window) and not final:
+            return tokens, ends, start
+        tokens.append(token)
+        ends.append(lexer.idx)
+
+
+class AsyncLexer:
+    """Lexes text arriving on an ``asyncio.StreamReader``.
+
+    ``async for token in AsyncLexer(reader)`` yields every token up to, but
+    not including, ``EOF``. The reader is only read once the tokens lexed so
+    far have been taken, a chunk of ``chunk_size`` bytes at a time, so a
+    slow consumer leaves data in the reader and the transport stops reading
+    from the socket once the reader's buffer is full. Each chunk is lexed in
+    one go, on ``executor`` if one is given, and the lexer yields to the
+    event loop after every chunk so one large document cannot starve other
+    connections.
+
+    Positions are resolved as for the other lexers; ``line_num`` and
+    ``char_num`` are those just after the last token handed out.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        chunk_size: int = 1 << 16,
+        executor: Executor | None = None,
+        encoding: str = 'utf-8'
+    ) -> None:
+        self.reader = reader
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self.decoder = getincrementaldecoder(encoding)()
+        # Text read but not lexed yet, and where it sits in the stream.
+        self.pending = ''
+        self.positions = Positions('')
+        self.exhausted: bool = False
+        self.queue: deque[Token] = deque()
+        self.last = (self.positions, 0)
+
+    async def batch(self) -> tuple[list[Token], array, Positions] | None:
+        """The next tokens to become complete, with their end offsets in
+        the window resolved by the returned ``Positions``; ``None`` once
+        the stream is used up."""
+        while not self.exhausted:
+            data = await self.reader.read(self.chunk_size)
+            self.exhausted = not data
+            window = self.pending + self.decoder.decode(data, final=self.exhausted)
+            positions = Positions(
+                window, self.positions.offset, self.positions.lines, self.positions.tabs
+            )
+            args = (window, positions.offset, positions.lines, positions.tabs, self.exhausted)
+            if self.executor is not None:
+                loop = asyncio.get_running_loop()
+                tokens, ends, used = await loop.run_in_executor(self.executor, lex_window, *args)
+            else:
+                tokens, ends, used = lex_window(*args)
+
+            lines, tabs = positions.counts(used)
+            self.pending = window[used:]
+            self.positions = Positions(self.pending, positions.offset + used, lines, tabs)
+            await asyncio.sleep(0)
+            if tokens:
+                return tokens, ends, positions
+        return None
+
+    def __aiter__(self) -> AsyncIterator[Token]:
+        return self
+
+    async def __anext__(self) -> Token:
+        if not self.queue:
+            batch = await self.batch()
+            if batch is None:
+                raise StopAsyncIteration
+            tokens, ends, positions = batch
+            self.queue.extend(tokens)
+            self.last = (positions, ends[-1])
+        return self.queue.popleft()
+
+    @property
+    def line_num(self) -> int:
+        positions, idx = self.last
+        return positions.line(idx)
+
+    @property
+    def char_num(self) -> int:
+        positions, idx = self.last
+        return positions.column(idx)
+
+
+class TokenReplay:
+    """Feeds tokens lexed ahead of time to a ``Parser``.
+
+    Like ``TableLexer``, ``idx`` is the row of the token returned last.
+    Each row keeps its end offset and the ``Positions`` of the window it
+    came from, so errors resolve to the same lines as a direct parse.
+    """
+
+    def __init__(self) -> None:
+        self.tokens: list[Token] = []
+        self.ends = array('i')
+        self.positions: list[Positions] = []
+        self.idx: int = -1
+
+    def push(self, token: Token, end: int, positions: Positions) -> None:
+        self.tokens.append(token)
+        self.ends.append(end)
+        self.positions.append(positions)
+
+    def next_token(self) -> Token:
+        if self.idx < len(self.tokens) - 1:
+            self.idx += 1
+        return self.tokens[self.idx]
+
+    @property
+    def line_num(self) -> int:
+        return self.line_at(self.idx)
+
+    def line_at(self, row: int) -> int:
+        row = max(row, 0)
+        return self.positions[row].line(self.ends[row])
+
+    def parse(self) -> list[AST]:
+        if self.tokens:
+            self.push(EOF_TOKEN, self.ends[-1], self.positions[-1])
+        else:
+            self.push(EOF_TOKEN, 0, Positions(''))
+        return Parser(self).parse().statements
+
+
+async def parse_async(
+    source: asyncio.StreamReader | AsyncLexer,
+    chunk_size: int = 1 << 16,
+    executor: Executor | None = None
+) -> Program:
+    """Parse a program as it arrives, one top-level statement at a time.
+
+    Top-level statements close as in ``incremental.statement_ends``; each
+    is parsed as soon as its closing token is lexed (for a closing ``RBRACE``
+    once the token after it shows no ``SEMICOLON`` follows), on ``executor``
+    if one is given.
+    """
+    if isinstance(source, AsyncLexer):
+        lexer = source
+    else:
+        lexer = AsyncLexer(source, chunk_size, executor)
+
+    async def parse(replay: TokenReplay) -> list[AST]:
+        if lexer.executor is None:
+            return replay.parse()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(lexer.executor, replay.parse)
+
+    statements: list[AST] = []
+    replay = TokenReplay()
+    boundaries = Boundaries()
+    while (batch := await lexer.batch()) is not None:
+        tokens, ends, positions = batch
+        for token, end in zip(tokens, ends):
+            back = boundaries.feed(token.token_type.value)
+            if back == 1:
+                statements.extend(await parse(replay))
+                replay = TokenReplay()
+            replay.push(token, end, positions)
+            if back == 0:
+                statements.extend(await parse(replay))
+                replay = TokenReplay()
+    statements.extend(await parse(replay))
+    return Program(statements)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+from beartype.typing import Any, Iterator
+
+from array import array
+
+from graph_compiler.lexer import TableLexer, Token, TokenTable
+from graph_compiler.parser import (
+    AST, Assign, BinaryOp, Block, Identifier, Number, Parser, Program
+)
+
+
+# Node kinds are stored as an index into this tuple.
+KINDS: tuple[type[AST], ...] = (Program, Assign, Block, BinaryOp, Number, Identifier)
+KIND_INDEX: dict[type[AST], int] = {cls: idx for idx, cls in enumerate(KINDS)}
+
+NONE = -1
+
+
+class Arena:
+    """Struct-of-arrays storage for a parsed tree.
+
+    Node ``i`` is row ``i`` of the parallel ``array('i')`` columns: its kind,
+    the row of its token in ``table`` (``NONE`` for nodes without one), its
+    first child and its next sibling. Children are listed in source order.
+    """
+
+    def __init__(self, table: TokenTable) -> None:
+        self.table = table
+        self.kinds = array('i')
+        self.tokens = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.root: int = NONE
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, idx: int) -> NodeView:
+        return NodeView(self, idx)
+
+    def add(self, kind: type[AST], token: int, children: list[int]) -> int:
+        idx = len(self.kinds)
+        self.kinds.append(KIND_INDEX[kind])
+        self.tokens.append(token)
+        self.first_child.append(children[0] if children else NONE)
+        self.next_sibling.append(NONE)
+        for child, sibling in zip(children, children[1:]):
+            self.next_sibling[child] = sibling
+        return idx
+
+    def children(self, idx: int) -> Iterator[int]:
+        child = self.first_child[idx]
+        while child != NONE:
+            yield child
+            child = self.next_sibling[child]
+
+    def walk(self, idx: int | None = None) -> Iterator[int]:
+        """Pre-order traversal with an explicit stack, so depth is unbounded."""
+        stack = [self.root if idx is None else idx]
+        while stack:
+            idx = stack.pop()
+            yield idx
+            stack.extend(reversed(list(self.children(idx))))
+
+
+class NodeView:
+    """Read-only access to one arena row, shaped like the ``AST`` classes."""
+    __slots__ = ('arena', 'idx')
+
+    def __init__(self, arena: Arena, idx: int) -> None:
+        self.arena = arena
+        self.idx = idx
+
+    def __repr__(self) -> str:
+        return f"{self.kind.__name__}({self.text!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, NodeView):
+            return self.arena is other.arena and self.idx == other.idx
+        return False
+
+    def __hash__(self) -> int:
+        return hash((id(self.arena), self.idx))
+
+    @property
+    def kind(self) -> type[AST]:
+        return KINDS[self.arena.kinds[self.idx]]
+
+    @property
+    def token(self) -> Token | None:
+        row = self.arena.tokens[self.idx]
+        return None if row == NONE else self.arena.table[row]
+
+    @property
+    def text(self) -> str | None:
+        row = self.arena.tokens[self.idx]
+        return None if row == NONE else self.arena.table.text(row)
+
+    @property
+    def children(self) -> list[NodeView]:
+        return [NodeView(self.arena, idx) for idx in self.arena.children(self.idx)]
+
+
+class ArenaParser(Parser):
+    """Runs the ``Parser`` grammar over a ``TokenTable`` into an ``Arena``."""
+
+    def __init__(self, table: TokenTable) -> None:
+        super().__init__(TableLexer(table))
+        self.arena = Arena(table)
+
+    def parse(self) -> Arena:
+        self.arena.root = super().parse()
+        return self.arena
+
+    def take(self) -> int:
+        row = self.tokens.cursor()
+        self.consume()
+        return row
+
+    def node(self, cls: type[AST], *args: Any) -> int:
+        if cls is Number or cls is Identifier:
+            token, children = args[0], []
+        elif cls is BinaryOp:
+            left, token, right = args
+            children = [left, right]
+        elif cls is Block:
+            name, statements = args
+            token, children = NONE, [name, *statements]
+        elif cls is Assign:
+            token, children = NONE, list(args)
+        else:
+            token, children = NONE, args[0]
+        return self.arena.add(cls, token, children)
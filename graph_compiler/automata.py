@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from itertools import compress
+from operator import ne
+import re
+
+from graph_compiler.regex_parsing import ElementTest, RegexElement, Relation, Test, derived, fold
+
+
+# Give up on a comparison once a DFA or the product of two would need more
+# states than this; the heuristic tests then get their turn.
+STATE_BUDGET = 5_000
+
+# Stands for every character no pattern in the comparison mentions. All
+# character sets treat those alike, so one symbol covers them exactly.
+OTHER = ''
+
+ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'f': '\f', 'v': '\v'}
+# Without re.ASCII these take in letters, digits and spaces from all of
+# Unicode, which no finite set of mentioned characters plus OTHER can
+# stand for, so patterns using them are left to the other tests.
+CLASSES = frozenset('dDwWsS')
+REPEAT = re.compile(r'\{(\d*)(,?)(\d*)\}')
+
+
+class Unsupported(Exception):
+    """The pattern uses syntax this backend does not model."""
+
+
+class OverBudget(Exception):
+    """An automaton grew past the state budget."""
+
+
+class CharSet:
+    """A finite set of characters, or the complement of one."""
+    __slots__ = ('chars', 'negated')
+
+    def __init__(self, chars: frozenset[str], negated: bool = False) -> None:
+        self.chars = chars
+        self.negated = negated
+
+    def __contains__(self, symbol: str) -> bool:
+        if symbol == OTHER:
+            return self.negated
+        return (symbol in self.chars) != self.negated
+
+
+# Regex syntax tree: ('set', CharSet) | ('cat', [nodes]) | ('alt', [nodes])
+# | ('repeat', node, low, high), with ``high`` None for unbounded.
+Node = tuple
+
+
+@lru_cache(maxsize=1)
+def case_classes() -> dict[str, frozenset[str]]:
+    """Each set of characters ``re.IGNORECASE`` equates, keyed by their
+    ``fold``. Only characters with a case are listed.
+
+    Lowering does not invert uppercasing (the Kelvin sign lowers to 'k'),
+    so this takes one pass over all of Unicode, on first use.
+    """
+    import _sre
+    from re._casefix import _EXTRA_CASES
+
+    codes = range(0x110000)
+    lowered = list(map(_sre.unicode_tolower, codes))
+    classes: dict[str, set[str]] = {}
+    for code in (*compress(codes, map(ne, lowered, codes)), *_EXTRA_CASES):
+        char = chr(code)
+        members = classes.setdefault(fold(char), set())
+        members.add(char)
+        members.add(chr(lowered[code]))
+    return {key: frozenset(members) for key, members in classes.items()}
+
+
+def fold_case(chars: set[str] | frozenset[str]) -> frozenset[str]:
+    # Patterns are compiled with re.IGNORECASE, which takes two characters
+    # to be equal when ``fold`` does: 'k' also matches the Kelvin sign and
+    # 's' matches 'ſ', which str.upper would not turn up.
+    classes = case_classes()
+    folded = set(chars)
+    for char in chars:
+        folded |= classes.get(fold(char), frozenset())
+    return frozenset(folded)
+
+
+class RegexReader:
+    """Recursive-descent reader for the regex subset the backend models:
+    literals, ``.``, bracketed classes, escapes other than ``\\d``,
+    ``\\w``, ``\\s`` and their negations, groups, ``|`` and quantifiers,
+    with ``^`` and ``$`` only at the very start and end."""
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        self.idx = 0
+
+    def peek(self) -> str:
+        return self.pattern[self.idx] if self.idx < len(self.pattern) else ''
+
+    def take(self) -> str:
+        char = self.peek()
+        if not char:
+            raise Unsupported("unexpected end of pattern")
+        self.idx += 1
+        return char
+
+    def read(self) -> Node:
+        node = self.alternation()
+        if self.idx != len(self.pattern):
+            raise Unsupported(f"unexpected {self.peek()!r}")
+        return node
+
+    def alternation(self) -> Node:
+        branches = [self.concatenation()]
+        while self.peek() == '|':
+            self.idx += 1
+            branches.append(self.concatenation())
+        return branches[0] if len(branches) == 1 else ('alt', branches)
+
+    def concatenation(self) -> Node:
+        items = []
+        while self.peek() not in ('', '|', ')'):
+            items.append(self.repetition())
+        return ('cat', items)
+
+    def repetition(self) -> Node:
+        node = self.atom()
+        while True:
+            char = self.peek()
+            if char == '*':
+                low, high = 0, None
+            elif char == '+':
+                low, high = 1, None
+            elif char == '?':
+                low, high = 0, 1
+            elif char == '{' and (m := REPEAT.match(self.pattern, self.idx)) and (
+                m.group(1) or (m.group(2) and m.group(3))
+            ):
+                low = int(m.group(1) or 0)
+                if not m.group(2):
+                    high = low
+                else:
+                    high = int(m.group(3)) if m.group(3) else None
+                self.idx = m.end() - 1
+            else:
+                return node
+            self.idx += 1
+            if self.peek() == '?':
+                # Laziness changes which match is found, not whether one is.
+                self.idx += 1
+            elif self.peek() == '+':
+                raise Unsupported("possessive quantifier")
+            node = ('repeat', node, low, high)
+
+    def atom(self) -> Node:
+        char = self.take()
+        if char == '(':
+            if self.peek() == '?':
+                if self.pattern.startswith('?:', self.idx):
+                    self.idx += 2
+                elif self.pattern.startswith('?P<', self.idx):
+                    self.idx = self.pattern.index('>', self.idx) + 1
+                else:
+                    raise Unsupported("group extension")
+            node = self.alternation()
+            if self.take() != ')':
+                raise Unsupported("unbalanced group")
+            return node
+        if char == '[':
+            return ('set', self.char_class())
+        if char == '.':
+            return ('set', CharSet(frozenset('\n'), True))
+        if char == '\\':
+            return ('set', self.escape())
+        if char in '^$':
+            raise Unsupported("anchor inside pattern")
+        if char in '*+?)':
+            raise Unsupported(f"unexpected {char!r}")
+        return ('set', CharSet(fold_case({char})))
+
+    def escape(self) -> CharSet:
+        char = self.take()
+        if char in CLASSES:
+            raise Unsupported(f"Unicode class \\{char}")
+        if char in ESCAPES:
+            return CharSet(frozenset(ESCAPES[char]))
+        if char.isalnum():
+            raise Unsupported(f"escape \\{char}")
+        return CharSet(fold_case({char}))
+
+    def char_class(self) -> CharSet:
+        negated = self.peek() == '^'
+        if negated:
+            self.idx += 1
+        chars: set[str] = set()
+        first = True
+        while first or self.peek() != ']':
+            first = False
+            char = self.take()
+            if char == '\\':
+                chars |= self.escape().chars
+                continue
+            if self.peek() == '-' and self.pattern[self.idx + 1:self.idx + 2] not in ('', ']'):
+                self.idx += 1
+                end = self.take()
+                if end == '\\':
+                    raise Unsupported("escaped range end")
+                chars.update(chr(code) for code in range(ord(char), ord(end) + 1))
+            else:
+                chars.add(char)
+        self.idx += 1
+        return CharSet(fold_case(chars), negated)
+
+
+class NFA:
+    """Thompson NFA: per state, labelled edges and epsilon edges."""
+
+    def __init__(self) -> None:
+        self.edges: list[list[tuple[CharSet, int]]] = []
+        self.epsilon: list[list[int]] = []
+
+    def state(self) -> int:
+        self.edges.append([])
+        self.epsilon.append([])
+        if len(self.edges) > STATE_BUDGET * 4:
+            raise OverBudget
+        return len(self.edges) - 1
+
+    def build(self, node: Node) -> tuple[int, int]:
+        kind = node[0]
+        if kind == 'set':
+            start, end = self.state(), self.state()
+            self.edges[start].append((node[1], end))
+            return start, end
+        if kind == 'cat':
+            start = end = self.state()
+            for item in node[1]:
+                first, last = self.build(item)
+                self.epsilon[end].append(first)
+                end = last
+            return start, end
+        if kind == 'alt':
+            start, end = self.state(), self.state()
+            for branch in node[1]:
+                first, last = self.build(branch)
+                self.epsilon[start].append(first)
+                self.epsilon[last].append(end)
+            return start, end
+
+        _, item, low, high = node
+        start = end = self.state()
+        for _ in range(low):
+            first, last = self.build(item)
+            self.epsilon[end].append(first)
+            end = last
+        exit_state = self.state()
+        if high is None:
+            first, last = self.build(item)
+            self.epsilon[end].append(first)
+            self.epsilon[last].append(first)
+            self.epsilon[last].append(exit_state)
+            self.epsilon[end].append(exit_state)
+            return start, exit_state
+        for _ in range(high - low):
+            self.epsilon[end].append(exit_state)
+            first, last = self.build(item)
+            self.epsilon[end].append(first)
+            end = last
+        self.epsilon[end].append(exit_state)
+        return start, exit_state
+
+    def closure(self, states: set[int]) -> frozenset[int]:
+        stack = list(states)
+        seen = set(states)
+        while stack:
+            for target in self.epsilon[stack.pop()]:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return frozenset(seen)
+
+
+class DFA:
+    """Complete, minimized DFA over ``symbols`` (mentioned characters plus
+    ``OTHER``). State 0 is the start state."""
+
+    def __init__(
+        self,
+        symbols: tuple[str, ...],
+        transitions: list[dict[str, int]],
+        accepting: list[bool]
+    ) -> None:
+        self.symbols = symbols
+        self.chars = frozenset(symbols) - {OTHER}
+        self.transitions = transitions
+        self.accepting = accepting
+
+    def step(self, state: int, char: str) -> int:
+        return self.transitions[state][char if char in self.chars else OTHER]
+
+
+def determinize(nfa: NFA, start: int, accept: int) -> DFA:
+    sets = {
+        charset for edges in nfa.edges for charset, _ in edges
+    }
+    symbols = tuple(sorted({char for charset in sets for char in charset.chars})) + (OTHER,)
+
+    initial = nfa.closure({start})
+    index = {initial: 0}
+    queue = [initial]
+    transitions: list[dict[str, int]] = []
+    accepting: list[bool] = []
+    while len(transitions) < len(queue):
+        current = queue[len(transitions)]
+        accepting.append(accept in current)
+        row: dict[str, int] = {}
+        for symbol in symbols:
+            targets = {
+                target for state in current
+                for charset, target in nfa.edges[state] if symbol in charset
+            }
+            following = nfa.closure(targets)
+            if following not in index:
+                if len(queue) >= STATE_BUDGET:
+                    raise OverBudget
+                index[following] = len(queue)
+                queue.append(following)
+            row[symbol] = index[following]
+        transitions.append(row)
+    return minimize(DFA(symbols, transitions, accepting))
+
+
+def minimize(dfa: DFA) -> DFA:
+    # Moore partition refinement, starting from accepting / rejecting.
+    blocks = [int(accepting) for accepting in dfa.accepting]
+    count = len(set(blocks))
+    while True:
+        signatures: dict[tuple, int] = {}
+        refined = []
+        for state, row in enumerate(dfa.transitions):
+            signature = (blocks[state],) + tuple(blocks[row[symbol]] for symbol in dfa.symbols)
+            refined.append(signatures.setdefault(signature, len(signatures)))
+        if len(signatures) == count:
+            break
+        blocks, count = refined, len(signatures)
+
+    # Renumber so the start state's block comes first.
+    order = {blocks[0]: 0}
+    for block in blocks:
+        order.setdefault(block, len(order))
+    transitions: list[dict[str, int]] = [{} for _ in order]
+    accepting = [False] * len(order)
+    for state, row in enumerate(dfa.transitions):
+        block = order[blocks[state]]
+        transitions[block] = {symbol: order[blocks[target]] for symbol, target in row.items()}
+        accepting[block] = dfa.accepting[state]
+    return DFA(dfa.symbols, transitions, accepting)
+
+
+@lru_cache(maxsize=4096)
+def compile_dfa(expression: str) -> DFA | None:
+    """The DFA for the texts ``re.match(expression, text, re.IGNORECASE)``
+    accepts, or ``None`` if the pattern is unsupported or over budget.
+
+    ``match`` only anchors at the start, so unless the pattern ends in
+    ``$`` any text continuing a match is accepted too. Without
+    ``re.MULTILINE`` a trailing ``$`` also matches before a final newline.
+    """
+    pattern = expression[1:] if expression.startswith('^') else expression
+    anchored = pattern.endswith('$') and not pattern.endswith('\\$')
+    if anchored:
+        pattern = pattern[:-1]
+    try:
+        node = RegexReader(pattern).read()
+        nfa = NFA()
+        start, accept = nfa.build(node)
+        rest = nfa.state()
+        nfa.epsilon[accept].append(rest)
+        if anchored:
+            nfa.edges[accept].append((CharSet(frozenset('\n')), rest))
+        else:
+            nfa.edges[rest].append((CharSet(frozenset(), True), rest))
+        accept = rest
+        return determinize(nfa, start, accept)
+    except (Unsupported, OverBudget, ValueError):
+        return None
+
+
+def relate(a: DFA, b: DFA, state_budget: int = STATE_BUDGET) -> Relation | None:
+    """Relate two languages by exploring their product automaton."""
+    symbols = tuple(a.chars | b.chars) + (OTHER,)
+    a_only = b_only = both = False
+    seen = {(0, 0)}
+    stack = [(0, 0)]
+    while stack:
+        x, y = stack.pop()
+        if a.accepting[x] and b.accepting[y]:
+            both = True
+        elif a.accepting[x]:
+            a_only = True
+        elif b.accepting[y]:
+            b_only = True
+        if a_only and b_only and both:
+            break
+        for symbol in symbols:
+            pair = (a.step(x, symbol), b.step(y, symbol))
+            if pair not in seen:
+                if len(seen) >= state_budget:
+                    return None
+                seen.add(pair)
+                stack.append(pair)
+
+    if not a_only and not b_only:
+        return Relation.EQUAL
+    if not a_only:
+        return Relation.SUBSET
+    if not b_only:
+        return Relation.SUPERSET
+    if both:
+        return Relation.INTERSECT
+    return Relation.DISJOINT
+
+
+def check_automaton(a: str, b: str, state_budget: int = STATE_BUDGET) -> Relation | None:
+    """Exact relation between the texts two patterns match.
+
+    Returns ``None`` when either pattern is outside the modelled syntax or
+    the automata exceed ``state_budget``, so the tests after it decide.
+    """
+    a_dfa = compile_dfa(a)
+    b_dfa = compile_dfa(b)
+    if a_dfa is None or b_dfa is None:
+        return None
+    return relate(a_dfa, b_dfa, state_budget)
+
+
+def element_automaton(a: RegexElement, b: RegexElement) -> Relation | None:
+    a_dfa = derived(a, 'automaton', compile_dfa)
+    b_dfa = derived(b, 'automaton', compile_dfa)
+    if a_dfa is None or b_dfa is None:
+        return None
+    return relate(a_dfa, b_dfa)
+
+
+# Pass to ``RelationEngine(element_tests=...)`` so ``check_automaton``
+# builds each element's DFA once.
+AUTOMATON_TESTS: dict[Test, ElementTest] = {check_automaton: element_automaton}
@@ -0,0 +1,227 @@
+from __future__ import annotations
+from beartype.typing import Iterable, NamedTuple, Sequence
+
+from array import array
+from collections import OrderedDict
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+
+from graph_compiler.arena import Arena
+from graph_compiler.lexer import TokenTable
+
+
+# Bump whenever the lexer or parser output changes, so stale entries miss.
+CACHE_VERSION = 3
+
+MAGIC = b'GCC2'
+# magic, token rows, arena rows (-1 for no table or arena), arena root, and
+# the line, column and UTF-8 message size of the error, if any
+HEADER = struct.Struct('<4siiiiii')
+TABLE_COLUMNS = ('types', 'starts', 'ends')
+ARENA_COLUMNS = ('kinds', 'tokens', 'first_child', 'next_sibling')
+
+
+class CacheStats(NamedTuple):
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @classmethod
+    def total(cls, stats: Iterable[CacheStats]) -> CacheStats:
+        return cls(*(sum(column) for column in zip(cls(), *stats)))
+
+
+class Failure(NamedTuple):
+    """Where and why lexing or parsing a cached source stopped."""
+    line: int
+    column: int
+    message: str
+
+
+class Cache:
+    """Content-addressed store of lexed and parsed sources.
+
+    Entries are keyed on a hash of the source text and ``CACHE_VERSION`` and
+    hold the raw ``array('i')`` columns of the ``TokenTable`` and ``Arena``
+    in native byte order, followed by the line, column and message of the
+    error that stopped lexing or parsing, for sources that have one. The
+    source itself is not stored; callers already have it in hand to compute
+    the key.
+
+    Entries are written to a temporary file and renamed into place, so
+    concurrent processes only ever see whole entries. Reads refresh the
+    entry's mtime, and writes evict the least recently used entries once the
+    directory grows past ``max_bytes``. Sizes and recency are tracked in
+    memory; the directory is only scanned again, to pick up what other
+    processes wrote or removed, after as many writes as it had entries.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 1 << 30) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        # Entry path to size, least recently used first; ``None`` until the
+        # first write scans the directory.
+        self.entries: OrderedDict[str, int] | None = None
+        self.bytes: int = 0
+        self.writes: int = 0
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, source: str) -> str:
+        digest = hashlib.sha256(f"{CACHE_VERSION}:".encode())
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key + '.gcc')
+
+    def get(
+        self,
+        source: str,
+        copy: bool = False
+    ) -> tuple[TokenTable | None, Arena | None, Failure | None] | None:
+        """Load the entry for ``source`` as its table, arena and
+        ``Failure``, each ``None`` if compiling it did not produce one, or
+        ``None`` on a miss.
+
+        The columns are views over a read-only memory map of the entry,
+        unless ``copy`` asks for ordinary arrays (needed to pickle them).
+        """
+        path = self.path(self.key(source))
+        try:
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+
+        view = memoryview(data)
+        if len(view) < HEADER.size:
+            self.misses += 1
+            return None
+        magic, n_tokens, n_nodes, root, line, char, n_message = HEADER.unpack_from(view)
+        width = array('i').itemsize
+        size = HEADER.size + n_message + width * (
+            max(n_tokens, 0) * len(TABLE_COLUMNS) + max(n_nodes, 0) * len(ARENA_COLUMNS)
+        )
+        if magic != MAGIC or len(view) != size:
+            self.misses += 1
+            return None
+        if self.entries is not None and path in self.entries:
+            self.entries.move_to_end(path)
+
+        offset = HEADER.size
+
+        def column(rows: int) -> Sequence[int]:
+            nonlocal offset
+            chunk = view[offset:offset + rows * width]
+            offset += rows * width
+            if copy:
+                values = array('i')
+                values.frombytes(chunk)
+                return values
+            return chunk.cast('i')
+
+        table = arena = failure = None
+        if n_tokens >= 0:
+            table = TokenTable(source)
+            for name in TABLE_COLUMNS:
+                setattr(table, name, column(n_tokens))
+        if n_nodes >= 0:
+            arena = Arena(table)
+            for name in ARENA_COLUMNS:
+                setattr(arena, name, column(n_nodes))
+            arena.root = root
+        if arena is None:
+            failure = Failure(line, char, bytes(view[offset:]).decode('utf-8', 'surrogatepass'))
+
+        self.hits += 1
+        return table, arena, failure
+
+    def put(
+        self,
+        source: str,
+        table: TokenTable | None,
+        arena: Arena | None,
+        failure: Failure | None = None
+    ) -> None:
+        path = self.path(self.key(source))
+        line, char, message = failure or (0, 0, '')
+        message_bytes = message.encode('utf-8', 'surrogatepass')
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(
+                    MAGIC,
+                    -1 if table is None else len(table),
+                    -1 if arena is None else len(arena),
+                    0 if arena is None else arena.root,
+                    line, char, len(message_bytes)
+                ))
+                if table is not None:
+                    for name in TABLE_COLUMNS:
+                        f.write(getattr(table, name))
+                if arena is not None:
+                    for name in ARENA_COLUMNS:
+                        f.write(getattr(arena, name))
+                f.write(message_bytes)
+                size = f.tell()
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        if self.entries is None or self.writes >= len(self.entries):
+            self.scan()
+        else:
+            self.bytes += size - self.entries.pop(path, 0)
+            self.entries[path] = size
+        self.writes += 1
+        self.evict()
+
+    def scan(self) -> None:
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.name.endswith('.gcc'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, entry.path, stat.st_size))
+        entries.sort()
+        self.entries = OrderedDict((path, size) for _, path, size in entries)
+        self.bytes = sum(self.entries.values())
+        self.writes = 0
+
+    def evict(self) -> None:
+        if self.entries is None:
+            self.scan()
+        while self.bytes > self.max_bytes and self.entries:
+            path, size = self.entries.popitem(last=False)
+            self.bytes -= size
+            try:
+                os.unlink(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                # Another process evicted it first.
+                pass
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.stats.hit_rate
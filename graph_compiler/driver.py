@@ -0,0 +1,151 @@
+from __future__ import annotations
+from beartype.typing import Iterable, NamedTuple
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+import sys
+
+from graph_compiler.arena import Arena, ArenaParser
+from graph_compiler.cache import Cache, CacheStats, Failure
+from graph_compiler.lexer import Positions, PrescanLexer, TokenTable
+
+
+class Diagnostic(NamedTuple):
+    """A problem found in one file; line and column are 0 when the file
+    could not be read at all."""
+    path: str
+    line: int
+    column: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}:{self.column}: {self.message}"
+
+
+class CompileResult(NamedTuple):
+    """What compiling one file produced; ``table`` and ``arena`` are ``None``
+    when lexing or parsing stopped on a diagnostic. ``cache_stats`` counts
+    the cache lookups, misses and evictions compiling it caused."""
+    path: str
+    table: TokenTable | None
+    arena: Arena | None
+    diagnostics: list[Diagnostic]
+    cached: bool = False
+    cache_stats: CacheStats = CacheStats()
+
+
+# One ``Cache`` per directory in each process, kept across files so its
+# statistics and index of entries carry over.
+CACHES: dict[str, Cache] = {}
+
+
+def compile_source(
+    source: str,
+    path: str = '<string>',
+    cache: Cache | None = None,
+    copy: bool = False
+) -> CompileResult:
+    """Lex and parse ``source``, or load it from ``cache``.
+
+    Cached columns are views over the entry's memory map unless ``copy``
+    asks for arrays, which a result bound for another process needs.
+    """
+    if cache is not None:
+        entry = cache.get(source, copy)
+        if entry is not None:
+            table, arena, failure = entry
+            diagnostics = [] if failure is None else [Diagnostic(path, *failure)]
+            return CompileResult(path, table, arena, diagnostics, True)
+
+    table = arena = failure = None
+    lexer = PrescanLexer(source)
+    try:
+        table = lexer.tokenize()
+    except SyntaxError as e:
+        failure = Failure(lexer.line_num, lexer.char_num, str(e))
+    else:
+        parser = ArenaParser(table)
+        try:
+            arena = parser.parse()
+        except (SyntaxError, RecursionError) as e:
+            row = parser.tokens.cursor()
+            message = str(e) if isinstance(e, SyntaxError) else "nesting too deep"
+            failure = Failure(*table.position(row), message)
+
+    if cache is not None:
+        cache.put(source, table, arena, failure)
+    diagnostics = [] if failure is None else [Diagnostic(path, *failure)]
+    return CompileResult(path, table, arena, diagnostics)
+
+
+def decode(data: bytes) -> str:
+    # Newlines translated as reading in text mode would.
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def compile_file(
+    path: str,
+    cache_dir: str | None = None,
+    copy: bool = False
+) -> CompileResult:
+    # Unreadable files become diagnostics like syntax errors do, so one bad
+    # file cannot take the rest of a ``compile_files`` batch down with it.
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return CompileResult(path, None, None, [Diagnostic(path, 0, 0, e.strerror or str(e))])
+    try:
+        source = decode(data)
+    except UnicodeDecodeError as e:
+        prefix = decode(data[:e.start])
+        diagnostic = Diagnostic(path, *Positions(prefix).resolve(len(prefix)), str(e))
+        return CompileResult(path, None, None, [diagnostic])
+    if cache_dir is None:
+        return compile_source(source, path)
+    cache = CACHES.get(cache_dir)
+    if cache is None:
+        cache = CACHES[cache_dir] = Cache(cache_dir)
+    before = cache.stats
+    result = compile_source(source, path, cache, copy)
+    return result._replace(cache_stats=CacheStats(*(
+        after - start for after, start in zip(cache.stats, before)
+    )))
+
+
+def compile_files(
+    paths: Iterable[str],
+    workers: int | None = None,
+    cache_dir: str | None = None
+) -> list[CompileResult]:
+    """Compile every file, in parallel unless ``workers`` is 1.
+
+    Results come back in the order of ``paths``. With ``cache_dir`` set,
+    files whose source is already in the cache are not lexed or parsed;
+    ``cache_totals`` adds up the cache statistics over all workers.
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        return [compile_file(path, cache_dir) for path in paths]
+
+    # Results are pickled back, which memory-mapped cache columns cannot be.
+    compile_one = partial(compile_file, cache_dir=cache_dir, copy=True)
+    # Hand out several files per task so small files don't drown in IPC.
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(compile_one, paths, chunksize=chunksize))
+
+
+def cache_totals(results: Iterable[CompileResult]) -> CacheStats:
+    return CacheStats.total(result.cache_stats for result in results)
+
+
+if __name__ == '__main__':
+    failed = False
+    for result in compile_files(sys.argv[1:]):
+        for diagnostic in result.diagnostics:
+            print(diagnostic)
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,447 @@
+from __future__ import annotations
+from beartype.typing import Callable, Generic, Iterator, Sequence, TypeVar
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from graph_compiler.lexer import Positions, RegexLexer, TableLexer, TokenTable, TokenType
+from graph_compiler.parser import AST, Parser
+
+
+T = TypeVar("T")
+
+# Parses the statement spanning token rows ``first`` to ``last`` inclusive.
+ParseStatement = Callable[[TokenTable, int, int], T]
+
+COLUMNS = ('types', 'starts', 'ends')
+
+# Statements per block of ``Document.blocks``.
+BLOCK = 64
+
+
+def statement_ends(table: TokenTable) -> array:
+    """Row index of the token closing each top-level statement.
+
+    Statements close on a ``SEMICOLON`` outside any braces, or on the
+    ``RBRACE`` that brings the depth back to zero, unless a ``SEMICOLON``
+    follows it and closes the statement instead. Tokens left over after the
+    last one form a final statement closed by ``EOF``.
+    """
+    types = table.types
+    ends = array('i')
+    boundaries = Boundaries()
+    for idx, token_type in enumerate(types):
+        back = boundaries.feed(token_type)
+        if back != NO_CLOSE:
+            ends.append(idx - back)
+        if token_type == TokenType.EOF.value:
+            if idx > (ends[-1] + 1 if ends else 0):
+                ends.append(idx)
+    return ends
+
+
+# ``Boundaries.feed`` when no statement closes.
+NO_CLOSE = -1
+
+
+class Boundaries:
+    """The rule of ``statement_ends``, for tokens fed one at a time.
+
+    ``feed`` takes the next token type and tells how many tokens back the
+    last statement closed: 0 on this token, 1 on the ``RBRACE`` before it,
+    which only turns out once the token after it is known, or ``NO_CLOSE``.
+    """
+    __slots__ = ('depth', 'brace')
+
+    def __init__(self) -> None:
+        self.depth = 0
+        # Whether the last token was an ``RBRACE`` back at depth zero.
+        self.brace = False
+
+    def feed(self, token_type: int) -> int:
+        brace, self.brace = self.brace, False
+        if token_type == TokenType.SEMICOLON.value and self.depth == 0:
+            return 0
+        if token_type == TokenType.LBRACE.value:
+            self.depth += 1
+        elif token_type == TokenType.RBRACE.value:
+            self.depth -= 1
+            self.brace = self.depth == 0
+        return 1 if brace else NO_CLOSE
+
+
+def parse_statement(table: TokenTable, first: int, last: int) -> AST:
+    """A ``ParseStatement`` running ``Parser.statement`` over the rows."""
+    lexer = TableLexer(table)
+    lexer.row = first - 1
+    parser = Parser(lexer)
+    node = parser.statement()
+    if parser.lookahead.token_type != TokenType.EOF and parser.tokens.cursor() <= last:
+        parser.error("end of statement")
+    return node
+
+
+def lex(window: str) -> tuple[TokenTable, list[int]]:
+    """Tokens of ``window``, lexed past any invalid characters, and the
+    offsets of those characters."""
+    lexer = RegexLexer(window)
+    table = TokenTable(window)
+    invalid: list[int] = []
+    while True:
+        try:
+            if lexer.emit(table).token_type == TokenType.EOF:
+                return table, invalid
+        except SyntaxError:
+            invalid.append(lexer.idx)
+            lexer.seek(lexer.idx + 1)
+
+
+class Statement(Generic[T]):
+    """One top-level statement of a ``Document``.
+
+    ``text`` runs from the end of the statement before it to the end of its
+    closing token, and ``table`` holds its tokens with offsets into
+    ``text``, followed by an ``EOF`` row of its own. The document's tail,
+    after the last closing token, only counts as a statement when it has
+    tokens besides ``EOF``. ``lines`` and ``tabs`` count those characters
+    in ``text``, and ``invalid`` holds the offsets of characters the lexer
+    skipped. ``error`` is the diagnostic of a statement that failed to lex
+    or parse, with its ``result`` left ``None``.
+    """
+    __slots__ = ('text', 'table', 'result', 'error', 'invalid', 'lines', 'tabs')
+
+    def __init__(self, text: str, table: TokenTable, invalid: tuple[int, ...] = ()) -> None:
+        self.text = text
+        self.table = table
+        self.result: T | None = None
+        self.error: str | None = None
+        self.invalid = invalid
+        self.lines = text.count('\n') + text.count('\r')
+        self.tabs = text.count('\t')
+
+
+def cut(
+    window: str, table: TokenTable, invalid: Sequence[int],
+    text_start: int, text_end: int, first: int, stop: int
+) -> Statement:
+    piece = TokenTable(window[text_start:text_end])
+    piece.types = table.types[first:stop]
+    piece.starts = array('i', [idx - text_start for idx in table.starts[first:stop]])
+    piece.ends = array('i', [idx - text_start for idx in table.ends[first:stop]])
+    if not piece.types or piece.types[-1] != TokenType.EOF.value:
+        piece.append(TokenType.EOF, len(piece.source), len(piece.source))
+    return Statement(piece.source, piece, tuple(
+        idx - text_start for idx in invalid if text_start <= idx < text_end
+    ))
+
+
+def pieces(window: str, table: TokenTable, ends: array, invalid: Sequence[int] = ()) -> list[Statement]:
+    """Cut ``table``, lexed from ``window``, after every row in ``ends``.
+    The last piece runs to the end of ``window``."""
+    out: list[Statement] = []
+    text_start = first = 0
+    for row in ends:
+        out.append(cut(window, table, invalid, text_start, table.ends[row], first, row + 1))
+        text_start, first = table.ends[row], row + 1
+    if first < len(table):
+        out.append(cut(window, table, invalid, text_start, len(window), first, len(table)))
+    return out
+
+
+class Document(Generic[T]):
+    """A source kept lexed and parsed across edits.
+
+    The source is held as a run of ``Statement`` pieces, each with its own
+    text and token table, grouped into ``blocks`` of up to ``BLOCK``. Per
+    block there are the characters, line breaks and tabs in its text, with
+    running totals of those and of statements. No piece stores an absolute
+    offset, so an edit never shifts the rest of the file: ``edit`` finds
+    the statements it touches by bisecting the totals, re-lexes from the
+    statement boundary in front of the change only until a closing token
+    lines up with an old one again, and re-parses just the statements in
+    between. ``parse_statement`` sees each statement's own table, with
+    positions resolving to document lines and columns.
+
+    An edit is always applied. Characters the lexer rejects are skipped,
+    and a statement holding one, or failing to parse, keeps its
+    diagnostic in ``error``; ``diagnostics`` lists them all, positioned
+    against the current source.
+
+    ``source``, ``table`` and ``ends`` put the whole document back together
+    on first use after an edit, for consumers wanting absolute rows.
+    """
+
+    def __init__(self, source: str, parse_statement: ParseStatement = parse_statement) -> None:
+        self.parse_statement = parse_statement
+        self.blocks: list[list[Statement[T]]] = []
+        # Characters, line breaks, tabs and failed statements per block.
+        self.lengths: list[int] = []
+        self.breaks: list[int] = []
+        self.tab_counts: list[int] = []
+        self.failures: list[int] = []
+        # Statements, characters, line breaks and tabs up to the end of
+        # each block.
+        self.counts: list[int] = []
+        self.totals: list[int] = []
+        self.line_totals: list[int] = []
+        self.tab_totals: list[int] = []
+        self.tail: Statement[T] = pieces('', RegexLexer('').tokenize(), array('i'))[0]
+        self._whole: tuple[str, TokenTable, array] | None = None
+        self.edit(0, 0, source)
+
+    def __len__(self) -> int:
+        """Statements before the tail."""
+        return self.counts[-1] if self.counts else 0
+
+    def __iter__(self) -> Iterator[Statement[T]]:
+        for block in self.blocks:
+            yield from block
+        if len(self.tail.table) > 1:
+            yield self.tail
+
+    @property
+    def results(self) -> list[T]:
+        return [statement.result for statement in self]
+
+    @property
+    def source(self) -> str:
+        return self.assemble()[0]
+
+    @property
+    def table(self) -> TokenTable:
+        return self.assemble()[1]
+
+    @property
+    def ends(self) -> array:
+        return self.assemble()[2]
+
+    def statement(self, idx: int) -> tuple[int, int]:
+        ends = self.ends
+        first = ends[idx - 1] + 1 if idx else 0
+        return first, ends[idx]
+
+    def assemble(self) -> tuple[str, TokenTable, array]:
+        if self._whole is None:
+            parts = [*(s for block in self.blocks for s in block), self.tail]
+            table = TokenTable(''.join(part.text for part in parts))
+            ends = array('i')
+            offset = 0
+            for part in parts:
+                # Only the tail keeps its EOF row.
+                stop = len(part.table) - (part is not self.tail)
+                table.types.extend(part.table.types[:stop])
+                table.starts.extend(idx + offset for idx in part.table.starts[:stop])
+                table.ends.extend(idx + offset for idx in part.table.ends[:stop])
+                offset += len(part.text)
+                ends.append(len(table) - 1)
+            if len(self.tail.table) == 1:
+                ends.pop()
+            self._whole = table.source, table, ends
+        return self._whole
+
+    def locate(self, offset: int) -> tuple[int, int]:
+        """Index of the first statement ending after ``offset``
+        (``len(self)`` for the tail), and the offset it starts at."""
+        block = bisect_right(self.totals, offset)
+        if block == len(self.blocks):
+            return len(self), self.totals[-1] if self.totals else 0
+        idx = self.counts[block - 1] if block else 0
+        start = self.totals[block - 1] if block else 0
+        for statement in self.blocks[block]:
+            if start + len(statement.text) > offset:
+                break
+            idx += 1
+            start += len(statement.text)
+        return idx, start
+
+    def prefix(self, idx: int) -> tuple[int, int, int]:
+        """Characters, line breaks and tabs in front of statement ``idx``."""
+        block = bisect_right(self.counts, idx)
+        if block == len(self.blocks):
+            block -= 1
+        if block < 0:
+            return 0, 0, 0
+        offset = self.totals[block - 1] if block else 0
+        lines = self.line_totals[block - 1] if block else 0
+        tabs = self.tab_totals[block - 1] if block else 0
+        for statement in self.blocks[block][:idx - (self.counts[block - 1] if block else 0)]:
+            offset += len(statement.text)
+            lines += statement.lines
+            tabs += statement.tabs
+        return offset, lines, tabs
+
+    def statements(self, start: int, stop: int) -> Iterator[Statement[T]]:
+        block = bisect_right(self.counts, start)
+        pos = start - (self.counts[block - 1] if block else 0)
+        for _ in range(start, stop):
+            if pos == len(self.blocks[block]):
+                block, pos = block + 1, 0
+            yield self.blocks[block][pos]
+            pos += 1
+
+    def at(self, idx: int) -> Statement[T]:
+        block = bisect_right(self.counts, idx)
+        return self.blocks[block][idx - (self.counts[block - 1] if block else 0)]
+
+    def splice(self, start: int, stop: int, statements: list[Statement[T]]) -> None:
+        """Replace statements ``start`` to ``stop`` (exclusive)."""
+        if not self.blocks:
+            self.blocks.append([])
+            for column in (self.lengths, self.breaks, self.tab_counts, self.failures,
+                           self.counts, self.totals, self.line_totals, self.tab_totals):
+                column.append(0)
+        last_block = len(self.blocks) - 1
+        first = min(bisect_right(self.counts, start), last_block)
+        last = min(max(bisect_left(self.counts, stop), first), last_block)
+        merged = [s for block in self.blocks[first:last + 1] for s in block]
+        base = self.counts[first - 1] if first else 0
+        merged[start - base:stop - base] = statements
+        # Keep blocks at least half full by taking in a neighbour.
+        while len(merged) < BLOCK // 2 and last < last_block:
+            last += 1
+            merged.extend(self.blocks[last])
+
+        # As few blocks as fit, evenly filled.
+        size = -(-len(merged) // -(-len(merged) // BLOCK)) if merged else 1
+        blocks = [merged[idx:idx + size] for idx in range(0, len(merged), size)]
+        self.blocks[first:last + 1] = blocks
+        self.lengths[first:last + 1] = [sum(len(s.text) for s in block) for block in blocks]
+        self.breaks[first:last + 1] = [sum(s.lines for s in block) for block in blocks]
+        self.tab_counts[first:last + 1] = [sum(s.tabs for s in block) for block in blocks]
+        self.failures[first:last + 1] = [
+            sum(s.error is not None for s in block) for block in blocks
+        ]
+        for per_block, totals in (
+            (list(map(len, self.blocks)), self.counts),
+            (self.lengths, self.totals),
+            (self.breaks, self.line_totals),
+            (self.tab_counts, self.tab_totals),
+        ):
+            totals[first:] = list(accumulate(
+                per_block[first:], initial=totals[first - 1] if first else 0
+            ))[1:]
+
+    def check(self, statement: Statement[T], offset: int, lines: int, tabs: int) -> None:
+        """Parse ``statement``, found at ``offset`` behind ``lines`` line
+        breaks and ``tabs`` tabs, recording why if it fails."""
+        table = statement.table
+        table.positions = positions = Positions(statement.text, offset, lines, tabs)
+        statement.result = statement.error = None
+        if statement.invalid:
+            idx = statement.invalid[0]
+            line, column = positions.resolve(idx)
+            statement.error = f"Invalid character {statement.text[idx]} at [{line}:{column}]"
+            return
+        # The tail closes on its EOF row, any other statement on the row
+        # before it.
+        last = len(table) - (1 if statement is self.tail else 2)
+        try:
+            statement.result = self.parse_statement(table, 0, last)
+        except SyntaxError as e:
+            statement.error = e.msg
+        except RecursionError:
+            line, column = positions.resolve(0)
+            statement.error = f"Statement at [{line}:{column}] nests too deeply"
+
+    def diagnostics(self) -> list[tuple[int, str]]:
+        """Index and message of every statement that failed to lex or parse,
+        re-checked where earlier edits have moved it."""
+        out = []
+        located = [
+            (self.counts[block - 1] if block else 0, block) for block, failures
+            in enumerate(self.failures) if failures
+        ]
+        if self.tail.error is not None:
+            located.append((len(self), None))
+        for idx, block in located:
+            offset, lines, tabs = self.prefix(idx)
+            for statement in self.blocks[block] if block is not None else [self.tail]:
+                if statement.error is not None:
+                    positions = statement.table.positions
+                    if (positions.offset, positions.lines, positions.tabs) != (offset, lines, tabs):
+                        self.check(statement, offset, lines, tabs)
+                    out.append((idx, statement.error))
+                offset += len(statement.text)
+                lines += statement.lines
+                tabs += statement.tabs
+                idx += 1
+        return out
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> range:
+        """Apply an edit and return the indices of the re-parsed statements."""
+        self._whole = None
+        count = len(self)
+        start, base = self.locate(offset)
+        if start and offset <= base + (self.at(start) if start < count else self.tail).table.ends[0]:
+            # Changing the first token after a closing '}' to a ';' would
+            # join it to the statement the '}' closed.
+            previous = self.at(start - 1)
+            if previous.table.types[-2] == TokenType.RBRACE.value:
+                start -= 1
+                base -= len(previous.text)
+        stop = self.locate(offset + deleted)[0] + 1
+        local = offset - base
+        edit_end = local + len(inserted)
+        delta = len(inserted) - deleted
+
+        while True:
+            final = stop > count
+            old = list(self.statements(start, min(stop, count)))
+            text = ''.join(s.text for s in old) + (self.tail.text if final else '')
+            window = text[:local] + inserted + text[local + deleted:]
+            fresh, invalid = lex(window)
+            ends = statement_ends(fresh)
+            if not final:
+                # Whatever reaches the end of the window may read on.
+                eof = len(fresh) - 1
+                ends = array('i', [
+                    row for row in ends
+                    if row + 1 < eof or fresh.types[row] == TokenType.SEMICOLON.value
+                ])
+
+            # Old statement index by where it ends in the window, pre-edit.
+            bounds = dict(zip(accumulate(len(s.text) for s in old), range(start, start + len(old))))
+            sync = None
+            for n, row in enumerate(ends):
+                if fresh.starts[row] >= edit_end:
+                    sync = bounds.get(fresh.ends[row] - delta)
+                    if sync is not None:
+                        ends = ends[:n + 1]
+                        break
+            if sync is not None or final:
+                break
+            stop = start + 2 * (stop - start)
+
+        new = pieces(window, fresh, ends, invalid)
+        rest = new.pop()
+        checked = new
+        if sync is None:
+            self.splice(start, count, new)
+            self.tail = rest
+            if len(rest.table) > 1:
+                new.append(rest)
+            elif rest.invalid:
+                checked = [*new, rest]
+        else:
+            # Past the sync point the window lexes as before.
+            self.splice(start, sync + 1, new)
+
+        offset, lines, tabs = self.prefix(start)
+        for statement in checked:
+            self.check(statement, offset, lines, tabs)
+            offset += len(statement.text)
+            lines += statement.lines
+            tabs += statement.tabs
+        self.recount(start, start + len(new))
+        return range(start, start + len(new))
+
+    def recount(self, start: int, stop: int) -> None:
+        """Refresh ``failures`` for the blocks holding statements
+        ``start`` to ``stop`` (exclusive)."""
+        if not self.blocks:
+            return
+        first = bisect_right(self.counts, start)
+        last = min(bisect_right(self.counts, stop - 1), len(self.blocks) - 1)
+        for block in range(first, last + 1):
+            self.failures[block] = sum(s.error is not None for s in self.blocks[block])
@@ -0,0 +1,182 @@
+from __future__ import annotations
+from beartype.typing import Union
+
+from array import array
+
+from graph_compiler.arena import NONE, Arena, NodeView
+from graph_compiler.parser import AST, Assign, BinaryOp, Block, Identifier, Number, Program
+
+
+# Opcodes, stored as an index into this tuple.
+OPS: tuple[str, ...] = ('const', 'load', 'add', 'sub', 'mul', 'div')
+CONST, LOAD, ADD, SUB, MUL, DIV = range(len(OPS))
+BINARY: dict[str, int] = {'+': ADD, '-': SUB, '*': MUL, '/': DIV}
+
+Node = Union[AST, NodeView]
+
+
+def fold(op: int, lhs: int | str, rhs: int | str) -> int | None:
+    """``lhs op rhs`` if it is an exact integer, else ``None``."""
+    if not isinstance(lhs, int) or not isinstance(rhs, int):
+        return None
+    if op == ADD:
+        return lhs + rhs
+    if op == SUB:
+        return lhs - rhs
+    if op == MUL:
+        return lhs * rhs
+    # Left alone unless exact, so folding cannot pick a rounding rule.
+    if rhs != 0 and lhs % rhs == 0:
+        return lhs // rhs
+    return None
+
+
+def shape(node: Node) -> tuple[type[AST], str | None, list[Node]]:
+    """Kind, text and children of a tree node or arena row alike."""
+    if isinstance(node, NodeView):
+        return node.kind, node.text, node.children
+    match node:
+        case BinaryOp():
+            return BinaryOp, node.op.text, [node.left, node.right]
+        case Number() | Identifier():
+            return type(node), node.value, []
+        case Assign():
+            return Assign, None, [node.target, node.value]
+        case Block():
+            return Block, None, [node.name, *node.statements]
+        case Program():
+            return Program, None, list(node.statements)
+    raise TypeError(f"Cannot lower {node!r}")
+
+
+class Dag:
+    """Hash-consed dataflow graph of a program's expressions.
+
+    Node ``i`` is row ``i`` of the parallel ``array('i')`` columns ``ops``,
+    ``left`` and ``right``. A ``CONST`` node's ``left`` indexes
+    ``constants`` and a ``LOAD`` node's indexes ``names``; binary nodes
+    point at their operands, which always come earlier, so rows are in
+    topological order. Each distinct ``(op, left, right)`` is stored once,
+    and binary nodes over two integer constants are folded into a constant.
+
+    An identifier stands for the value node of the latest assignment to
+    its name before it, in its own block or, failing that, the innermost
+    enclosing one; names assigned inside a block are not visible after
+    it. Any other identifier is a free input, a ``LOAD`` of the bare name.
+    ``outputs`` lists every assignment as its block-qualified target
+    (``outer.inner.name``) and value node, and every bare expression
+    statement with a ``None`` target. ``tree_nodes`` counts the expression
+    nodes lowered, before sharing.
+    """
+
+    def __init__(self) -> None:
+        self.ops = array('i')
+        self.left = array('i')
+        self.right = array('i')
+        self.constants: list[int | str] = []
+        self.names: list[str] = []
+        self.outputs: list[tuple[str | None, int]] = []
+        self.tree_nodes: int = 0
+        # Value node of each name assigned so far, per open block.
+        self.scopes: list[dict[str, int]] = [{}]
+        self._nodes: dict[tuple[int, int, int], int] = {}
+        self._constants: dict[int | str, int] = {}
+        self._names: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def add(self, op: int, left: int, right: int = NONE) -> int:
+        key = (op, left, right)
+        idx = self._nodes.get(key)
+        if idx is None:
+            idx = self._nodes[key] = len(self.ops)
+            self.ops.append(op)
+            self.left.append(left)
+            self.right.append(right)
+        return idx
+
+    def constant(self, value: int | str) -> int:
+        slot = self._constants.get(value)
+        if slot is None:
+            slot = self._constants[value] = len(self.constants)
+            self.constants.append(value)
+        return self.add(CONST, slot)
+
+    def load(self, name: str) -> int:
+        slot = self._names.get(name)
+        if slot is None:
+            slot = self._names[name] = len(self.names)
+            self.names.append(name)
+        return self.add(LOAD, slot)
+
+    def resolve(self, name: str) -> int:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return self.load(name)
+
+    def binary(self, op: int, left: int, right: int) -> int:
+        if self.ops[left] == CONST and self.ops[right] == CONST:
+            value = fold(op, self.constants[self.left[left]], self.constants[self.left[right]])
+            if value is not None:
+                return self.constant(value)
+        return self.add(op, left, right)
+
+    def expression(self, tree: Node) -> int:
+        # Post-order with an explicit stack, so depth is unbounded.
+        values: list[int] = []
+        stack: list[tuple[Node, bool]] = [(tree, False)]
+        while stack:
+            node, ready = stack.pop()
+            kind, text, children = shape(node)
+            if kind is BinaryOp:
+                if ready:
+                    right = values.pop()
+                    values.append(self.binary(BINARY[text], values.pop(), right))
+                    continue
+                self.tree_nodes += 1
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children))
+            elif kind is Number:
+                self.tree_nodes += 1
+                # Digits like '²' pass the lexer but not ``int``; keep them as text.
+                values.append(self.constant(int(text) if text.isdecimal() else text))
+            elif kind is Identifier:
+                self.tree_nodes += 1
+                values.append(self.resolve(text))
+            else:
+                raise TypeError(f"{kind.__name__} is not an expression")
+        return values[0]
+
+    def statements(self, statements: list[Node], prefix: str = '') -> None:
+        for statement in statements:
+            kind, _, children = shape(statement)
+            if kind is Assign:
+                target, value = children
+                name, node = shape(target)[1], self.expression(value)
+                self.scopes[-1][name] = node
+                self.outputs.append((prefix + name, node))
+            elif kind is Block:
+                name, *body = children
+                self.scopes.append({})
+                self.statements(body, f"{prefix}{shape(name)[1]}.")
+                self.scopes.pop()
+            else:
+                self.outputs.append((None, self.expression(statement)))
+
+    def report(self) -> str:
+        shared = 1 - len(self) / self.tree_nodes if self.tree_nodes else 0.0
+        return (
+            f"tree nodes {self.tree_nodes}, dag nodes {len(self)} "
+            f"({shared:.1%} fewer), constants {len(self.constants)}, "
+            f"names {len(self.names)}, outputs {len(self.outputs)}"
+        )
+
+
+def lower(program: Program | Arena) -> Dag:
+    """Lower a parsed program, as a tree or an ``Arena``, into a ``Dag``."""
+    dag = Dag()
+    root = program[program.root] if isinstance(program, Arena) else program
+    dag.statements(shape(root)[2])
+    return dag
@@ -1,7 +1,14 @@
 from __future__ import annotations
-from beartype.typing import Hashable, cast
+from beartype.typing import Callable, Hashable, Iterable, Iterator, TextIO, cast
 
+from array import array
+from bisect import bisect_left
+from codecs import getincrementaldecoder
+from collections import deque
 from enum import Enum, auto
+import mmap
+from sys import intern
+import re
 
 
 class TokenType(Enum):
@@ -30,10 +37,12 @@ class TokenType(Enum):
 
 
 class Token:
+    __slots__ = ('token_type', 'text', '_hash')
 
     def __init__(self, token_type: TokenType, text: str) -> None:
         self.token_type = token_type
         self.text = text
+        self._hash = hash((token_type, text))
 
     def __str__(self) -> str:
         return f"{self.text}, {TokenType(self.token_type).name}"
@@ -42,7 +51,7 @@ class Token:
         return self.__str__()
 
     def __hash__(self) -> Hashable:
-        return hash((self.token_type, self.text))
+        return self._hash
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Token):
@@ -53,13 +62,185 @@ class Token:
         return False
 
 
+# Characters the lexer steps over without producing a token.
+SKIPPED: str = ' \t\n\r,#'
+
+# Single-character tokens, keyed by the character that produces them.
+PUNCTUATION: dict[str, TokenType] = {
+    '\'': TokenType.QUOTE,
+    '\"': TokenType.QUOTE,
+    ';': TokenType.SEMICOLON,
+    '!': TokenType.EXCLAMATION,
+    '$': TokenType.DOLLAR,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    '[': TokenType.LBRACKET,
+    ']': TokenType.RBRACKET,
+    '{': TokenType.LBRACE,
+    '}': TokenType.RBRACE,
+    '.': TokenType.PERIOD,
+    ':': TokenType.COLON,
+    '@': TokenType.AT,
+    '|': TokenType.PIPE,
+    '+': TokenType.POSITIVE,
+    '-': TokenType.NEGATIVE,
+    '*': TokenType.MUL,
+    '/': TokenType.DIV,
+    '=': TokenType.EQUALS,
+}
+
+# Punctuation and EOF tokens never differ between occurrences, so the lexers
+# hand out these shared instances instead of allocating a new Token each time.
+PUNCTUATION_TOKENS: dict[str, Token] = {
+    char: Token(token_type, char) for char, token_type in PUNCTUATION.items()
+}
+EOF_TOKEN = Token(TokenType.EOF, '<EOF>')
+
+# One match per token: group 1 is the skipped run in front of the token,
+# followed by at most one of NUMBER (2), ID (3) or punctuation (4).
+SCAN_PATTERN = re.compile(
+    rf"([{re.escape(SKIPPED)}]*)"
+    r"(?:([0-9]+)|([A-Za-z]+)|"
+    rf"([{re.escape(''.join(PUNCTUATION))}]))?"
+)
+SKIP, NUMBER_RUN, ALPHA_RUN, PUNCT = 1, 2, 3, 4
+
+LINE_BREAK = re.compile(r'[\n\r]')
+TAB = re.compile(r'\t')
+
+
+class Positions:
+    """Line and column of any offset into a source.
+
+    Lines count every ``\n`` and ``\r`` in front of the offset; columns
+    count characters from the start of the source, a tab as five. The
+    sorted offsets of both kinds of character are collected on first use,
+    and each lookup is then a ``bisect``.
+
+    ``source`` may be a window of a longer text starting at ``offset``,
+    with ``lines`` line breaks and ``tabs`` tabs in front of it.
+    """
+
+    def __init__(self, source: str, offset: int = 0, lines: int = 0, tabs: int = 0) -> None:
+        self.source = source
+        self.offset = offset
+        self.lines = lines
+        self.tabs = tabs
+        self._breaks: array | None = None
+        self._tab_stops: array | None = None
+
+    def counts(self, idx: int) -> tuple[int, int]:
+        """Line breaks and tabs in front of ``idx``, window included."""
+        if self._breaks is None:
+            self._breaks = array('i', [m.start() for m in LINE_BREAK.finditer(self.source)])
+            self._tab_stops = array('i', [m.start() for m in TAB.finditer(self.source)])
+        return (
+            self.lines + bisect_left(self._breaks, idx),
+            self.tabs + bisect_left(cast(array, self._tab_stops), idx),
+        )
+
+    def resolve(self, idx: int) -> tuple[int, int]:
+        lines, tabs = self.counts(idx)
+        return 1 + lines, 1 + self.offset + idx + 4 * tabs
+
+    def line(self, idx: int) -> int:
+        return self.resolve(idx)[0]
+
+    def column(self, idx: int) -> int:
+        return self.resolve(idx)[1]
+
+
+class TokenTable:
+    """Columnar token storage for a whole source.
+
+    Row ``i`` is spread over parallel ``array('i')`` columns: ``types`` holds
+    the ``TokenType`` value and ``starts``/``ends`` the offsets into
+    ``source``. Token text is only sliced out of ``source`` when it is asked
+    for, and positions are resolved through ``positions``; ``lines`` and
+    ``columns`` build whole columns of them for bulk consumers.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.positions = Positions(source)
+        self.types = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, idx: int) -> Token:
+        token_type = self.token_type(idx)
+        if token_type == TokenType.EOF:
+            return EOF_TOKEN
+        text = self.text(idx)
+        if token_type == TokenType.NUMBER or token_type == TokenType.ID:
+            return Token(token_type, text)
+        return PUNCTUATION_TOKENS[text]
+
+    def __iter__(self) -> Iterator[Token]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def append(self, token_type: TokenType, start: int, end: int) -> None:
+        self.types.append(token_type.value)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    @property
+    def lines(self) -> array:
+        return array('i', map(self.positions.line, self.starts))
+
+    @property
+    def columns(self) -> array:
+        return array('i', map(self.positions.column, self.starts))
+
+    def token_type(self, idx: int) -> TokenType:
+        return TokenType(self.types[idx])
+
+    def text(self, idx: int) -> str:
+        if self.types[idx] == TokenType.EOF.value:
+            return '<EOF>'
+        return self.source[self.starts[idx]:self.ends[idx]]
+
+    def position(self, idx: int) -> tuple[int, int]:
+        return self.positions.resolve(self.starts[idx])
+
+
+class TableLexer:
+    """Replays a ``TokenTable`` through the ``next_token`` interface.
+
+    ``row`` is the table row of the token returned last.
+    """
+
+    def __init__(self, table: TokenTable) -> None:
+        self.table = table
+        self.row: int = -1
+
+    @property
+    def idx(self) -> int:
+        return self.row
+
+    @property
+    def line_num(self) -> int:
+        return self.line_at(self.row)
+
+    def line_at(self, row: int) -> int:
+        return self.table.position(max(row, 0))[0] if len(self.table) else 1
+
+    def next_token(self) -> Token:
+        if self.row < len(self.table) - 1:
+            self.row += 1
+        return self.table[self.row]
+
+
 class Lexer:
 
     def __init__(self, input_stream: str) -> None:
         self.input_stream = input_stream
+        self.positions = Positions(input_stream)
         self.idx: int = 0
-        self.line_num: int = 1
-        self.char_num: int = 1
 
         if len(input_stream) != 0:
             self.char: str | TokenType = self.input_stream[self.idx]
@@ -84,61 +265,61 @@ class Lexer:
                 # LEXICAL TOKENS
                 case '\'' | '\"' as quote:
                     self.consume()
-                    return Token(TokenType.QUOTE, quote)
+                    return PUNCTUATION_TOKENS[quote]
                 case ';' as semicolon:
                     self.consume()
-                    return Token(TokenType.SEMICOLON, semicolon)
+                    return PUNCTUATION_TOKENS[semicolon]
                 case '!' as exclamation:
                     self.consume()
-                    return Token(TokenType.EXCLAMATION, exclamation)
+                    return PUNCTUATION_TOKENS[exclamation]
                 case '$' as dollar:
                     self.consume()
-                    return Token(TokenType.DOLLAR, dollar)
+                    return PUNCTUATION_TOKENS[dollar]
                 case '(' as lparen:
                     self.consume()
-                    return Token(TokenType.LPAREN, lparen)
+                    return PUNCTUATION_TOKENS[lparen]
                 case ')' as rparen:
                     self.consume()
-                    return Token(TokenType.RPAREN, rparen)
+                    return PUNCTUATION_TOKENS[rparen]
                 case '[' as lbracket:
                     self.consume()
-                    return Token(TokenType.LBRACKET, lbracket)
+                    return PUNCTUATION_TOKENS[lbracket]
                 case ']' as rbracket:
                     self.consume()
-                    return Token(TokenType.RBRACKET, rbracket)
+                    return PUNCTUATION_TOKENS[rbracket]
                 case '{' as lbrace:
                     self.consume()
-                    return Token(TokenType.LBRACE, lbrace)
+                    return PUNCTUATION_TOKENS[lbrace]
                 case '}' as rbrace:
                     self.consume()
-                    return Token(TokenType.RBRACE, rbrace)
+                    return PUNCTUATION_TOKENS[rbrace]
                 case '.' as period:
                     self.consume()
-                    return Token(TokenType.PERIOD, period)
+                    return PUNCTUATION_TOKENS[period]
                 case ':' as colon:
                     self.consume()
-                    return Token(TokenType.COLON, colon)
+                    return PUNCTUATION_TOKENS[colon]
                 case '@' as at:
                     self.consume()
-                    return Token(TokenType.AT, at)
+                    return PUNCTUATION_TOKENS[at]
                 case '|' as pipe:
                     self.consume()
-                    return Token(TokenType.PIPE, pipe)
+                    return PUNCTUATION_TOKENS[pipe]
                 case '+' as positive:
                     self.consume()
-                    return Token(TokenType.POSITIVE, positive)
+                    return PUNCTUATION_TOKENS[positive]
                 case '-' as negative:
                     self.consume()
-                    return Token(TokenType.NEGATIVE, negative)
+                    return PUNCTUATION_TOKENS[negative]
                 case '*' as multiply:
                     self.consume()
-                    return Token(TokenType.MUL, multiply)
+                    return PUNCTUATION_TOKENS[multiply]
                 case '/' as divide:
                     self.consume()
-                    return Token(TokenType.DIV, divide)
+                    return PUNCTUATION_TOKENS[divide]
                 case '=' as equals:
                     self.consume()
-                    return Token(TokenType.EQUALS, equals)
+                    return PUNCTUATION_TOKENS[equals]
 
                 # Complex
                 case _:
@@ -152,8 +333,37 @@ class Lexer:
                         self.error()
 
         else:
-            return Token(TokenType.EOF, '<EOF>')
+            return EOF_TOKEN
     
+    @property
+    def line_num(self) -> int:
+        return self.positions.line(self.idx)
+
+    def line_at(self, idx: int) -> int:
+        return self.positions.line(idx)
+
+    @property
+    def char_num(self) -> int:
+        return self.positions.column(self.idx)
+
+    def tokenize(self) -> TokenTable:
+        table = TokenTable(self.input_stream)
+        while self.emit(table).token_type != TokenType.EOF:
+            pass
+        return table
+
+    def emit(self, table: TokenTable) -> Token:
+        token = self.next_token()
+        # The start of the token is its length back from where the lexer
+        # stopped.
+        if token.token_type == TokenType.EOF:
+            length = 0
+        else:
+            length = len(token.text)
+        end = self.idx
+        table.append(token.token_type, end - length, end)
+        return token
+
     def parse_digits(self):
         lexeme = ""
         while self.char != TokenType.EOF and self.char.isdigit():
@@ -166,17 +376,9 @@ class Lexer:
         while self.char != TokenType.EOF and self.char.isalpha():
             lexeme += self.char
             self.consume()
-        return Token(TokenType.ID, lexeme)
+        return Token(TokenType.ID, intern(lexeme))
 
     def consume(self) -> None:
-        if self.char in ['\n', '\r']:
-            self.line_num += 1
-        
-        if self.char in ['\t']:
-            self.char_num += 4
-
-        self.char_num += 1
-
         self.idx += 1
         if self.idx >= len(self.input_stream):
             self.char = TokenType.EOF
@@ -186,3 +388,223 @@ class Lexer:
     def error(self) -> None:
         msg = f"Invalid character {self.char} at [{self.line_num}:{self.char_num}]"
         raise SyntaxError(msg)
+
+
+class RegexLexer(Lexer):
+
+    def __init__(self, input_stream: str) -> None:
+        super().__init__(input_stream)
+        self.scan = SCAN_PATTERN.scanner(input_stream).match
+
+    def seek(self, idx: int) -> None:
+        src = self.input_stream
+        self.idx = idx
+        self.char = src[idx] if idx < len(src) else TokenType.EOF
+        self.scan = SCAN_PATTERN.scanner(src, idx).match
+
+    def next_token(self) -> Token:
+        src = self.input_stream
+        idx = self.idx
+        m = self.scan()
+        kind = m.lastindex
+        end = m.end()
+        start = end if kind == SKIP else m.start(kind)
+
+        if kind == PUNCT:
+            char = src[start]
+            token = PUNCTUATION_TOKENS[char]
+        elif kind == NUMBER_RUN:
+            if end < len(src) and src[end] > '\x7f':
+                end = self.extend(src, end, str.isdigit)
+            token = Token(TokenType.NUMBER, src[start:end])
+        elif kind == ALPHA_RUN:
+            if end < len(src) and src[end] > '\x7f':
+                end = self.extend(src, end, str.isalpha)
+            token = Token(TokenType.ID, intern(src[start:end]))
+        elif start >= len(src):
+            self.idx = start
+            self.char = TokenType.EOF
+            return EOF_TOKEN
+        # Non-ASCII digits and letters fall outside the scan pattern.
+        elif src[start].isdigit():
+            end = self.extend(src, start, str.isdigit)
+            token = Token(TokenType.NUMBER, src[start:end])
+        elif src[start].isalpha():
+            end = self.extend(src, start, str.isalpha)
+            token = Token(TokenType.ID, intern(src[start:end]))
+        else:
+            self.idx = start
+            self.char = src[start]
+            self.error()
+
+        self.idx = end
+        self.char = src[end] if end < len(src) else TokenType.EOF
+        return token
+
+    def extend(self, src: str, end: int, predicate: Callable[[str], bool]) -> int:
+        # The scan pattern stops at the first non-ASCII character; keep going
+        # through any characters the per-character lexer would also accept,
+        # then restart the scanner behind them.
+        while end < len(src) and predicate(src[end]):
+            end += 1
+        self.scan = SCAN_PATTERN.scanner(src, end).match
+        return end
+
+
+# Retired windows a ``StreamLexer`` keeps for ``line_at``.
+HISTORY = 64
+
+
+class StreamLexer(RegexLexer):
+    """Lexes a source that arrives as a sequence of text chunks.
+
+    Only a window of the source is held in ``input_stream``; consumed text
+    is dropped whenever the next chunk is pulled in, and ``offset`` records
+    where the window starts in the full source. ``idx`` is relative to the
+    window, so ``tell`` gives the absolute offset, which ``line_at`` takes.
+    The consumed part of the last ``HISTORY`` windows that tokens were
+    handed out from is kept for resolving those.
+    """
+
+    def __init__(self, chunks: Iterable[str], chunk_size: int = 1 << 16) -> None:
+        super().__init__('')
+        self.chunks = iter(chunks)
+        self.chunk_size = chunk_size
+        self.offset: int = 0
+        self.exhausted: bool = False
+        self.history: deque[Positions] = deque(maxlen=HISTORY)
+        # Whether a token was handed out from the current window.
+        self.handed: bool = False
+        self.refill()
+
+    def tell(self) -> int:
+        return self.offset + self.idx
+
+    def line_at(self, idx: int) -> int:
+        if idx >= self.offset:
+            return self.positions.line(idx - self.offset)
+        for positions in reversed(self.history):
+            if idx >= positions.offset:
+                return positions.line(idx - positions.offset)
+        raise ValueError(f"Offset {idx} is behind the windows kept")
+
+    @classmethod
+    def from_file(cls, handle: TextIO, chunk_size: int = 1 << 16) -> StreamLexer:
+        return cls(iter(lambda: handle.read(chunk_size), ''), chunk_size)
+
+    @classmethod
+    def from_mmap(cls, source: mmap.mmap, chunk_size: int = 1 << 16) -> StreamLexer:
+        def chunks() -> Iterator[str]:
+            decoder = getincrementaldecoder('utf-8')()
+            for start in range(0, len(source), chunk_size):
+                yield decoder.decode(source[start:start + chunk_size])
+            yield decoder.decode(b'', final=True)
+
+        return cls(chunks(), chunk_size)
+
+    def next_token(self) -> Token:
+        if not self.exhausted and len(self.input_stream) - self.idx < self.chunk_size:
+            self.refill()
+        token = super().next_token()
+        while self.idx >= len(self.input_stream) and not self.exhausted:
+            # Skipped text is consumed, so the next window drops it; a token
+            # stopping at the end of the window may carry on in the next
+            # chunk, so only it is lexed again once more text is in.
+            if token.token_type != TokenType.EOF:
+                self.idx -= len(token.text)
+            self.refill()
+            token = super().next_token()
+        self.handed = True
+        return token
+
+    def tokenize(self) -> TokenTable:
+        raise TypeError("StreamLexer does not keep its source; use next_token()")
+
+    def refill(self) -> None:
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+        window = self.input_stream[self.idx:] + (chunk or '')
+        lines, tabs = self.positions.counts(self.idx)
+        if self.handed:
+            old = self.positions
+            self.history.append(
+                Positions(self.input_stream[:self.idx], old.offset, old.lines, old.tabs)
+            )
+            self.handed = False
+        self.offset += self.idx
+        self.idx = 0
+        self.input_stream = window
+        self.positions = Positions(window, self.offset, lines, tabs)
+        self.scan = SCAN_PATTERN.scanner(window).match
+        self.char = window[0] if window else TokenType.EOF
+
+
+# Sources shorter than this are lexed by the regex scan; below it the cost
+# of importing NumPy and building the arrays outweighs the vector passes.
+PRESCAN_THRESHOLD = 1 << 20
+
+# Class of every ASCII character for the prescan: 0 for skipped characters,
+# the ``TokenType`` value for the rest, and -1 for invalid characters.
+BYTE_CLASSES: list[int] = [-1] * 256
+for char in SKIPPED:
+    BYTE_CLASSES[ord(char)] = 0
+for char, token_type in PUNCTUATION.items():
+    BYTE_CLASSES[ord(char)] = token_type.value
+for code in range(ord('0'), ord('9') + 1):
+    BYTE_CLASSES[code] = TokenType.NUMBER.value
+for code in [*range(ord('A'), ord('Z') + 1), *range(ord('a'), ord('z') + 1)]:
+    BYTE_CLASSES[code] = TokenType.ID.value
+
+
+class PrescanLexer(RegexLexer):
+    """``RegexLexer`` whose ``tokenize`` classifies a large source with NumPy.
+
+    Every byte is mapped through ``BYTE_CLASSES``, and tokens start where
+    the class changes or at any punctuation byte, so the whole table is
+    built in a handful of array passes. Sources under ``threshold``,
+    sources that are not pure ASCII, and environments without NumPy take
+    the regex scan instead, with identical results.
+    """
+
+    def __init__(self, input_stream: str, threshold: int = PRESCAN_THRESHOLD) -> None:
+        super().__init__(input_stream)
+        self.threshold = threshold
+
+    def tokenize(self) -> TokenTable:
+        src = self.input_stream
+        if len(src) < self.threshold or not src.isascii() or self.idx != 0:
+            return super().tokenize()
+        try:
+            import numpy as np
+        except ImportError:
+            return super().tokenize()
+
+        data = np.frombuffer(src.encode('ascii'), dtype=np.uint8)
+        kinds = np.array(BYTE_CLASSES, dtype=np.int8)[data]
+
+        invalid = np.flatnonzero(kinds < 0)
+        if len(invalid):
+            self.seek(int(invalid[0]))
+            self.error()
+
+        before = np.zeros_like(kinds)
+        before[1:] = kinds[:-1]
+        after = np.zeros_like(kinds)
+        after[:-1] = kinds[1:]
+        token = kinds > 0
+        single = token & (kinds != TokenType.NUMBER.value) & (kinds != TokenType.ID.value)
+        starts = np.flatnonzero(token & (single | (kinds != before)))
+        ends = np.flatnonzero(token & (single | (kinds != after))) + 1
+        self.seek(len(src))
+
+        def column(values, last: int) -> array:
+            out = array('i', values.astype(np.intc).tobytes())
+            out.append(last)
+            return out
+
+        table = TokenTable(src)
+        table.types = column(kinds[starts], TokenType.EOF.value)
+        table.starts = column(starts, len(src))
+        table.ends = column(ends, len(src))
+        return table
@@ -4,24 +4,222 @@ from typing import *
 if TYPE_CHECKING:
     from graph_compiler.lexer import Lexer
     
-from graph_compiler.lexer import Token, TokenType
+from array import array
+
+from graph_compiler.lexer import EOF_TOKEN, Token, TokenType
+
+
+# Binding power of each binary operator; higher binds tighter.
+PRECEDENCE: dict[TokenType, int] = {
+    TokenType.POSITIVE: 1,
+    TokenType.NEGATIVE: 1,
+    TokenType.MUL: 2,
+    TokenType.DIV: 2,
+}
+
+
+# Tokens ``Parser`` can look ahead, or rewind over after ``mark``.
+LOOKAHEAD = 8
+
+
+class Lookahead:
+    """Ring buffer of the tokens ahead of the parser, filled lazily.
+
+    ``pos`` counts the tokens consumed so far; the token at ``pos`` is the
+    current one. Tokens are pulled from ``lexer`` only once ``peek`` or
+    ``advance`` reaches them, together with where the lexer stood after
+    each (its ``tell()`` if it has one, else its ``idx``), so positions can
+    still be resolved through ``line_at`` for a token the lexer has moved
+    past.
+    ``mark`` pins the current token, and ``reset`` rewinds to it without
+    lexing anything again. At most ``size`` tokens from the oldest mark (or
+    the current token) onward can be held; reaching further raises
+    ``IndexError``.
+    """
+    __slots__ = (
+        'lexer', 'pull', 'tell', 'size', 'mask', 'tokens', 'cursors', 'pos', 'filled', 'marks'
+    )
+
+    def __init__(self, lexer: Lexer, size: int = LOOKAHEAD) -> None:
+        self.lexer = lexer
+        self.pull = lexer.next_token
+        # Lexers over a moving window give absolute offsets through ``tell``.
+        self.tell = getattr(lexer, 'tell', None)
+        # A power of two, so a slot is a mask instead of a modulo.
+        self.size = 1 << max(size - 1, 0).bit_length()
+        self.mask = self.size - 1
+        self.tokens: list[Token] = [EOF_TOKEN] * self.size
+        self.cursors = array('q', bytes(8 * self.size))
+        self.pos: int = 0
+        self.filled: int = 0
+        self.marks: list[int] = []
+        self.fill()
+
+    def fill(self) -> Token:
+        filled = self.filled
+        if filled - (self.marks[0] if self.marks else self.pos) >= self.size:
+            raise IndexError(f"Lookahead past {self.size} buffered tokens")
+        slot = filled & self.mask
+        token = self.tokens[slot] = self.pull()
+        self.cursors[slot] = self.lexer.idx if self.tell is None else self.tell()
+        self.filled = filled + 1
+        return token
+
+    def peek(self, k: int = 0) -> Token:
+        """The ``k``-th token after the current one."""
+        while self.pos + k >= self.filled:
+            self.fill()
+        return self.tokens[(self.pos + k) & self.mask]
+
+    def cursor(self, k: int = 0) -> int:
+        """Where the lexer stood just after it produced ``peek(k)``."""
+        self.peek(k)
+        return self.cursors[(self.pos + k) & self.mask]
+
+    def window(self, start: int, stop: int) -> Iterator[Token]:
+        """Tokens ``peek(start)`` up to ``peek(stop)``, read lazily from the
+        buffer instead of copied out. Iterate before pulling further tokens,
+        which may overwrite their slots."""
+        if stop > start:
+            self.peek(stop - 1)
+        pos, mask, tokens = self.pos, self.mask, self.tokens
+        return (tokens[(pos + k) & mask] for k in range(start, stop))
+
+    def advance(self) -> Token:
+        pos = self.pos = self.pos + 1
+        if pos == self.filled:
+            return self.fill()
+        return self.tokens[pos & self.mask]
+
+    def mark(self) -> int:
+        self.marks.append(self.pos)
+        return self.pos
+
+    def reset(self) -> Token:
+        """Rewind to the latest mark and drop it."""
+        self.pos = self.marks.pop()
+        return self.tokens[self.pos & self.mask]
+
+    def release(self) -> None:
+        """Drop the latest mark without rewinding."""
+        self.marks.pop()
 
 
 class Parser:
 
-    def __init__(self, lexer: Lexer) -> None:
+    def __init__(self, lexer: Lexer, lookahead: int = LOOKAHEAD) -> None:
         self.lexer = lexer
-        self.lookahead: Token = self.lexer.next_token()
+        self.tokens = Lookahead(lexer, lookahead)
+        self.lookahead: Token = self.tokens.peek()
 
-    def parse(self) -> None:
+    def parse(self) -> Program:
+        statements = []
         while self.lookahead.token_type != TokenType.EOF:
-            pass
+            statements.append(self.statement())
+        return self.node(Program, statements)
+
+    def statement(self) -> AST:
+        # statement := ID '=' expression | ID block | expression, each
+        # optionally closed by ';'
+        match self.lookahead.token_type, self.peek().token_type:
+            case TokenType.ID, TokenType.EQUALS:
+                name = self.node(Identifier, self.take())
+                self.consume()
+                node = self.node(Assign, name, self.expression())
+            case TokenType.ID, TokenType.LBRACE:
+                name = self.node(Identifier, self.take())
+                node = self.node(Block, name, self.block())
+            case _:
+                node = self.expression()
+
+        if self.lookahead.token_type == TokenType.SEMICOLON:
+            self.consume()
+        return node
+
+    def block(self) -> list[AST]:
+        self.match(TokenType.LBRACE)
+        statements = []
+        while self.lookahead.token_type != TokenType.RBRACE:
+            if self.lookahead.token_type == TokenType.EOF:
+                self.error(TokenType.RBRACE.name)
+            statements.append(self.statement())
+        self.consume()
+        return statements
+
+    def expression(self) -> AST:
+        # Precedence climbing with explicit stacks instead of recursion, so
+        # parentheses and right operands nest without bound. ``pending``
+        # holds operators waiting for their right operand, and a
+        # precedence of 0 marks an open '('. An operator first folds in
+        # every pending one binding at least as tightly, which keeps
+        # + - * / left-associative.
+        operands: list[AST] = []
+        pending: list[tuple[Token | None, int]] = []
+        while True:
+            while self.lookahead.token_type == TokenType.LPAREN:
+                self.consume()
+                pending.append((None, 0))
+            operands.append(self.atom())
+
+            while True:
+                precedence = PRECEDENCE.get(self.lookahead.token_type, 0)
+                self.reduce(operands, pending, max(precedence, 1))
+                if precedence:
+                    pending.append((self.take(), precedence))
+                    break
+                if not pending:
+                    return operands[0]
+                self.match(TokenType.RPAREN)
+                pending.pop()
+
+    def reduce(
+        self,
+        operands: list[AST],
+        pending: list[tuple[Token | None, int]],
+        precedence: int
+    ) -> None:
+        while pending and pending[-1][1] >= precedence:
+            op, _ = pending.pop()
+            right = operands.pop()
+            operands.append(self.node(BinaryOp, operands.pop(), op, right))
+
+    def atom(self) -> AST:
+        match self.lookahead.token_type:
+            case TokenType.NUMBER:
+                return self.node(Number, self.take())
+            case TokenType.ID:
+                return self.node(Identifier, self.take())
+            case _:
+                self.error("expression")
+
+    def node(self, cls: type[AST], *args: Any) -> AST:
+        # Every node is built through here, from the tokens ``take`` hands
+        # out, so subclasses can swap in another representation.
+        return cls(*args)
+
+    def take(self) -> Token:
+        token = self.lookahead
+        self.consume()
+        return token
 
     def consume(self) -> None:
-        self.lookahead = self.lexer.next_token()
+        self.lookahead = self.tokens.advance()
+
+    def peek(self, k: int = 1) -> Token:
+        return self.tokens.peek(k)
+
+    def mark(self) -> None:
+        self.tokens.mark()
+
+    def reset(self) -> None:
+        self.lookahead = self.tokens.reset()
+
+    def release(self) -> None:
+        self.tokens.release()
 
     def error(self, string: str) -> None:
-        raise SyntaxError(f"Expecting {string} found {self.lookahead} on line {self.lexer.line_num}")
+        line = self.lexer.line_at(self.tokens.cursor())
+        raise SyntaxError(f"Expecting {string} found {self.lookahead} on line {line}")
 
     def match(self, token_type: TokenType) -> Token | None:
         if self.lookahead.token_type == token_type:
@@ -32,18 +230,43 @@ class Parser:
 
 
 class AST:
-    pass
+    __slots__ = ()
+
+
+class Program(AST):
+    __slots__ = ('statements',)
+
+    def __init__(self, statements: list[AST]) -> None:
+        self.statements = statements
+
+
+class Assign(AST):
+    __slots__ = ('target', 'value')
+
+    def __init__(self, target: Identifier, value: AST) -> None:
+        self.target = target
+        self.value = value
+
+
+class Block(AST):
+    __slots__ = ('name', 'statements')
+
+    def __init__(self, name: Identifier, statements: list[AST]) -> None:
+        self.name = name
+        self.statements = statements
 
 
 class BinaryOp(AST):
+    __slots__ = ('left', 'op', 'right')
     
-    def __init__(self, left: AST, op: AST, right: AST) -> None:
+    def __init__(self, left: AST, op: Token, right: AST) -> None:
         self.left = left
         self.op = op
         self.right = right
 
 
 class Number(AST):
+    __slots__ = ('token', 'value')
     
     def __init__(self, token: Token) -> None:
         self.token = token
@@ -51,22 +274,8 @@ class Number(AST):
 
 
 class Identifier(AST):
+    __slots__ = ('token', 'value')
     
     def __init__(self, token: Token) -> None:
         self.token = token
         self.value = token.text
-
-
-class TestParser(Parser):
-
-    def parse(self) -> None:
-        while self.lookahead.token_type != TokenType.EOF:
-            current_token = self.lookahead
-    
-            match current_token.token_type:
-                case TokenType.ID:
-                    node = self.lookahead
-                    if node == TokenType.EQUALS:
-                        pass
-                    elif node == TokenType.LBRACE:
-                        pass 
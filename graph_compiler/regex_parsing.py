@@ -1,11 +1,16 @@
 from __future__ import annotations
-from beartype.typing import *
-from typing import TypeAlias
+# Deliberately stdlib ``typing`` rather than ``beartype.typing``: this module
+# is imported by short-lived workers and must stay cheap to import.
+from typing import TYPE_CHECKING, Callable, Generic, Iterable, Iterator, NamedTuple, Protocol, Sequence, TypeVar, cast
 if TYPE_CHECKING:
     pass
 
-from rich import inspect
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
 from enum import Enum
+from itertools import product
+from time import perf_counter
 import re
 
 
@@ -13,22 +18,6 @@ class LexItem(Enum):
     INTEGER = 1
     SYMBOL = 2
     OPERATOR = 3
-            
-
-expr = "b = 2 + a * 10"
-
-any_digit: str = r"(\d+)"
-any_word: str = r"(\w+)"
-any_char: str = r"(.)"
-
-expression = rf"\s*(?:{any_digit}|{any_word}|{any_char})"
-regex = re.compile(expression)
-
-for m in regex.finditer(expr):
-    print(
-        LexItem(m.lastindex),
-        repr(m.group(cast(str, m.lastindex)))
-    )
 
 
 class Operation(Protocol):
@@ -67,44 +56,452 @@ class RegexElement:
     def __init__(self, expression: str) -> None:
         self.expression = expression
 
-        self.supersets: u_set[RegexElement] = u_set()
-        self.subsets: u_set[RegexElement] = u_set()
-        self.disjoints: u_set[RegexElement] = u_set()
-        self.intersects: u_set[RegexElement] = u_set()
         self.maybes: list[RegexElement] = []
         self.precompilation = {}
+        # Where the element's relations live once it joins a graph.
+        self.adjacency: Adjacency | None = None
+        self.index: int = -1
+        # Relation sets of an element outside any graph, made on first use.
+        self._own: dict[str, u_set[RegexElement]] | None = None
         
         self.compiled = re.compile(expression, re.IGNORECASE)
+        self.prefix_key = prefix_key(expression)
+        self.suffix_key = suffix_key(expression)
 
     def __hash__(self) -> int:
         return hash(self.expression)
 
+    def related(self, name: str) -> RelationView | u_set[RegexElement]:
+        if self.adjacency is not None:
+            return RelationView(self.adjacency, name, self.index)
+        if self._own is None:
+            self._own = {relation: u_set() for relation in RELATIONS}
+        return self._own[name]
+
+    @property
+    def supersets(self) -> RelationView | u_set[RegexElement]:
+        return self.related('supersets')
+
+    @property
+    def subsets(self) -> RelationView | u_set[RegexElement]:
+        return self.related('subsets')
+
+    @property
+    def disjoints(self) -> RelationView | u_set[RegexElement]:
+        return self.related('disjoints')
+
+    @property
+    def intersects(self) -> RelationView | u_set[RegexElement]:
+        return self.related('intersects')
+
     
-class SubsetGraph:
+class MatchCache:
+    """Bounded LRU map from text to its ``SubsetGraph.match`` result.
+
+    Entries belong to one graph ``generation``; looking up under a newer
+    generation drops everything cached before it. Threads may share one
+    cache: an entry evicted by another thread between lookup and reuse
+    is still returned, and the counters are approximate.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.generation: int = 0
+        self.entries: OrderedDict[str, list] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get(self, text: str, generation: int) -> list | None:
+        if generation != self.generation:
+            self.entries.clear()
+            self.generation = generation
+        out = self.entries.get(text)
+        if out is None:
+            self.misses += 1
+            return None
+        try:
+            self.entries.move_to_end(text)
+        except KeyError:
+            pass
+        self.hits += 1
+        return out
+
+    def put(self, text: str, out: list) -> None:
+        self.entries[text] = out
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def prefix_key(expression: str) -> str:
+    """The leading characters ``check_prefixes`` compares literally."""
+    for idx, char in enumerate(expression):
+        if char in '(.[)':
+            return expression[:idx]
+    return expression
+
+
+def suffix_key(expression: str) -> list[str | None]:
+    """The trailing characters ``check_suffixes`` compares, last first.
+
+    Escaped metacharacters are skipped by the comparison, so they show up
+    as ``None``.
+    """
+    key: list[str | None] = []
+    for idx in range(len(expression) - 1, -1, -1):
+        char = expression[idx]
+        if char in ").]*+}?":
+            if idx == 0 or expression[idx - 1] != "\\":
+                break
+            key.append(None)
+        else:
+            key.append(char)
+    return key
+
+
+def compatible(
+    a: RegexElement,
+    b: RegexElement,
+    prefixes: bool = True,
+    suffixes: bool = True
+) -> bool:
+    """False when ``check_prefixes`` (if ``prefixes``) or ``check_suffixes``
+    (if ``suffixes``) would call the pair disjoint."""
+    if prefixes and not (
+        a.prefix_key.startswith(b.prefix_key) or
+        b.prefix_key.startswith(a.prefix_key)
+    ):
+        return False
+    if suffixes:
+        for x, y in zip(a.suffix_key, b.suffix_key):
+            if x is not None and y is not None and x != y:
+                return False
+    return True
+
+
+def leading_filters(tests: list[Test]) -> tuple[bool, bool]:
+    """Whether ``check_prefixes`` and ``check_suffixes`` run ahead of every
+    other test in ``tests``.
+
+    Only then is a pair they call disjoint sure to be disjoint in the
+    graph; a test running earlier may decide it first.
+    """
+    leading = set()
+    for test in tests:
+        if test is not check_prefixes and test is not check_suffixes:
+            break
+        leading.add(test)
+    return check_prefixes in leading, check_suffixes in leading
+
+
+class RootIndex:
+    """Roots bucketed by ``prefix_key`` for candidate lookup.
+
+    ``candidates`` yields only roots that ``compatible`` lets through, in
+    the order they became roots.
+    """
+
+    def __init__(self) -> None:
+        self.keys: list[str] = []
+        self.members: dict[str, dict[RegexElement, int]] = {}
+
+    def add(self, element: RegexElement, seq: int) -> None:
+        key = element.prefix_key
+        if key not in self.members:
+            insort(self.keys, key)
+            self.members[key] = {}
+        self.members[key][element] = seq
+
+    def remove(self, element: RegexElement) -> None:
+        key = element.prefix_key
+        bucket = self.members[key]
+        del bucket[element]
+        if not bucket:
+            del self.members[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def candidates(self, element: RegexElement, suffixes: bool = True) -> list[RegexElement]:
+        key = element.prefix_key
+        found: list[tuple[int, RegexElement]] = []
+        # Keys that are a prefix of ``key``...
+        for length in range(len(key)):
+            bucket = self.members.get(key[:length])
+            if bucket:
+                found.extend((seq, root) for root, seq in bucket.items())
+        # ...and keys that ``key`` is a prefix of, which sort together.
+        for idx in range(bisect_left(self.keys, key), len(self.keys)):
+            if not self.keys[idx].startswith(key):
+                break
+            bucket = self.members[self.keys[idx]]
+            found.extend((seq, root) for root, seq in bucket.items())
+        found.sort(key=lambda item: item[0])
+        return [root for _, root in found if compatible(element, root, True, suffixes)]
+
+
+RELATIONS = ('supersets', 'subsets', 'disjoints', 'intersects')
+EMPTY = array('i')
+
+
+class Adjacency:
+    """Relation edges between a graph's elements, by integer index.
+
+    Each element's index maps to a slot, and each slot holds one sorted
+    ``array('i')`` of target indices per relation. Equal elements share a
+    slot, and so their edges. A slot's arrays are only created once it
+    gains an edge; until then it reads from ``base``, the CSR columns
+    (row offsets, targets) of a loaded snapshot, if there are any.
+
+    After ``checkpoint`` an array is copied before it first changes, and
+    ``journal`` keeps the one replaced, so ``rollback`` can put it back
+    and snapshots taken before may keep referring to it.
+    """
+
+    def __init__(self) -> None:
+        self.elements: list[RegexElement] = []
+        self.slots = array('i')
+        self.edges: dict[str, list[array | None]] = {name: [] for name in RELATIONS}
+        self.base: dict[str, tuple[Sequence[int], Sequence[int]]] = {}
+        self.journal: dict[tuple[str, int], array | None] | None = None
+        # Elements and slots as of the last ``checkpoint``.
+        self.mark: tuple[int, int] = (0, 0)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def register(self, element: RegexElement) -> int:
+        """Give ``element`` the next index and a slot of its own; its
+        relation attributes become views over them."""
+        element.adjacency = self
+        element.index = len(self.elements)
+        self.elements.append(element)
+        self.slots.append(len(self.edges['supersets']))
+        for name in RELATIONS:
+            self.edges[name].append(None)
+        return element.index
+
+    def share(self, index: int, other: int) -> None:
+        self.slots[index] = self.slots[other]
+
+    def targets(self, name: str, index: int) -> Sequence[int]:
+        return self.slot_targets(name, self.slots[index])
+
+    def slot_targets(self, name: str, slot: int) -> Sequence[int]:
+        found = self.edges[name][slot]
+        if found is not None:
+            return found
+        if name in self.base:
+            starts, targets = self.base[name]
+            if slot + 1 < len(starts):
+                return targets[starts[slot]:starts[slot + 1]]
+        return EMPTY
+
+    def add(self, name: str, index: int, target: int) -> None:
+        slot = self.slots[index]
+        found = self.edges[name][slot]
+        journal = self.journal
+        if journal is not None and slot < self.mark[1] and (name, slot) not in journal:
+            journal[name, slot] = found
+            found = None
+        if found is None:
+            found = self.edges[name][slot] = array('i', self.slot_targets(name, slot))
+        # Indices grow with insertion, so this is nearly always an append.
+        if not found or found[-1] < target:
+            found.append(target)
+        else:
+            pos = bisect_left(found, target)
+            if found[pos] != target:
+                found.insert(pos, target)
+
+    def checkpoint(self) -> None:
+        """Start journaling changes for ``rollback``."""
+        self.journal = {}
+        self.mark = (len(self.elements), len(self.edges['supersets']))
+
+    def rollback(self) -> None:
+        """Drop everything added since ``checkpoint``."""
+        size, slots = self.mark
+        for (name, slot), found in cast(dict, self.journal).items():
+            self.edges[name][slot] = found
+        del self.elements[size:]
+        del self.slots[size:]
+        for name in RELATIONS:
+            del self.edges[name][slots:]
+        self.journal = {}
+
+
+class RelationView:
+    """Set-like view of one relation of one element in an ``Adjacency``."""
+    __slots__ = ('adjacency', 'name', 'index')
+
+    def __init__(self, adjacency: Adjacency, name: str, index: int) -> None:
+        self.adjacency = adjacency
+        self.name = name
+        self.index = index
+
+    def __iter__(self) -> Iterator[RegexElement]:
+        elements = self.adjacency.elements
+        return (elements[idx] for idx in self.adjacency.targets(self.name, self.index))
+
+    def __len__(self) -> int:
+        return len(self.adjacency.targets(self.name, self.index))
+
+    def __contains__(self, element: object) -> bool:
+        index = getattr(element, 'index', -1)
+        if index < 0 or index >= len(self.adjacency) or self.adjacency.elements[index] is not element:
+            return False
+        targets = self.adjacency.targets(self.name, self.index)
+        pos = bisect_left(targets, index)
+        return pos < len(targets) and targets[pos] == index
+
+    def add(self, element: RegexElement) -> None:
+        self.adjacency.add(self.name, self.index, element.index)
+
+    def copy(self) -> u_set[RegexElement]:
+        return u_set(self)
 
-    def __init__(self, tests: list[Test]) -> None:
+
+class SubsetGraph:
+    """Subset hierarchy of regular expressions.
+
+    With ``indexed`` set, ``add_expression`` only compares the new element
+    against roots and subsets that ``compatible`` lets through, using a
+    ``RootIndex`` instead of a scan over every root. ``check_prefixes`` and
+    ``check_suffixes`` then act as pre-filters, and the pairs they rule out
+    are not recorded in ``disjoints``, which would otherwise grow
+    quadratically. Each only does so while it runs ahead of every other
+    test (see ``leading_filters``), so the relations found are the same as
+    without ``indexed``.
+
+    ``checkpoint`` starts a batch of additions that ``rollback`` can undo.
+    """
+
+    def __init__(
+        self,
+        tests: list[Test],
+        cache_size: int = 0,
+        indexed: bool = False,
+        relations: RelationEngine | None = None
+    ) -> None:
         self.tests = tests
+        self.relations = relations or RelationEngine(tests)
         self.elements: list[RegexElement] = []
+        self.adjacency = Adjacency()
         self._roots: list[RegexElement] = []
+        self._root_indices: list[int] = []
         self._dirty: bool = True
+        # Current roots, valued by the order they became roots in.
+        self._root_set: dict[RegexElement, int] = {}
+        self._root_index = RootIndex() if indexed else None
+        # Elements already compared against the one being inserted.
+        self._visited: set[RegexElement] = set()
+        # Bumped by every change to the graph; invalidates ``cache``.
+        self.generation: int = 0
+        self.cache = MatchCache(cache_size) if cache_size else None
+        # Elements as of the last ``checkpoint``, and the roots lost since
+        # with the order they became roots in.
+        self._saved: tuple[int, list[tuple[RegexElement, int]]] | None = None
+        # ``FrozenGraph`` buckets of a loaded snapshot, as of its generation.
+        self._layout: tuple[int, dict[str, list[Chunk]]] | None = None
 
     @property
     def roots(self) -> list[RegexElement]:
         if self._dirty:
-            self._roots = [i for i in self.elements if not i.supersets]
+            self._roots = list(self._root_set)
+            self._root_indices = [root.index for root in self._roots]
+            self._dirty = False
         return self._roots
 
+    @property
+    def root_indices(self) -> list[int]:
+        self.roots
+        return self._root_indices
+
     def add_expression(self, expression: str) -> None:
         new_element = RegexElement(expression)
-        for root in self.roots:
+        self.adjacency.register(new_element)
+        prefixes, suffixes = self.filters
+        if prefixes:
+            roots = self._root_index.candidates(new_element, suffixes)
+        else:
+            roots = self.roots
+        self._visited = set()
+        for root in roots:
             self.process(new_element, root)
         self.elements.append(new_element)
+
+        # Only the roots just compared can have picked up a superset.
+        for root in roots:
+            if root.supersets and root in self._root_set:
+                if self._saved is not None:
+                    self._saved[1].append((root, self._root_set[root]))
+                del self._root_set[root]
+                if self._root_index is not None:
+                    self._root_index.remove(root)
+        if not new_element.supersets:
+            self._root_set[new_element] = self.generation
+            if self._root_index is not None:
+                self._root_index.add(new_element, self.generation)
+
+        self._dirty = True
+        self.generation += 1
     
+    def add_expressions(self, expressions: Iterable[str]) -> None:
+        for expression in expressions:
+            self.add_expression(expression)
+
+    def checkpoint(self) -> None:
+        self.adjacency.checkpoint()
+        self._saved = (len(self.elements), [])
+
+    def rollback(self) -> None:
+        """Drop the elements added since ``checkpoint``, restoring the
+        roots and edges they changed."""
+        size, lost = cast(tuple, self._saved)
+        for element in self.elements[size:]:
+            if self._root_set.pop(element, None) is not None and self._root_index is not None:
+                self._root_index.remove(element)
+        del self.elements[size:]
+        for root, seq in lost:
+            if root.index >= size:
+                continue
+            self._root_set[root] = seq
+            if self._root_index is not None:
+                self._root_index.add(root, seq)
+        # Roots are kept in the order they became roots in.
+        self._root_set = dict(sorted(self._root_set.items(), key=lambda item: item[1]))
+        self.adjacency.rollback()
+        self._saved = (size, [])
+        self._dirty = True
+        self.generation += 1
+
+    @property
+    def filters(self) -> tuple[bool, bool]:
+        """Whether prefixes and suffixes pre-filter pairs; never without
+        ``indexed``."""
+        if self._root_index is None:
+            return False, False
+        # An adaptive engine reorders its tests, so look every time.
+        return leading_filters(self.relations.tests)
+
     def process(
         self, 
         new_element: RegexElement, 
         root_element: RegexElement
     ) -> None:
+        # Elements reachable through several supersets are compared once.
+        if root_element in self._visited:
+            return
+        self._visited.add(root_element)
+        prefixes, suffixes = self.filters
+        if (prefixes or suffixes) and not compatible(new_element, root_element, prefixes, suffixes):
+            return
+
         relationship = self.compare(new_element, root_element)
         if relationship:
             func: Operation = getattr(self, 'add_' + relationship)
@@ -161,58 +558,499 @@ class SubsetGraph:
         new_element: RegexElement, 
         root_element: RegexElement
     ) -> None:
-        new_element.supersets = root_element.supersets.copy()
-        new_element.subsets = root_element.subsets.copy()
-        new_element.disjoints = root_element.disjoints.copy()
-        new_element.intersects = root_element.intersects.copy()
+        self.adjacency.share(new_element.index, root_element.index)
 
     def compare(self, a: RegexElement, b: RegexElement) -> str | None:
-        for test in self.tests:
-            result = test(a.expression, b.expression)
-            if result:
-                return result
+        return self.relations.compare(a, b)
             
     def match(self, text: str, strict: bool = True) -> list[RegexElement]:
-        matches = set()
-        self._match(text, self.roots, matches)
-        
-        out: list[RegexElement] = []
-        for element in matches:
-            for subset in element.subsets:
-                if subset in matches:
-                    break
-            else:
-                out.append(element)
+        out = None
+        if self.cache is not None:
+            out = self.cache.get(text, self.generation)
+        if out is None:
+            out = self._most_specific(text)
+            if self.cache is not None:
+                self.cache.put(text, out)
 
         if strict and len(out) > 1:
             for i in out:
                 print(i.expression)
             raise Exception(f"Multiple equally specific matches found for {text}")
         
+        return list(out)
+
+    def _most_specific(self, text: str) -> list[RegexElement]:
+        adjacency = self.adjacency
+        elements = adjacency.elements
+        matches = self._match(text, list(self.root_indices))
+
+        out: list[RegexElement] = []
+        for idx in matches:
+            for subset in adjacency.targets('subsets', idx):
+                if subset in matches:
+                    break
+            else:
+                out.append(elements[idx])
         return out
 
-    def _match(
-        self, 
-        text: str, 
-        elements: list[RegexElement], 
-        matches: set[RegexElement]
+    def _match(self, text: str, frontier: list[int]) -> set[int]:
+        """Indices of the elements matching ``text``, walking down the
+        subsets of matching elements from ``frontier``."""
+        targets = self.adjacency.targets
+        elements = self.adjacency.elements
+        # Roots are nobody's subset, so only subsets can come up twice.
+        seen: set[int] = set()
+        matches: set[int] = set()
+        while frontier:
+            below: list[int] = []
+            for idx in frontier:
+                if elements[idx].compiled.match(text):
+                    matches.add(idx)
+                    below.extend(targets('subsets', idx))
+            frontier = [idx for idx in set(below) if idx not in seen]
+            seen.update(frontier)
+        return matches
+
+    def freeze(self, cache_size: int = 0) -> FrozenGraph:
+        adjacency = self.adjacency
+        layout = self._layout
+        return FrozenGraph(
+            list(self.elements),
+            self.root_indices,
+            array('i', adjacency.slots),
+            [
+                array('i', adjacency.slot_targets('subsets', slot))
+                for slot in range(len(adjacency.edges['subsets']))
+            ],
+            cache_size,
+            layout[1] if layout is not None and layout[0] == self.generation else None
+        )
+
+    def match_many(
+        self,
+        texts: Iterable[str | None],
+        strict: bool = True,
+        workers: int = 1
+    ) -> array:
+        return self.freeze().match_many(texts, strict, workers)
+
+
+# Characters ``fold`` has looked up so far.
+FOLDS: dict[str, str] = {}
+
+
+def fold(text: str) -> str:
+    """``text`` with each character replaced by one representative of
+    those ``re.IGNORECASE`` takes it to equal.
+
+    Unlike ``str.lower`` this keeps the length ('İ' becomes 'i', not
+    'i̇'), so offsets into the folded text hold for the original, and it
+    follows ``re`` in equating the likes of 'ſ' with 's'.
+    """
+    if text.isascii():
+        return text.lower()
+    out = []
+    for char in text:
+        folded = FOLDS.get(char)
+        if folded is None:
+            import _sre
+            from re._casefix import _EXTRA_CASES
+
+            lower = _sre.unicode_tolower(ord(char))
+            folded = FOLDS[char] = chr(min((lower, *_EXTRA_CASES.get(lower, ()))))
+        out.append(folded)
+    return ''.join(out)
+
+
+def literal_prefix(expression: str) -> str:
+    """The literal text every match of ``expression`` starts with.
+
+    Conservative: stops at the first metacharacter, drops a character that
+    a quantifier applies to, and gives up on any alternation.
+    """
+    if '|' in expression:
+        return ''
+    prefix: list[str] = []
+    idx = 1 if expression.startswith('^') else 0
+    while idx < len(expression):
+        char = expression[idx]
+        if char == '\\':
+            if idx + 1 == len(expression) or expression[idx + 1].isalnum():
+                break
+            char = expression[idx + 1]
+            idx += 1
+        elif char in '.^$*+?{}[]()':
+            if char in '*+?{' and prefix:
+                prefix.pop()
+            break
+        prefix.append(char)
+        idx += 1
+    return ''.join(prefix)
+
+
+# Patterns that break when joined into one pattern: backreferences by
+# number or name, named groups (which may repeat), conditionals on a group,
+# and inline global flags.
+SOLO = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?\(|\(\?[aiLmsux]+\)')
+
+# Elements per combined pattern of a ``FrozenGraph`` bucket.
+CHUNK = 64
+
+
+
+class Chunk:
+    """Elements of a ``FrozenGraph`` bucket matched by one pattern, which
+    is compiled on first use.
+
+    ``groups`` pairs each element's index with the group that is set when
+    it matches. A ``solo`` chunk holds one ``SOLO`` element, matched as is.
+    """
+    __slots__ = ('indices', 'solo', 'pattern', 'groups')
+
+    def __init__(self, indices: list[int], solo: bool = False) -> None:
+        self.indices = indices
+        self.solo = solo
+        self.pattern: re.Pattern | None = None
+        self.groups: list[tuple[int, int]] = []
+
+    def compile(self, elements: list[RegexElement]) -> re.Pattern:
+        if self.solo:
+            idx = self.indices[0]
+            pattern = re.compile(elements[idx].expression, re.IGNORECASE)
+            self.groups = [(0, idx)]
+        else:
+            pattern = re.compile(''.join(
+                f"(?:(?=(?P<_{idx}>{elements[idx].expression})))?" for idx in self.indices
+            ), re.IGNORECASE)
+            self.groups = [(pattern.groupindex[f"_{idx}"], idx) for idx in self.indices]
+        # Set last, so a thread finding the pattern finds its groups too.
+        self.pattern = pattern
+        return pattern
+
+
+def place_chunks(
+    buckets: dict[str, list[Chunk]],
+    elements: list[RegexElement],
+    indices: Iterable[int]
+) -> tuple[dict[str, list[Chunk]], list[Chunk]]:
+    """``buckets`` with the elements at ``indices`` added, and the chunks
+    made for them, not compiled yet. Neither ``buckets`` nor its lists are
+    changed, as snapshots share them."""
+    added: dict[str, list[int]] = {}
+    for idx in indices:
+        prefix = fold(literal_prefix(elements[idx].expression))
+        added.setdefault(prefix, []).append(idx)
+    made: list[Chunk] = []
+    if not added:
+        return buckets, made
+
+    buckets = dict(buckets)
+    for prefix, indices in added.items():
+        chunks = list(buckets.get(prefix, ()))
+        joined = [idx for idx in indices if not SOLO.search(elements[idx].expression)]
+        # Top up the last joined chunk instead of starting another.
+        if chunks and not chunks[-1].solo and len(chunks[-1].indices) < CHUNK:
+            joined = chunks.pop().indices + joined
+        new = [Chunk(joined[start:start + CHUNK]) for start in range(0, len(joined), CHUNK)]
+        new.extend(
+            Chunk([idx], solo=True) for idx in indices if SOLO.search(elements[idx].expression)
+        )
+        buckets[prefix] = chunks + new
+        made.extend(new)
+    return buckets, made
+
+
+class FrozenGraph:
+    """A snapshot of a ``SubsetGraph`` compiled for one-pass matching.
+
+    It keeps the graph's elements, roots and ``subsets`` edges (per slot,
+    as in ``Adjacency``) as of the snapshot, and ``match`` answers as
+    ``SubsetGraph.match`` did then. Elements are bucketed by their
+    ``literal_prefix`` (after ``fold``) and compiled in chunks of up to ``CHUNK``: one
+    pattern of optional lookaheads ``(?=(?P<_n>...))``, one per element,
+    all tried at the start of the text, so a single scan reports every
+    element of the chunk that matches. Patterns that cannot be joined (see
+    ``SOLO``) get a chunk of their own. A lookup scans the chunks of each
+    bucket whose prefix starts the text, then keeps what
+    ``SubsetGraph.match`` would: the matches reachable from a matching root
+    through matching subsets, and of those the ones without a matching
+    subset.
+
+    ``extend`` brings a snapshot up to date with its graph, compiling only
+    the chunks that gained elements. ``buckets`` may also be handed in laid
+    out already, as by a loaded ``snapshot``; their chunks are compiled the
+    first time a lookup reaches them. With ``cache_size`` the last lookups
+    are kept in a ``MatchCache``.
+    """
+
+    def __init__(
+        self,
+        elements: list[RegexElement],
+        roots: Iterable[int],
+        slots: array,
+        subsets: list[Sequence[int]],
+        cache_size: int = 0,
+        buckets: dict[str, list[Chunk]] | None = None
+    ) -> None:
+        self.elements = elements
+        self.roots = frozenset(roots)
+        self.slots = slots
+        self.subsets = subsets
+        self.cache_size = cache_size
+        self.cache = MatchCache(cache_size) if cache_size else None
+        if buckets is None:
+            buckets, made = place_chunks({}, elements, range(len(elements)))
+            for chunk in made:
+                chunk.compile(elements)
+        self.buckets = buckets
+        self.lengths = sorted({len(prefix) for prefix in self.buckets})
+
+    def __reduce__(self) -> tuple:
+        # Elements point at each other through their relation sets, which
+        # pickle cannot rebuild (their hash needs ``expression`` to be set
+        # first), so ship only expressions and edges.
+        return _restore_frozen, (
+            [element.expression for element in self.elements],
+            list(self.roots),
+            self.slots,
+            [array('i', targets) for targets in self.subsets],
+            self.cache_size,
+        )
+
+    def extend(self, graph: SubsetGraph) -> FrozenGraph:
+        """This snapshot brought up to date with ``graph``, which has only
+        gained elements since a ``checkpoint`` taken as of the snapshot.
+
+        Edge arrays there are never changed in place, so only the slots in
+        the journal and the new ones are looked up again.
+        """
+        adjacency = graph.adjacency
+        if adjacency.journal is None or adjacency.mark[0] != len(self.elements):
+            return graph.freeze(self.cache_size)
+        subsets = self.subsets + [
+            adjacency.slot_targets('subsets', slot)
+            for slot in range(len(self.subsets), len(adjacency.edges['subsets']))
+        ]
+        for name, slot in adjacency.journal:
+            if name == 'subsets':
+                subsets[slot] = adjacency.slot_targets('subsets', slot)
+
+        frozen = FrozenGraph.__new__(FrozenGraph)
+        frozen.elements = list(graph.elements)
+        frozen.roots = frozenset(graph.root_indices)
+        frozen.slots = array('i', adjacency.slots)
+        frozen.subsets = subsets
+        frozen.cache_size = self.cache_size
+        frozen.cache = MatchCache(self.cache_size) if self.cache_size else None
+        frozen.buckets, made = place_chunks(
+            self.buckets, frozen.elements, range(len(self.elements), len(graph.elements))
+        )
+        for chunk in made:
+            chunk.compile(frozen.elements)
+        frozen.lengths = sorted({len(prefix) for prefix in frozen.buckets})
+        return frozen
+
+    def prefixes(self, text: str) -> list[str]:
+        folded = fold(text[:self.lengths[-1]]) if self.lengths else ''
+        return [
+            folded[:length] for length in self.lengths
+            if length <= len(folded) and folded[:length] in self.buckets
+        ]
+
+    def scan(self, text: str) -> set[int]:
+        """Indices of every element matching ``text``."""
+        matched: set[int] = set()
+        for prefix in self.prefixes(text):
+            for chunk in self.buckets[prefix]:
+                pattern = chunk.pattern or chunk.compile(self.elements)
+                m = pattern.match(text)
+                if m is not None:
+                    spans = m.regs
+                    matched.update(idx for group, idx in chunk.groups if spans[group][0] >= 0)
+        return matched
+
+    def most_specific(self, text: str) -> list[int]:
+        """Indices of the elements ``SubsetGraph.match`` finds, ascending."""
+        out = self.cache.get(text, 0) if self.cache is not None else None
+        if out is not None:
+            return out
+
+        matched = self.scan(text)
+        slots, subsets = self.slots, self.subsets
+        frontier = [idx for idx in matched if idx in self.roots]
+        reached = set(frontier)
+        while frontier:
+            below: list[int] = []
+            for idx in frontier:
+                for subset in subsets[slots[idx]]:
+                    if subset in matched and subset not in reached:
+                        reached.add(subset)
+                        below.append(subset)
+            frontier = below
+        out = sorted(
+            idx for idx in reached
+            if not any(subset in reached for subset in subsets[slots[idx]])
+        )
+        if self.cache is not None:
+            self.cache.put(text, out)
+        return out
+
+    def classify(self, text: str, strict: bool = True) -> int:
+        """Index of the most specific match (the first, unless ``strict``),
+        ``NO_MATCH``, or ``AMBIGUOUS`` when strict mode finds several."""
+        out = self.most_specific(text)
+        if not out:
+            return NO_MATCH
+        if strict and len(out) > 1:
+            return AMBIGUOUS
+        return out[0]
+
+    def match(self, text: str, strict: bool = True) -> list[RegexElement]:
+        out = self.most_specific(text)
+        if strict and len(out) > 1:
+            raise Exception(f"Multiple equally specific matches found for {text}")
+        return [self.elements[idx] for idx in out]
+
+    def match_many(
+        self,
+        texts: Iterable[str | None],
+        strict: bool = True,
+        workers: int = 1
+    ) -> array:
+        """Classify every text at once.
+
+        Returns an ``array('i')`` holding, per text, the index of its most
+        specific element in ``elements``, ``NO_MATCH`` (also for missing
+        values), or ``AMBIGUOUS`` where strict ``match`` would raise.
+        ``texts`` may be any iterable of strings, including a NumPy string
+        array or an Arrow string column; repeated strings are classified
+        once. With ``workers`` above 1 the distinct strings are split over a
+        process pool.
+        """
+        if hasattr(texts, 'to_pylist'):
+            texts = texts.to_pylist()
+        texts = list(texts)
+        distinct = list(dict.fromkeys(text for text in texts if text is not None))
+
+        if workers > 1 and len(distinct) > workers:
+            from concurrent.futures import ProcessPoolExecutor
+
+            size = -(-len(distinct) // workers)
+            chunks = [distinct[i:i + size] for i in range(0, len(distinct), size)]
+            with ProcessPoolExecutor(workers) as pool:
+                codes = array('i')
+                for chunk in pool.map(
+                    _classify_many, [self] * len(chunks), chunks, [strict] * len(chunks)
+                ):
+                    codes.extend(chunk)
+        else:
+            codes = _classify_many(self, distinct, strict)
+
+        result = dict(zip(distinct, codes))
+        result[None] = NO_MATCH
+        return array('i', [result[text] for text in texts])
+
+
+class GraphVersion(NamedTuple):
+    number: int
+    # Expressions added up to this version.
+    size: int
+    frozen: FrozenGraph
+
+
+class LiveGraph:
+    """A ``SubsetGraph`` that threads can match against while rules are
+    added to it.
+
+    Writers take a lock, update the private graph and publish the next
+    ``GraphVersion`` by rebinding ``current``, which is atomic. Readers load
+    ``current`` once per lookup and use that version's ``FrozenGraph``
+    throughout, so they never block and never see a half-applied update;
+    ``match`` answers as ``SubsetGraph.match`` did at that version. Each
+    publish extends the previous snapshot by what the batch added, so
+    apply rules in batches with ``add_expressions`` to publish once for
+    many. A batch that fails is rolled back to the last published version.
+    With ``cache_size`` every version keeps that many lookups.
+    """
+
+    def __init__(
+        self,
+        tests: list[Test],
+        cache_size: int = 0,
+        indexed: bool = False,
+        relations: RelationEngine | None = None
     ) -> None:
-        new_elements = []
-        for element in elements:
-            m = element.compiled.match(text)
-            if m:
-                matches.add(element)
-                new_elements.extend(element.subsets)
-        if new_elements:
-            self._match(text, new_elements, matches)
-
-
-def _exapnd_regex(a, p, out_strings):
-    one = False
+        from threading import Lock
+
+        self._graph = SubsetGraph(tests, indexed=indexed, relations=relations)
+        self._lock = Lock()
+        self.current = GraphVersion(0, 0, self._graph.freeze(cache_size))
+
+    def add_expression(self, expression: str) -> GraphVersion:
+        return self.add_expressions([expression])
+
+    def add_expressions(self, expressions: Iterable[str]) -> GraphVersion:
+        expressions = list(expressions)
+        with self._lock:
+            graph = self._graph
+            graph.checkpoint()
+            try:
+                graph.add_expressions(expressions)
+                frozen = self.current.frozen.extend(graph)
+            except BaseException:
+                graph.rollback()
+                raise
+            version = GraphVersion(self.current.number + 1, len(graph.elements), frozen)
+            self.current = version
+        return version
+
+    def match(self, text: str, strict: bool = True) -> list[RegexElement]:
+        return self.current.frozen.match(text, strict)
+
+    def match_many(
+        self,
+        texts: Iterable[str | None],
+        strict: bool = True,
+        workers: int = 1
+    ) -> array:
+        return self.current.frozen.match_many(texts, strict, workers)
+
+
+NO_MATCH = -1
+AMBIGUOUS = -2
+
+
+def _classify_many(frozen: FrozenGraph, texts: list[str], strict: bool) -> array:
+    return array('i', [frozen.classify(text, strict) for text in texts])
+
+
+def _restore_frozen(
+    expressions: list[str],
+    roots: list[int],
+    slots: array,
+    subsets: list[array],
+    cache_size: int = 0
+) -> FrozenGraph:
+    elements = [RegexElement(expression) for expression in expressions]
+    return FrozenGraph(elements, roots, slots, subsets, cache_size)
+
+
+GROUP_QUANTIFIED = re.compile(r'\(.*?\)\{[0-9]*,[0-9]*\}')
+CHAR_QUANTIFIED = re.compile(r'.\{[0-9]*,[0-9]*\}')
+
+# Stop expanding a pattern once it has produced this many strings.
+EXPANSION_LIMIT = 1024
+
+
+def _quantified_pieces(a, p):
+    """Split ``a`` on the ``{m,n}`` quantified pieces ``p`` finds.
+
+    Returns ``(text before, repeated text, counts)`` per piece, plus the
+    text after the last one.
+    """
+    pieces = []
     last = 0
-    d = p.finditer(a)
-    for e in d:
-        one = True
+    for e in p.finditer(a):
         grp = e.group()
         if grp.startswith('(') and '){' in grp:
             grp = grp[1:]
@@ -224,41 +1062,86 @@ def _exapnd_regex(a, p, out_strings):
         min_iter, max_iter = iter_name.split(',')
         min_iter = int(min_iter)
         max_iter = int(max_iter)
-        if min_iter == max_iter:
-            pattern *= max_iter
-            for i, s in enumerate(out_strings):
-                out_strings[i] = s + a[last:e.start()] + pattern
-        else:
-            if min_iter > max_iter:
-                raise Exception("Cannot expand regex: " + a)
-            else:
-                old_out_strings = out_strings[:]
-                out_strings.clear()
-                for z in range(min_iter, max_iter + 1):
-                    for i in old_out_strings:
-                        out_strings.append(i + a[last:e.start()] + pattern * z)
+        if min_iter > max_iter:
+            raise Exception("Cannot expand regex: " + a)
+        pieces.append((a[last:e.start()], pattern, range(min_iter, max_iter + 1)))
         last = e.end()
-    return one, last
+    return pieces, a[last:]
 
 
 def expand_regex(a):
-    out_strings = ['']
-    b = re.compile(r'.\{[0-9]*,[0-9]*\}')
-    c = re.compile(r'\(.*?\)\{[0-9]*,[0-9]*\}')
-    one, last = _exapnd_regex(a, c, out_strings)
-    if one:
-        for i in range(len(out_strings)):
-            out_strings[i] += a[last:]
-    else:
-        one, last = _exapnd_regex(a, b, out_strings)
-        if one:
-            for i in range(len(out_strings)):
-                out_strings[i] += a[last:]
-        else:
+    """Lazily yield every string ``a`` expands to once each ``{m,n}``
+    quantifier is replaced by a fixed repetition."""
+    pieces, tail = _quantified_pieces(a, GROUP_QUANTIFIED)
+    if not pieces:
+        pieces, tail = _quantified_pieces(a, CHAR_QUANTIFIED)
+        if not pieces:
             yield a
             return
-    for i in out_strings:
-        yield from expand_regex(i)
+    # The last piece varies slowest, as in the original list-based expansion.
+    for counts in product(*(counts for _, _, counts in reversed(pieces))):
+        expanded = ''.join(
+            before + pattern * count
+            for (before, pattern, _), count in zip(pieces, reversed(counts))
+        )
+        yield from expand_regex(expanded + tail)
+
+
+def bounded_expansions(a, limit=EXPANSION_LIMIT):
+    """The set of expansions of ``a``, or ``None`` unless ``expand_regex``
+    finishes within ``limit`` of them.
+
+    Raw yields are counted, duplicates included: stopping on the number of
+    distinct strings instead would hand back a set that is missing some.
+    """
+    expansions = set()
+    for count, expansion in enumerate(expand_regex(a)):
+        if count == limit:
+            return None
+        expansions.add(expansion)
+    return frozenset(expansions)
+
+
+QUANTIFIER = re.compile(r'(?<!\\)\{(\d+)(?:(,)(\d*))?\}')
+
+
+def quantifier_skeleton(a):
+    """``a`` with every quantifier blanked out, and the quantifiers' ranges."""
+    ranges = []
+
+    def blank(m):
+        low = int(m.group(1))
+        if m.group(2) is None:
+            high = low
+        else:
+            high = int(m.group(3)) if m.group(3) else float('inf')
+        ranges.append((low, high))
+        return '{}'
+
+    return QUANTIFIER.sub(blank, a), tuple(ranges)
+
+
+def symbolic_relation(a_skeleton, b_skeleton):
+    """Relate two patterns that differ only in their quantifier ranges.
+
+    Widening a quantifier's range only ever adds strings, so range-wise
+    containment means language containment. Anything else is left
+    undecided: ranges that do not nest position by position may still
+    give equal languages (``a{1,3}a{2}`` and ``a{2}a{1,3}``).
+    """
+    a, a_ranges = a_skeleton
+    b, b_ranges = b_skeleton
+    if a != b:
+        return None
+
+    a_in_b = all(bl <= al and ah <= bh for (al, ah), (bl, bh) in zip(a_ranges, b_ranges))
+    b_in_a = all(al <= bl and bh <= ah for (al, ah), (bl, bh) in zip(a_ranges, b_ranges))
+    if a_in_b and b_in_a:
+        return Relation.EQUAL
+    if a_in_b:
+        return Relation.SUBSET
+    if b_in_a:
+        return Relation.SUPERSET
 
 
 def check_equal(lhs: str, rhs: str) -> Relation | None:
@@ -298,23 +1181,18 @@ def check_suffixes(a, b):
             return Relation.DISJOINT
 
 
-def check_dotstar(a, b):
-    astar = False
-    bstar = False
-
+def dotstar_stem(a):
+    """``a`` without a trailing ``.*`` / ``(/.*)?``, and whether it had one."""
     if a.endswith(".*"):
-        a = a[:-2]
-        astar = True
+        return a[:-2], True
     elif a.endswith("(/.*)?"):
-        a = a[:-6]
-        astar = True
+        return a[:-6], True
+    return a, False
+
 
-    if b.endswith(".*"):
-        b = b[:-2]
-        bstar = True
-    elif b.endswith("(/.*)?"):
-        b = b[:-6]
-        bstar = True
+def dotstar_relation(a_stem, b_stem):
+    a, astar = a_stem
+    b, bstar = b_stem
 
     if astar and bstar:
         if a.startswith(b):
@@ -327,25 +1205,25 @@ def check_dotstar(a, b):
         return Relation.SUPERSET
 
 
-def check_fixed(a, b):
-    a_fixed = True
-    b_fixed = True
+def check_dotstar(a, b):
+    return dotstar_relation(dotstar_stem(a), dotstar_stem(b))
+
 
+def is_fixed(a):
+    fixed = True
     i = 0
     while i < len(a):
         if a[i] == "\\":
             i += 1
         if a[i] in r"([.*{?+":
-            a_fixed = False
+            fixed = False
         i += 1
+    return fixed
 
-    i = 0
-    while i < len(b):
-        if b[i] == "\\":
-            i += 1
-        if b[i] in r"([.*{?+":
-            b_fixed = False
-        i += 1
+
+def check_fixed(a, b):
+    a_fixed = is_fixed(a)
+    b_fixed = is_fixed(b)
 
     if a_fixed and not b_fixed:
         if re.match(b, a):
@@ -355,41 +1233,214 @@ def check_fixed(a, b):
             return Relation.SUPERSET
 
 
+def strip_anchors(a):
+    return a.rstrip('$').lstrip('^')
+
+
 def check_match(a, b):
-    if re.compile(a).match(b.rstrip('$').lstrip('^')):
+    if re.compile(a).match(strip_anchors(b)):
         return Relation.SUPERSET
-    if re.compile(b).match(a.rstrip('$').lstrip('^')):
+    if re.compile(b).match(strip_anchors(a)):
         return Relation.SUBSET
 
 
-def check_expand(a, b):
-    c = list(expand_regex(a))
-    d = list(expand_regex(b))
-    bina = False
-    ainb = False
-    allainb = True
-    allbina = True
-    for i in c:
-        if i in d:
-            ainb = True
-        else:
-            allainb = False
-    for i in d:
-        if i in c:
-            bina = True
-        else:
-            allbina = False
+def expand_relation(c, d):
+    # ``c`` and ``d`` are the sets of expansions of either pattern.
+    allainb = c <= d
+    allbina = d <= c
     if allainb and allbina:
         return Relation.EQUAL
     if allainb and not allbina:
         return Relation.SUBSET
     if allbina and not allainb:
         return Relation.SUPERSET
-    if ainb or bina:
+    if not c.isdisjoint(d):
         return Relation.INTERSECT
 
 
+def check_expand(a, b, limit=EXPANSION_LIMIT):
+    c = bounded_expansions(a, limit)
+    d = bounded_expansions(b, limit)
+    if c is None or d is None:
+        return symbolic_relation(quantifier_skeleton(a), quantifier_skeleton(b))
+    return expand_relation(c, d)
+
+
+def derived(element: RegexElement, name: str, compute: Callable[[str], T]) -> T:
+    """``compute(element.expression)``, worked out once per element."""
+    cache = element.precompilation
+    if name not in cache:
+        cache[name] = compute(element.expression)
+    return cache[name]
+
+
+def element_dotstar(a: RegexElement, b: RegexElement) -> Relation | None:
+    return dotstar_relation(
+        derived(a, 'dotstar', dotstar_stem),
+        derived(b, 'dotstar', dotstar_stem)
+    )
+
+
+def element_fixed(a: RegexElement, b: RegexElement) -> Relation | None:
+    a_fixed = derived(a, 'fixed', is_fixed)
+    b_fixed = derived(b, 'fixed', is_fixed)
+
+    if a_fixed and not b_fixed:
+        if derived(b, 'pattern', re.compile).match(a.expression):
+            return Relation.SUBSET
+    elif b_fixed and not a_fixed:
+        if derived(a, 'pattern', re.compile).match(b.expression):
+            return Relation.SUPERSET
+
+
+def element_match(a: RegexElement, b: RegexElement) -> Relation | None:
+    if derived(a, 'pattern', re.compile).match(derived(b, 'stripped', strip_anchors)):
+        return Relation.SUPERSET
+    if derived(b, 'pattern', re.compile).match(derived(a, 'stripped', strip_anchors)):
+        return Relation.SUBSET
+
+
+def element_expand(a: RegexElement, b: RegexElement) -> Relation | None:
+    c = derived(a, 'expand', bounded_expansions)
+    d = derived(b, 'expand', bounded_expansions)
+    if c is None or d is None:
+        return symbolic_relation(
+            derived(a, 'quantifiers', quantifier_skeleton),
+            derived(b, 'quantifiers', quantifier_skeleton)
+        )
+    return expand_relation(c, d)
+
+
+ElementTest = Callable[[RegexElement, RegexElement], Relation | None]
+
+# Versions of the string comparators that reuse per-element derived data.
+ELEMENT_TESTS: dict[Test, ElementTest] = {
+    check_dotstar: element_dotstar,
+    check_fixed: element_fixed,
+    check_match: element_match,
+    check_expand: element_expand,
+}
+
+
+class TestStats:
+    __slots__ = ('calls', 'decided', 'seconds')
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.decided: int = 0
+        self.seconds: float = 0.0
+
+    @property
+    def cost(self) -> float:
+        """Expected seconds spent per pair this test decides."""
+        if not self.calls:
+            return 0.0
+        return self.seconds / max(self.decided, 0.5)
+
+
+# Expression pairs whose relation ``RelationEngine`` remembers.
+PAIR_CACHE_SIZE = 4096
+
+
+class RelationEngine:
+    """Runs a comparator pipeline over ``RegexElement`` pairs.
+
+    Comparators listed in ``ELEMENT_TESTS``, or in ``element_tests`` for
+    comparators defined elsewhere (``automata.AUTOMATON_TESTS``), run on
+    data derived once per element (compiled patterns, expansions,
+    fixed-ness, ``.*`` stems) and kept in ``RegexElement.precompilation``. The results for the last
+    ``cache_size`` pairs of expressions are kept in an LRU memo, which pays
+    off when an expression is added again; distinct expressions never meet
+    twice, so an unbounded memo would only grow. ``stats`` records calls,
+    decisive results and time per test.
+
+    The first test to return a relation wins, so by default ``tests`` run
+    in the order given. With ``adaptive`` set they are re-sorted every
+    ``reorder_every`` comparisons by time spent per decided pair; only do
+    that when the tests agree wherever more than one of them decides.
+    """
+
+    def __init__(
+        self,
+        tests: list[Test],
+        adaptive: bool = False,
+        reorder_every: int = 256,
+        cache_size: int = PAIR_CACHE_SIZE,
+        element_tests: dict[Test, ElementTest] | None = None
+    ) -> None:
+        self.tests = list(tests)
+        self.element_tests = {**ELEMENT_TESTS, **(element_tests or {})}
+        self.adaptive = adaptive
+        self.reorder_every = reorder_every
+        self.stats: dict[Test, TestStats] = {test: TestStats() for test in tests}
+        self.cache_size = cache_size
+        self.pairs: OrderedDict[tuple[str, str], Relation | None] = OrderedDict()
+        self.pair_hits: int = 0
+        self.compared: int = 0
+
+    def compare(self, a: RegexElement, b: RegexElement) -> Relation | None:
+        key = (a.expression, b.expression)
+        if key in self.pairs:
+            self.pair_hits += 1
+            self.pairs.move_to_end(key)
+            return self.pairs[key]
+
+        result = None
+        for test in self.tests:
+            stats = self.stats[test]
+            element_test = self.element_tests.get(test)
+            start = perf_counter()
+            if element_test is not None:
+                result = element_test(a, b)
+            else:
+                result = test(a.expression, b.expression)
+            stats.seconds += perf_counter() - start
+            stats.calls += 1
+            if result:
+                stats.decided += 1
+                break
+        else:
+            result = None
+
+        if self.cache_size:
+            self.pairs[key] = result
+            if len(self.pairs) > self.cache_size:
+                self.pairs.popitem(last=False)
+        self.compared += 1
+        if self.adaptive and self.compared % self.reorder_every == 0:
+            self.tests.sort(key=lambda test: self.stats[test].cost)
+        return result
+
+    def report(self) -> str:
+        lines = [f"{'test':<16}{'calls':>10}{'decided':>10}{'seconds':>10}"]
+        for test in self.tests:
+            stats = self.stats[test]
+            lines.append(
+                f"{test.__name__:<16}{stats.calls:>10}"
+                f"{stats.decided:>10}{stats.seconds:>10.3f}"
+            )
+        lines.append(f"{'pair cache hits':<16}{self.pair_hits:>10}")
+        return '\n'.join(lines)
+
+
+def lex_sample(expr: str = "b = 2 + a * 10") -> None:
+    any_digit: str = r"(\d+)"
+    any_word: str = r"(\w+)"
+    any_char: str = r"(.)"
+
+    expression = rf"\s*(?:{any_digit}|{any_word}|{any_char})"
+    regex = re.compile(expression)
+
+    for m in regex.finditer(expr):
+        print(
+            LexItem(m.lastindex),
+            repr(m.group(cast(str, m.lastindex)))
+        )
+
+
 if __name__ == '__main__':
+    lex_sample()
+
     tests = [
         check_expand, 
         check_prefixes, 
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+from array import array
+import mmap
+import os
+import re
+import struct
+import tempfile
+
+from graph_compiler.regex_parsing import (
+    RELATIONS,
+    Chunk,
+    RegexElement,
+    RelationEngine,
+    SubsetGraph,
+    Test,
+    place_chunks,
+    prefix_key,
+    suffix_key,
+)
+
+
+MAGIC = b'GSG3'
+# magic, elements, slots, roots, generation, expression bytes, buckets,
+# chunks, prefix bytes
+HEADER = struct.Struct('<4siiiiiiii')
+WIDTH = array('i').itemsize
+
+
+def pack(strings: list[str]) -> tuple[array, bytes, int]:
+    """Offsets into the UTF-8 text of ``strings``, that text padded to a
+    whole column, and its unpadded size."""
+    blob = bytearray()
+    offsets = array('i', [0])
+    for string in strings:
+        blob += string.encode('utf-8', 'surrogatepass')
+        offsets.append(len(blob))
+    size = len(blob)
+    blob += bytes(-len(blob) % WIDTH)
+    return offsets, bytes(blob), size
+
+
+def save_graph(graph: SubsetGraph, path: str) -> None:
+    """Write ``graph`` to ``path`` for ``load_graph``.
+
+    The layout is the header, then ``array('i')`` columns in native byte
+    order: expression offsets, the UTF-8 expressions padded to a whole
+    column, each element's ``Adjacency`` slot, root rows and the generation
+    each became a root in, and one CSR pair (slot offsets, target rows) per
+    relation in ``RELATIONS``. Slots are renumbered in order of first use,
+    dropping those no element points at any more, so equal elements still
+    share one after loading.
+
+    The ``FrozenGraph`` bucket layout follows, so ``freeze`` on the loaded
+    graph only compiles chunks as lookups reach them: prefix offsets and
+    the padded UTF-8 prefixes, the chunk offsets of each bucket, the row
+    offsets of each chunk and whether it is ``solo``, and the rows.
+    """
+    elements = graph.elements
+    adjacency = graph.adjacency
+
+    numbers: dict[int, int] = {}
+    slots = array('i')
+    # One element per saved slot, to read its edges through.
+    owners: list[int] = []
+    for row in range(len(elements)):
+        slot = adjacency.slots[row]
+        if slot not in numbers:
+            numbers[slot] = len(owners)
+            owners.append(row)
+        slots.append(numbers[slot])
+
+    offsets, blob, text_size = pack([element.expression for element in elements])
+
+    roots = array('i', (root.index for root in graph._root_set))
+    seqs = array('i', graph._root_set.values())
+
+    layout = graph._layout
+    if layout is not None and layout[0] == graph.generation:
+        buckets = layout[1]
+    else:
+        buckets, _ = place_chunks({}, elements, range(len(elements)))
+    prefix_offsets, prefix_blob, prefix_size = pack(list(buckets))
+    bucket_starts = array('i', [0])
+    chunk_starts = array('i', [0])
+    solo = array('i')
+    members = array('i')
+    for chunks in buckets.values():
+        for chunk in chunks:
+            members.extend(chunk.indices)
+            chunk_starts.append(len(members))
+            solo.append(chunk.solo)
+        bucket_starts.append(len(solo))
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(
+                MAGIC, len(elements), len(owners), len(roots), graph.generation, text_size,
+                len(buckets), len(solo), prefix_size
+            ))
+            f.write(offsets)
+            f.write(blob)
+            f.write(slots)
+            f.write(roots)
+            f.write(seqs)
+            for name in RELATIONS:
+                starts = array('i', [0])
+                targets = array('i')
+                for row in owners:
+                    targets.extend(adjacency.targets(name, row))
+                    starts.append(len(targets))
+                f.write(starts)
+                f.write(targets)
+            for column in (prefix_offsets, prefix_blob, bucket_starts, chunk_starts, solo, members):
+                f.write(column)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class Snapshot:
+    """The columns of a saved graph, as views over a read-only memory map.
+
+    Forked workers that load the same file share its pages.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.data)
+        if len(view) < HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        (
+            magic, n_elements, n_slots, n_roots, self.generation, text_size,
+            n_buckets, n_chunks, prefix_size
+        ) = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a SubsetGraph snapshot")
+
+        offset = HEADER.size
+
+        def column(rows: int) -> memoryview:
+            nonlocal offset
+            chunk = view[offset:offset + rows * WIDTH]
+            if len(chunk) != rows * WIDTH:
+                raise ValueError(f"{path} is truncated")
+            offset += rows * WIDTH
+            return chunk.cast('i')
+
+        def text(size: int) -> memoryview:
+            nonlocal offset
+            chunk = view[offset:offset + size]
+            if len(chunk) != size:
+                raise ValueError(f"{path} is truncated")
+            offset += size + -size % WIDTH
+            return chunk
+
+        self.offsets = column(n_elements + 1)
+        self.text = text(text_size)
+        self.n_slots = n_slots
+        self.slots = column(n_elements)
+        self.roots = column(n_roots)
+        self.seqs = column(n_roots)
+        self.relations: dict[str, tuple[memoryview, memoryview]] = {}
+        for name in RELATIONS:
+            starts = column(n_slots + 1)
+            self.relations[name] = (starts, column(starts[-1]))
+        prefix_offsets = column(n_buckets + 1)
+        prefixes = text(prefix_size)
+        bucket_starts = column(n_buckets + 1)
+        chunk_starts = column(n_chunks + 1)
+        solo = column(n_chunks)
+        members = column(chunk_starts[-1])
+        if offset != len(view):
+            raise ValueError(f"{path} has trailing data")
+
+        self.elements = [SnapshotElement(self.expression(row)) for row in range(n_elements)]
+        self.buckets: dict[str, list[Chunk]] = {}
+        for bucket in range(n_buckets):
+            prefix = decode(prefixes, prefix_offsets, bucket)
+            self.buckets[prefix] = [
+                Chunk(members[chunk_starts[idx]:chunk_starts[idx + 1]].tolist(), bool(solo[idx]))
+                for idx in range(bucket_starts[bucket], bucket_starts[bucket + 1])
+            ]
+
+    def expression(self, row: int) -> str:
+        return decode(self.text, self.offsets, row)
+
+
+def decode(text: memoryview, offsets: memoryview, row: int) -> str:
+    return bytes(text[offsets[row]:offsets[row + 1]]).decode('utf-8', 'surrogatepass')
+
+
+class SnapshotElement(RegexElement):
+    """A ``RegexElement`` read from a ``Snapshot``.
+
+    Its compiled pattern and index keys are worked out on first access, so
+    loading a graph costs one string decode per element. The graph's
+    ``Adjacency`` reads its relations from the snapshot's columns until it
+    gains an edge.
+    """
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.maybes: list[RegexElement] = []
+        self.precompilation = {}
+        self.adjacency = None
+        self.index = -1
+        self._own = None
+
+    def __getattr__(self, name: str):
+        # Only called for attributes not set yet.
+        if name == 'compiled':
+            value = re.compile(self.expression, re.IGNORECASE)
+        elif name == 'prefix_key':
+            value = prefix_key(self.expression)
+        elif name == 'suffix_key':
+            value = suffix_key(self.expression)
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
+
+    def __hash__(self) -> int:
+        return hash(self.expression)
+
+
+def load_graph(
+    path: str,
+    tests: list[Test],
+    cache_size: int = 0,
+    indexed: bool = False,
+    relations: RelationEngine | None = None
+) -> SubsetGraph:
+    """A ``SubsetGraph`` as ``save_graph`` left it, ready to match and to
+    take further expressions."""
+    snapshot = Snapshot(path)
+    graph = SubsetGraph(tests, cache_size, indexed, relations)
+    graph.elements = list(snapshot.elements)
+    adjacency = graph.adjacency
+    for element in graph.elements:
+        adjacency.register(element)
+    adjacency.slots = array('i', snapshot.slots)
+    adjacency.edges = {name: [None] * snapshot.n_slots for name in RELATIONS}
+    adjacency.base = snapshot.relations
+    for row, seq in zip(snapshot.roots, snapshot.seqs):
+        root = snapshot.elements[row]
+        graph._root_set[root] = seq
+        if graph._root_index is not None:
+            graph._root_index.add(root, seq)
+    graph.generation = snapshot.generation
+    graph._layout = (snapshot.generation, snapshot.buckets)
+    return graph
@@ -1,4 +1,4 @@
-from graph_compiler.parser import Parser, TestParser
+from graph_compiler.parser import Parser
 from graph_compiler.lexer import Lexer
 
 
@@ -26,5 +26,5 @@ if __name__ == '__main__':
     value = lexer.next_token()
     print(value)
     
-    parser = TestParser(Lexer('abc { a = 10 };'))
+    parser = Parser(Lexer('abc { a = 10 };'))
     ast = parser.parse()
@@ -0,0 +1,154 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from graph_compiler.aio import AsyncLexer, parse_async
+from graph_compiler.lexer import Lexer, RegexLexer, TokenType
+from graph_compiler.parser import Parser
+
+
+SOURCE = (
+    "abcdefghij { alpha = 1234567890 };\n"
+    "\tb = (alpha + 22) * 3;   # note\r\n"
+    "é² = ab٣cd + 12²;\n"
+    "g { h { i = 1 } j = i / 2 } k = g"
+)
+
+
+PROGRAM = (
+    "abcdefghij { alpha = 1234567890 };\n"
+    "\tb = (alpha + 22) * 3;   # note\r\n"
+    "g { h { i = 1 } j = i / 2 } k = g;\n"
+    "m = k - 1"
+)
+
+
+def reader_for(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+async def collect(lexer: AsyncLexer) -> list:
+    return [token async for token in lexer]
+
+
+def test_async_lexer_matches_lexer():
+    expected = list(RegexLexer(SOURCE).tokenize())[:-1]
+    data = SOURCE.encode('utf-8')
+
+    async def main():
+        for chunk_size in (1, 2, 5, 64, 1 << 16):
+            lexer = AsyncLexer(reader_for(data), chunk_size)
+            assert await collect(lexer) == expected
+            assert (lexer.line_num, lexer.char_num) == (5, len(SOURCE) + 5)
+
+    asyncio.run(main())
+
+
+def test_async_lexer_error_position():
+    source = "a = 1;\n\t b ~ 2;"
+    with pytest.raises(SyntaxError) as expected:
+        Lexer(source).tokenize()
+
+    async def main():
+        with pytest.raises(SyntaxError) as e:
+            await collect(AsyncLexer(reader_for(source.encode()), 3))
+        assert str(e.value) == str(expected.value)
+
+    asyncio.run(main())
+
+
+def test_parse_async_matches_parser():
+    expected = Parser(RegexLexer(PROGRAM)).parse()
+
+    async def main():
+        for chunk_size in (1, 7, 1 << 16):
+            program = await parse_async(reader_for(PROGRAM.encode()), chunk_size)
+            assert repr_tree(program) == repr_tree(expected)
+        with ThreadPoolExecutor(2) as pool:
+            program = await parse_async(reader_for(PROGRAM.encode()), 7, pool)
+            assert repr_tree(program) == repr_tree(expected)
+
+        with pytest.raises(SyntaxError, match='on line 3'):
+            await parse_async(reader_for(b"a = 1;\nb = 2;\nc = ;\nd = 4;"), 4)
+
+    asyncio.run(main())
+
+
+def test_parse_async_closes_statements_on_braces():
+    class Counting(ThreadPoolExecutor):
+        parsed = 0
+
+        def submit(self, fn, *args, **kwargs):
+            if getattr(fn, '__name__', '') == 'parse':
+                self.parsed += 1
+            return super().submit(fn, *args, **kwargs)
+
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"g { a = 1 }\nh { b = 2 }\nk = ")
+        with Counting(1) as pool:
+            task = asyncio.create_task(parse_async(reader, 4, pool))
+            for _ in range(200):
+                await asyncio.sleep(0.005)
+                if pool.parsed == 2:
+                    break
+            # Both blocks are parsed before the stream ends.
+            assert pool.parsed == 2 and not task.done()
+            reader.feed_data(b"g; m { }")
+            reader.feed_eof()
+            program = await task
+        expected = Parser(RegexLexer("g { a = 1 }\nh { b = 2 }\nk = g; m { }")).parse()
+        assert repr_tree(program) == repr_tree(expected)
+
+    asyncio.run(main())
+
+
+def repr_tree(node):
+    if isinstance(node, list):
+        return [repr_tree(item) for item in node]
+    if hasattr(node, '__slots__') and node.__slots__:
+        return (type(node).__name__, *(repr_tree(getattr(node, name)) for name in node.__slots__))
+    return node
+
+
+def test_async_lexer_yields_and_reads_lazily():
+    data = b"a = 1;\n" * 5_000
+
+    class Reader:
+        def __init__(self):
+            self.taken = 0
+
+        async def read(self, n):
+            chunk = data[self.taken:self.taken + n]
+            self.taken += len(chunk)
+            return chunk
+
+    async def main():
+        # Only what the consumer has asked for is read.
+        reader = Reader()
+        lexer = AsyncLexer(reader, chunk_size=64)
+        async for token in lexer:
+            if token.token_type == TokenType.SEMICOLON:
+                break
+        assert reader.taken == 64
+
+        # Other tasks keep running while a large document is lexed.
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        program = await parse_async(Reader(), chunk_size=1024)
+        task.cancel()
+        assert len(program.statements) == 5_000
+        assert ticks >= len(data) // 1024
+
+    asyncio.run(main())
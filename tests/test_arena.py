@@ -0,0 +1,54 @@
+import pickle
+
+from graph_compiler.arena import *
+from graph_compiler.lexer import Lexer, RegexLexer
+from graph_compiler.parser import *
+
+
+def same(node: AST, view: NodeView) -> bool:
+    if type(node) is not view.kind:
+        return False
+    match node:
+        case Program():
+            children = node.statements
+        case Assign():
+            children = [node.target, node.value]
+        case Block():
+            children = [node.name, *node.statements]
+        case BinaryOp():
+            if node.op != view.token:
+                return False
+            children = [node.left, node.right]
+        case _:
+            return node.token == view.token
+    return (
+        len(children) == len(view.children) and
+        all(same(a, b) for a, b in zip(children, view.children))
+    )
+
+
+def test_arena_matches_tree():
+    source = 'g { a = 1 + 2 * x; h { b = (a - 3) / 4 } }; c = g - a;'
+    arena = ArenaParser(RegexLexer(source).tokenize()).parse()
+    assert same(Parser(Lexer(source)).parse(), arena[arena.root])
+
+    arena = pickle.loads(pickle.dumps(arena))
+    assert same(Parser(Lexer(source)).parse(), arena[arena.root])
+
+
+def test_deep_tree_walk():
+    depth = 5000
+    # Left-associative chains nest one level per operator.
+    source = 'x = 1' + ' - 1' * depth + ';'
+    arena = ArenaParser(RegexLexer(source).tokenize()).parse()
+
+    kinds = [arena[idx].kind for idx in arena.walk()]
+    assert kinds.count(BinaryOp) == depth
+    assert kinds.count(Number) == depth + 1
+
+    # Parenthesized right operands nest one level per pair.
+    source = 'x = ' + '(1 - ' * depth + '1' + ')' * depth + ';'
+    arena = ArenaParser(RegexLexer(source).tokenize()).parse()
+    kinds = [arena[idx].kind for idx in arena.walk()]
+    assert kinds.count(BinaryOp) == depth
+    assert kinds.count(Number) == depth + 1
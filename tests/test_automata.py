@@ -0,0 +1,91 @@
+from itertools import product
+import re
+
+from graph_compiler.automata import AUTOMATON_TESTS, check_automaton, compile_dfa
+from graph_compiler.regex_parsing import (
+    RegexElement,
+    Relation,
+    RelationEngine,
+    SubsetGraph,
+    check_dotstar,
+    check_equal,
+    check_expand,
+    check_fixed,
+    check_match,
+    check_prefixes,
+    check_suffixes,
+)
+
+
+PATTERNS = [
+    'a', 'b', 'a*$', '(ab)+$', 'a|b', '[ab]b$', 'a?b', '(a|ab)$', 'b{2}',
+    '[^a]', '.b$', 'a{1,2}$', '(?:ba)*a$', 'A$', '[_a-c]$', '^c', 'a{,2}c',
+]
+
+
+def brute_force(a, b):
+    texts = [''.join(chars) for n in range(6) for chars in product('abAc\n', repeat=n)]
+    lhs = {text for text in texts if re.match(a, text, re.IGNORECASE)}
+    rhs = {text for text in texts if re.match(b, text, re.IGNORECASE)}
+    if lhs == rhs:
+        return Relation.EQUAL
+    if lhs < rhs:
+        return Relation.SUBSET
+    if lhs > rhs:
+        return Relation.SUPERSET
+    return Relation.INTERSECT if lhs & rhs else Relation.DISJOINT
+
+
+def test_check_automaton_is_exact():
+    for a in PATTERNS:
+        for b in PATTERNS:
+            assert check_automaton(a, b) == brute_force(a, b), (a, b)
+
+
+def test_check_automaton_match_semantics():
+    # ``match`` accepts any text starting with a match.
+    assert check_automaton('a+', 'a') == 'equal'
+    assert check_automaton('a+$', 'a$') == 'superset'
+    assert check_automaton('^00:11:22:..:..:..', '..:..:..:..:..:..') == 'subset'
+    assert check_automaton('..:..:..:33:44:55$', '^00:11:22:..:..:..') == 'intersect'
+    assert check_automaton('(a|b)*c$', '[ab]*c$') == 'equal'
+
+
+def test_check_automaton_newline_and_case_folds():
+    # A trailing '$' also matches before a final newline.
+    assert check_automaton('a$', 'a\n?$') == 'subset'
+    assert check_automaton('a$', 'a\n$') == 'intersect'
+    # IGNORECASE equates more than str.upper and str.lower do.
+    assert check_automaton('k$', '[k\u212a]$') == 'equal'
+    assert check_automaton('[^s]$', '[^\u017f]$') == 'equal'
+    assert check_automaton('i$', '\u0131$') == 'equal'
+    for pattern in ['k', 's', 'i', 'é', 'ß', '\u212a', '\u0130', '[a-c]', '[^k]']:
+        dfa = compile_dfa(pattern + '$')
+        for code in [*range(0x250), 0x1e9e, 0x212a, 0x212b, 0x2126]:
+            text = chr(code)
+            state = dfa.step(0, text)
+            assert dfa.accepting[state] == bool(re.match(pattern + '$', text, re.IGNORECASE)), (pattern, text)
+
+
+def test_check_automaton_falls_back():
+    assert check_automaton('a(?=b)', 'a') is None
+    assert check_automaton('(a)\\1', 'a') is None
+    # \w takes in 'é' and other letters beyond ASCII.
+    assert check_automaton(r'\w+$', r'[a-zA-Z0-9_]+$') is None
+    assert check_automaton(r'\D', r'[^0-9]') is None
+    assert compile_dfa('.{200}x') is not None
+    assert check_automaton('.{200}x', '.{199}y', state_budget=100) is None
+
+
+def test_automaton_in_subset_graph():
+    tests = [check_expand, check_prefixes, check_fixed, check_dotstar,
+             check_suffixes, check_equal, check_match]
+    engine = RelationEngine([check_automaton, *tests], element_tests=AUTOMATON_TESTS)
+    sg = SubsetGraph(engine.tests, relations=engine)
+    for expression in ['..:..:..:..:..:..', '^00:11:22:..:..:..', '^00:11:22:33:44:55$']:
+        sg.add_expression(expression)
+
+    assert [e.expression for e in sg.roots] == ['..:..:..:..:..:..']
+    assert [e.expression for e in sg.match('00:11:22:33:44:55')] == ['^00:11:22:33:44:55$']
+    assert engine.stats[check_automaton].decided > 0
+    assert all('automaton' in element.precompilation for element in sg.roots)
@@ -0,0 +1,143 @@
+from array import array
+import os
+
+from graph_compiler.arena import ArenaParser
+from graph_compiler.cache import *
+from graph_compiler.driver import cache_totals, compile_files
+from graph_compiler.lexer import RegexLexer
+
+
+def build(source: str):
+    table = RegexLexer(source).tokenize()
+    return table, ArenaParser(table).parse()
+
+
+def test_round_trip(tmp_path):
+    cache = Cache(str(tmp_path))
+    source = 'g { a = 1 + 2 * x }; c = g - a;'
+    assert cache.get(source) is None
+
+    table, arena = build(source)
+    cache.put(source, table, arena)
+    for copy in (False, True):
+        cached_table, cached_arena, failure = cache.get(source, copy)
+        assert failure is None
+        assert isinstance(cached_table.types, array) == copy
+        assert list(cached_table) == list(table)
+        assert list(cached_table.lines) == list(table.lines)
+        assert list(cached_arena.kinds) == list(arena.kinds)
+        assert list(cached_arena.walk()) == list(arena.walk())
+
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.get(source + ' ') is None
+
+
+def test_eviction(tmp_path):
+    cache = Cache(str(tmp_path))
+    sources = [f'a = {i};' for i in range(3)]
+    for age, source in enumerate(sources[:2]):
+        cache.put(source, *build(source))
+        path = cache.path(cache.key(source))
+        os.utime(path, (1000 + age, 1000 + age))
+
+    # Reading the older entry makes the other one least recently used.
+    assert cache.get(sources[0]) is not None
+    cache.max_bytes = 2 * os.path.getsize(path)
+    cache.put(sources[2], *build(sources[2]))
+
+    assert cache.evictions == 1
+    assert cache.get(sources[1]) is None
+    assert cache.get(sources[0]) is not None
+    assert cache.get(sources[2]) is not None
+
+
+def test_warm_build_skips_lexer(tmp_path, monkeypatch):
+    path = tmp_path / 'a.graph'
+    path.write_text('g { a = 1 + 2 };')
+    cache_dir = str(tmp_path / 'cache')
+
+    cold, = compile_files([str(path)], 1, cache_dir)
+    assert not cold.cached
+
+    def fail(self):
+        raise AssertionError("lexed a cached file")
+
+    monkeypatch.setattr(RegexLexer, 'next_token', fail)
+    warm, = compile_files([str(path)], 1, cache_dir)
+    assert warm.cached
+    assert list(warm.arena.kinds) == list(cold.arena.kinds)
+
+
+def test_failed_sources_are_cached(tmp_path, monkeypatch):
+    sources = {'a.graph': 'x = 1;\n\ty = ~;', 'b.graph': 'x = 1;\nz = (1 + ;'}
+    paths = []
+    for name, source in sources.items():
+        path = tmp_path / name
+        path.write_text(source)
+        paths.append(str(path))
+    cache_dir = str(tmp_path / 'cache')
+    cold = compile_files(paths, 1, cache_dir)
+
+    def fail(self):
+        raise AssertionError("lexed a cached file")
+
+    monkeypatch.setattr(RegexLexer, 'next_token', fail)
+    for workers in (1, 2):
+        warm = compile_files(paths, workers, cache_dir)
+        assert all(result.cached for result in warm)
+        assert [result.diagnostics for result in warm] == [result.diagnostics for result in cold]
+        assert warm[0].table is None
+        assert list(warm[1].table) == list(cold[1].table) and warm[1].arena is None
+        # Only results pickled back from workers need their columns copied.
+        assert isinstance(warm[1].table.types, array) == (workers == 2)
+
+
+def test_truncated_entry_is_a_miss(tmp_path):
+    cache = Cache(str(tmp_path))
+    source = 'a = 1;'
+    cache.put(source, *build(source))
+    path = cache.path(cache.key(source))
+    for size in (HEADER.size - 1, HEADER.size + 1):
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+        assert cache.get(source) is None
+    assert cache.misses == 2
+
+
+def test_eviction_keeps_an_index(tmp_path, monkeypatch):
+    cache = Cache(str(tmp_path))
+    sources = [f'a = {i};' for i in range(200)]
+    cache.put(sources[0], *build(sources[0]))
+    cache.max_bytes = 50 * os.path.getsize(cache.path(cache.key(sources[0])))
+
+    scans = 0
+    scandir = os.scandir
+
+    def counting(path):
+        nonlocal scans
+        scans += 1
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', counting)
+    for source in sources[1:]:
+        cache.put(source, *build(source))
+    assert cache.evictions == 150
+    assert len(os.listdir(tmp_path)) == 50
+    # The directory is rescanned only after as many writes as it holds.
+    assert scans <= 10, scans
+
+
+def test_worker_totals(tmp_path):
+    paths = []
+    for idx in range(6):
+        path = tmp_path / f'{idx}.graph'
+        path.write_text(f'a = {idx % 3};')
+        paths.append(str(path))
+    cache_dir = str(tmp_path / 'cache')
+
+    for workers in (1, 2):
+        results = compile_files(paths, workers, cache_dir)
+        totals = cache_totals(results)
+        assert totals.hits + totals.misses == len(paths)
+        assert totals.hits == sum(result.cached for result in results)
+    assert cache_totals(results) == CacheStats(6, 0, 0)
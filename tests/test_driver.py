@@ -0,0 +1,51 @@
+from graph_compiler.arena import ArenaParser
+from graph_compiler.driver import *
+from graph_compiler.lexer import RegexLexer
+
+
+def test_compile_files(tmp_path):
+    sources = {
+        'a.graph': 'g { a = 1 + 2 };',
+        'b.graph': 'x = 1;\n\ty = ~;',
+        'c.graph': 'x = 1;\nz = (1 + ;',
+        'd.graph': 'h { b = c * 3 }; d = h;',
+    }
+    paths = []
+    for name, source in sources.items():
+        path = tmp_path / name
+        path.write_text(source)
+        paths.append(str(path))
+
+    for workers in (1, 2):
+        results = compile_files(paths, workers)
+        assert [result.path for result in results] == paths
+
+        a, b, c, d = results
+        assert not a.diagnostics and not d.diagnostics
+        expected = ArenaParser(RegexLexer(sources['d.graph']).tokenize()).parse()
+        assert d.arena.kinds == expected.kinds
+        assert d.arena.first_child == expected.first_child
+
+        assert b.arena is None
+        assert b.diagnostics[0][:3] == (paths[1], 2, 17)
+        assert c.table is not None and c.arena is None
+        assert c.diagnostics[0][:3] == (paths[2], 2, 17)
+
+
+def test_bad_files_become_diagnostics(tmp_path):
+    good = tmp_path / 'good.graph'
+    good.write_text('x = 1;')
+    binary = tmp_path / 'binary.graph'
+    binary.write_bytes(b'x = 1;\r\ny = \xff;')
+    deep = tmp_path / 'deep.graph'
+    deep.write_text('g { ' * 5000 + '}' * 5000)
+    paths = [str(good), str(tmp_path / 'missing.graph'), str(binary), str(deep)]
+
+    for workers in (1, 2):
+        results = compile_files(paths, workers)
+        assert [result.path for result in results] == paths
+        assert not results[0].diagnostics and results[0].arena is not None
+        missing, undecodable, nested = (result.diagnostics[0] for result in results[1:])
+        assert missing[1:3] == (0, 0) and 'No such file' in missing.message
+        assert undecodable[1:3] == (2, 12) and 'utf-8' in undecodable.message
+        assert nested.message == "nesting too deep"
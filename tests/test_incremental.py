@@ -0,0 +1,114 @@
+import random
+
+from graph_compiler.incremental import *
+from graph_compiler.lexer import RegexLexer, TableLexer, Token, TokenTable, TokenType
+from graph_compiler.parser import Assign, Block, Parser
+
+
+def texts(table: TokenTable, first: int, last: int) -> tuple[str, ...]:
+    return tuple(table.text(idx) for idx in range(first, last + 1))
+
+
+def assert_same(document: Document, source: str) -> None:
+    table = RegexLexer(source).tokenize()
+    ends = statement_ends(table)
+    assert document.source == source
+    for name in COLUMNS + ('lines', 'columns'):
+        assert getattr(document.table, name) == getattr(table, name)
+    assert document.ends == ends
+    assert document.results == [
+        texts(table, ends[idx - 1] + 1 if idx else 0, ends[idx]) for idx in range(len(ends))
+    ]
+
+
+def test_edit_reparses_only_touched_statements():
+    source = "a = 1;\nb { c = 2; };\n\td = a + b;\ne = 3;"
+    document = Document(source, texts)
+    assert len(document.results) == 4
+
+    offset = source.index('2')
+    reparsed = document.edit(offset, 1, '20 + x')
+    source = source[:offset] + '20 + x' + source[offset + 1:]
+
+    assert reparsed == range(1, 2)
+    assert document.results[1] == ('b', '{', 'c', '=', '20', '+', 'x', ';', '}', ';')
+    assert_same(document, source)
+
+
+def test_braces_close_statements():
+    source = "g { a = 1 }\nk = g;\nh { b = 2 } ; m = h\n"
+    document = Document(source, texts)
+    assert document.results == [
+        ('g', '{', 'a', '=', '1', '}'), ('k', '=', 'g', ';'),
+        ('h', '{', 'b', '=', '2', '}', ';'), ('m', '=', 'h', '<EOF>'),
+    ]
+
+    # A ';' typed after a closing '}' joins that statement.
+    offset = source.index('\nk')
+    assert document.edit(offset, 0, ';') == range(0, 2)
+    source = source[:offset] + ';' + source[offset:]
+    assert document.results[0] == ('g', '{', 'a', '=', '1', '}', ';')
+    assert_same(document, source)
+
+
+def test_edits_leave_other_statements_alone():
+    source = "g { a = 1 }\n" * 1000
+    document = Document(source, texts)
+    before = list(document)
+    assert len(document.blocks) > 10
+
+    offset = source.index('1', len(source) // 2)
+    reparsed = document.edit(offset, 1, '12')
+    source = source[:offset] + '12' + source[offset + 1:]
+    after = list(document)
+    assert reparsed == range(500, 501)
+    assert all(a is b for a, b in zip(before[:500] + before[501:], after[:500] + after[501:]))
+    assert_same(document, source)
+
+
+def test_random_edits():
+    rng = random.Random(7)
+    pieces = ['a', 'bc', '12', ' ', '\n', '\t', ';', '{', '}', '=', '+', '# ']
+    source = "x = 1; y { z = 2; }; w = x * 3;\nv { u = 4 }\n" * 25
+    document = Document(source, texts)
+
+    for _ in range(300):
+        offset = rng.randrange(len(source) + 1)
+        deleted = rng.randrange(min(4, len(source) - offset) + 1)
+        inserted = ''.join(rng.choices(pieces, k=rng.randrange(4)))
+        document.edit(offset, deleted, inserted)
+        source = source[:offset] + inserted + source[offset + deleted:]
+        assert_same(document, source)
+
+
+def test_statements_parse_with_parser():
+    document = Document('a = 1; b = 2;')
+    assert [type(result) for result in document.results] == [Assign, Assign]
+    for statement in document:
+        assert isinstance(Parser(TableLexer(statement.table)).parse().statements[0], Assign)
+
+    document.edit(len(document.source), 0, '\ng { c = a + b }')
+    assert isinstance(document.results[-1], Block)
+    assert document.diagnostics() == []
+
+
+def test_failed_edits_still_apply():
+    source = 'a = 1;\nb = 2;\nc = 3;'
+    document = Document(source)
+    document.edit(source.index('2'), 0, '%')
+    source = source.replace('2', '%2')
+    assert document.source == source
+    assert document.results[1] is None
+    assert document.diagnostics() == [(1, 'Invalid character % at [2:12]')]
+
+    # Positions follow lines added above, and the fix clears the error.
+    document.edit(0, 0, 'z = 0;\n\n')
+    assert document.diagnostics() == [(2, 'Invalid character % at [4:20]')]
+    document.edit(document.source.index('%'), 1, '')
+    assert document.diagnostics() == []
+    assert isinstance(document.results[2], Assign)
+
+    document.edit(len(document.source), 0, '\nd = ;')
+    assert document.results[-1] is None
+    semicolon = Token(TokenType.SEMICOLON, ';')
+    assert document.diagnostics() == [(4, f"Expecting expression found {semicolon} on line 6")]
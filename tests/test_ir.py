@@ -0,0 +1,68 @@
+from graph_compiler.arena import ArenaParser
+from graph_compiler.ir import ADD, CONST, DIV, LOAD, MUL, OPS, SUB, lower
+from graph_compiler.lexer import RegexLexer
+from graph_compiler.parser import Parser
+
+
+def build(source: str):
+    return lower(Parser(RegexLexer(source)).parse())
+
+
+def show(dag, idx: int) -> str:
+    op = dag.ops[idx]
+    if op == CONST:
+        return str(dag.constants[dag.left[idx]])
+    if op == LOAD:
+        return dag.names[dag.left[idx]]
+    symbol = {ADD: '+', SUB: '-', MUL: '*', DIV: '/'}[op]
+    return f"({show(dag, dag.left[idx])} {symbol} {show(dag, dag.right[idx])})"
+
+
+def outputs(dag) -> list[tuple[str | None, str]]:
+    return [(name, show(dag, idx)) for name, idx in dag.outputs]
+
+
+def test_constant_folding():
+    dag = build("a = 1 + 2 * 3; b = (10 - 4) / 3; c = 7 / 2; d = 1 / 0; e = x * (2 + 2);")
+    assert outputs(dag) == [
+        ('a', '7'), ('b', '2'), ('c', '(7 / 2)'), ('d', '(1 / 0)'), ('e', '(x * 4)'),
+    ]
+
+
+def test_common_subexpressions():
+    dag = build("a = b * (c - 1); g { d = b * (c - 1) + 2; h { e = c - 1 } } b * (c - 1)")
+    (_, a), (_, d), (_, e), (_, bare) = dag.outputs
+    assert [name for name, _ in dag.outputs] == ['a', 'g.d', 'g.h.e', None]
+    assert bare == a == dag.left[d]
+    assert e == dag.right[a]
+    # b, c, 1, c - 1, b * (c - 1), 2, + 2
+    assert len(dag) == 7
+    assert dag.tree_nodes == 5 + 7 + 3 + 5
+    assert all(dag.left[idx] < idx and dag.right[idx] < idx
+               for idx in range(len(dag)) if OPS[dag.ops[idx]] not in ('const', 'load'))
+    assert 'dag nodes 7' in dag.report()
+
+
+def test_arena_and_deep_trees():
+    source = "x { y = 2 * a + (1 + 1) * a; z = y } w = " + " + ".join(['a'] * 3000) + ";"
+    from_tree = build(source)
+    from_arena = lower(ArenaParser(RegexLexer(source).tokenize()).parse())
+
+    for name in ('ops', 'left', 'right'):
+        assert getattr(from_arena, name) == getattr(from_tree, name)
+    assert from_arena.outputs == from_tree.outputs
+    name, idx = from_tree.outputs[0]
+    assert (name, show(from_tree, idx)) == ('x.y', '((2 * a) + (2 * a))')
+    assert from_tree.tree_nodes > 6000 and len(from_tree) < 3010
+
+
+def test_names_resolve_to_assignments():
+    source = "a = x; g { a = 1; b = a * y; h { c = a + b } a = a + 1; d = a } e = a * y; f = c"
+    for dag in (build(source), lower(ArenaParser(RegexLexer(source).tokenize()).parse())):
+        assert outputs(dag) == [
+            ('a', 'x'), ('g.a', '1'), ('g.b', '(1 * y)'), ('g.h.c', '(1 + (1 * y))'),
+            ('g.a', '2'), ('g.d', '2'), ('e', '(x * y)'), ('f', 'c'),
+        ]
+        # The block's 'a' and the top-level one are different nodes.
+        assert dict(dag.outputs)['a'] != dag.outputs[1][1]
+        assert dag.names == ['x', 'y', 'c']
@@ -1,3 +1,10 @@
+import io
+import mmap
+import random
+import sys
+
+import pytest
+
 from graph_compiler.lexer import *
 
 
@@ -30,3 +37,169 @@ def test_lex():
 
     lexer = Lexer(';;;;;')
     lexer.next_token()
+
+
+def lex_all(lexer: Lexer) -> list[tuple[Token, int, int]]:
+    tokens = []
+    while True:
+        token = lexer.next_token()
+        tokens.append((token, lexer.line_num, lexer.char_num))
+        if token.token_type == TokenType.EOF:
+            return tokens
+
+
+def test_regex_lexer_matches_lexer():
+    source = (
+        "abc { a = 10 };\n"
+        "\tb = (a + 2) * 3 / c - d;  # note\r\n"
+        "x.y: [1, 2, 3] @ $z | !w 'q' \"r\";\n"
+        "é² = ab٣cd + 12²;"
+    )
+    assert lex_all(RegexLexer(source)) == lex_all(Lexer(source))
+    assert lex_all(RegexLexer("")) == lex_all(Lexer(""))
+
+
+def test_regex_lexer_error_position():
+    messages = []
+    for cls in (Lexer, RegexLexer):
+        lexer = cls("a = 1;\n\t b ~ 2;")
+        try:
+            lex_all(lexer)
+        except SyntaxError as e:
+            messages.append(str(e))
+    assert len(messages) == 2
+    assert messages[0] == messages[1]
+
+
+def test_tokenize():
+    source = "abc { a = 10 };\n\tb = a * 2;"
+    for cls in (Lexer, RegexLexer):
+        table = cls(source).tokenize()
+        assert list(table) == [token for token, _, _ in lex_all(Lexer(source))]
+        assert table.token_type(len(table) - 1) == TokenType.EOF
+
+        assert table.text(2) == 'a'
+        assert (table.starts[2], table.ends[2]) == (6, 7)
+        assert table.position(2) == (1, 7)
+
+        b = [table.text(i) for i in range(len(table))].index('b')
+        assert table.position(b) == (2, 22)
+        assert table.starts[b] == 17
+
+
+def test_shared_tokens():
+    lexer = RegexLexer("a = a; b = 1;")
+    tokens = [token for token, _, _ in lex_all(lexer)]
+
+    assert tokens[1] is PUNCTUATION_TOKENS['=']
+    assert tokens[3] is tokens[7]
+    assert tokens[0].text is tokens[2].text
+    assert tokens[-1] is EOF_TOKEN
+    assert not hasattr(tokens[0], '__dict__')
+    assert hash(tokens[0]) == hash(Token(TokenType.ID, 'a'))
+
+
+def test_stream_lexer(tmp_path):
+    source = (
+        "abcdefghij { alpha = 1234567890 };\n"
+        "\tb = (alpha + 22) * 3;   # note\r\n"
+        "é² = ab٣cd + 12²;"
+    )
+    expected = lex_all(Lexer(source))
+
+    for chunk_size in (1, 3, 7, 64):
+        lexer = StreamLexer.from_file(io.StringIO(source), chunk_size)
+        assert lex_all(lexer) == expected
+
+    path = tmp_path / "source.graph"
+    path.write_text(source, encoding='utf-8')
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for chunk_size in (1, 5, 64):
+            assert lex_all(StreamLexer.from_mmap(mm, chunk_size)) == expected
+
+
+def test_stream_lexer_drops_skipped_text():
+    chunk_size = 256
+    identifier = 'ab' * 1000
+    source = ' \n' * 100_000 + identifier + ';'
+    lexers: list[StreamLexer] = []
+    widest = 0
+
+    def chunks():
+        nonlocal widest
+        for start in range(0, len(source), chunk_size):
+            if lexers:
+                widest = max(widest, len(lexers[0].input_stream))
+            yield source[start:start + chunk_size]
+
+    lexers.append(StreamLexer(chunks(), chunk_size))
+    lexer = lexers[0]
+    assert lexer.next_token().text == identifier and lexer.line_num == 100_001
+    assert lexer.next_token().text == ';'
+    # Only the identifier running across chunks is carried between windows.
+    assert widest <= len(identifier) + 2 * chunk_size
+
+
+def test_prescan_lexer_matches_lexer():
+    pytest.importorskip('numpy')
+    columns = ('types', 'starts', 'ends', 'lines', 'columns')
+    sources = [
+        "",
+        "abc { a = 10 };\n\tb = (a + 2) * 3 / c - d;  # note\r\n",
+        "x.y: [1, 2, 3] @ $z | !w 'q' \"r\";\n12ab34;\t\t",
+    ]
+    rng = random.Random(0)
+    alphabet = "ab Z09\t\n\r,#;{}()=+-*/.:@|$!'\"[]"
+    sources += [
+        ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 60)))
+        for _ in range(200)
+    ]
+    for source in sources:
+        prescan, lexer = PrescanLexer(source, threshold=0), Lexer(source)
+        fast, slow = prescan.tokenize(), lexer.tokenize()
+        for name in columns:
+            assert list(getattr(fast, name)) == list(getattr(slow, name)), (source, name)
+        assert (prescan.line_num, prescan.char_num) == (lexer.line_num, lexer.char_num)
+
+    messages = []
+    for lexer in (PrescanLexer("a = 1;\n\t b ~ 2;", threshold=0), Lexer("a = 1;\n\t b ~ 2;")):
+        with pytest.raises(SyntaxError) as e:
+            lexer.tokenize()
+        messages.append((str(e.value), lexer.line_num, lexer.char_num))
+    assert messages[0] == messages[1]
+
+
+def test_prescan_lexer_falls_back():
+    # Short and non-ASCII sources go through the regex scan.
+    source = "é² = ab٣cd + 12²;"
+    expected = [token for token, _, _ in lex_all(Lexer(source))]
+    assert list(PrescanLexer(source, threshold=0).tokenize()) == expected
+    assert list(PrescanLexer("a = 1;").tokenize()) == list(Lexer("a = 1;").tokenize())
+
+
+def test_prescan_lexer_without_numpy(monkeypatch):
+    # numpy is an optional extra; without it every source is scanned by regex.
+    monkeypatch.setitem(sys.modules, 'numpy', None)
+    source = "abc { a = 10 };\n\tb = (a + 2) * 3 / c - d;"
+    assert list(PrescanLexer(source, threshold=0).tokenize()) == list(Lexer(source).tokenize())
+
+
+def test_positions():
+    source = "a\tb\nc\r\n\td"
+    positions = Positions(source)
+    assert positions.resolve(0) == (1, 1)
+    assert positions.resolve(2) == (1, 7)
+    assert positions.resolve(4) == (2, 9)
+    assert positions.resolve(8) == (4, 17)
+    assert positions.resolve(len(source)) == (4, 18)
+
+    # Resolving by offset agrees with where the per-character lexer stood.
+    table = RegexLexer(source).tokenize()
+    expected = [(line, column) for _, line, column in lex_all(Lexer(source))]
+    ends = [table.positions.resolve(end) for end in table.ends]
+    assert ends == expected
+    assert list(table.lines) == [1, 1, 2, 4, 4]
+
+    # A window of a longer text carries the counts in front of it.
+    window = Positions(source[6:], offset=6, lines=2, tabs=1)
+    assert window.resolve(2) == positions.resolve(8)
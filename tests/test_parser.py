@@ -0,0 +1,132 @@
+import ast
+import io
+import random
+
+import pytest
+
+from graph_compiler.lexer import Lexer, RegexLexer, StreamLexer
+from graph_compiler.parser import *
+
+
+def show(node: AST) -> str:
+    match node:
+        case Program():
+            return ' '.join(show(i) for i in node.statements)
+        case Assign():
+            return f"{show(node.target)} = {show(node.value)};"
+        case Block():
+            return f"{show(node.name)} {{ {' '.join(show(i) for i in node.statements)} }};"
+        case BinaryOp():
+            return f"({show(node.left)} {node.op.text} {show(node.right)})"
+        case Number() | Identifier():
+            return node.value
+
+
+def test_parse_block():
+    program = Parser(Lexer('abc { a = 10 };')).parse()
+    assert show(program) == 'abc { a = 10; };'
+
+
+def test_precedence():
+    program = Parser(RegexLexer('x = 1 + 2 * 3 - (4 - 5) / b - c;')).parse()
+    assert show(program) == 'x = (((1 + (2 * 3)) - ((4 - 5) / b)) - c);'
+
+
+def test_precedence_matches_python():
+    def python(node: ast.AST) -> str:
+        if isinstance(node, ast.BinOp):
+            op = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/'}[type(node.op)]
+            return f"({python(node.left)} {op} {python(node.right)})"
+        return str(node.value) if isinstance(node, ast.Constant) else node.id
+
+    def expression(depth: int) -> str:
+        if depth == 0 or rng.random() < 0.3:
+            return rng.choice(['1', '2', 'a', 'b'])
+        text = f"{expression(depth - 1)} {rng.choice('+-*/')} {expression(depth - 1)}"
+        return f"({text})" if rng.random() < 0.4 else text
+
+    rng = random.Random(0)
+    for _ in range(300):
+        text = expression(5)
+        program = Parser(RegexLexer(f"x = {text};")).parse()
+        assert show(program) == f"x = {python(ast.parse(text, mode='eval').body)};", text
+
+
+def test_deep_nesting():
+    depth = 5000
+    # Parentheses and right operands nest without recursion.
+    source = 'x = ' + '(1 - ' * depth + '1' + ')' * depth + ';'
+    node = Parser(RegexLexer(source)).parse().statements[0].value
+    for _ in range(depth):
+        assert node.op.text == '-' and node.left.value == '1'
+        node = node.right
+    assert node.value == '1'
+
+    with pytest.raises(SyntaxError, match='RPAREN'):
+        Parser(RegexLexer('x = ' + '(1 - ' * depth + '1' + ')' * (depth - 1) + ';')).parse()
+
+
+def test_nested_blocks():
+    source = 'g { a = 1; h { b = a * 2 } c = 3 }; d = g;'
+    program = Parser(RegexLexer(source)).parse()
+    assert show(program) == 'g { a = 1; h { b = (a * 2); }; c = 3; }; d = g;'
+
+
+def test_errors():
+    with pytest.raises(SyntaxError):
+        Parser(Lexer('a = ;')).parse()
+    with pytest.raises(SyntaxError):
+        Parser(Lexer('a { b = 1;')).parse()
+    with pytest.raises(SyntaxError):
+        Parser(Lexer('a = (1 + 2;')).parse()
+
+
+def test_lookahead():
+    tokens = Lookahead(RegexLexer('a = (1 + b) * 2;'), size=4)
+    assert tokens.size == 4
+    window = tokens.window(0, 3)
+    assert not isinstance(window, list)
+    assert [t.text for t in window] == ['a', '=', '(']
+    assert tokens.peek(3).text == '1'
+    assert tokens.cursor(1) == 3
+
+    tokens.mark()
+    assert [tokens.advance().text for _ in range(3)] == ['=', '(', '1']
+    with pytest.raises(IndexError):
+        tokens.peek(1)
+    assert tokens.reset().text == 'a'
+    assert tokens.advance().text == '='
+
+    tokens.mark()
+    tokens.advance()
+    tokens.release()
+    assert [t.text for t in tokens.window(0, 4)] == ['(', '1', '+', 'b']
+
+
+def test_backtracking_and_error_lines():
+    parser = Parser(RegexLexer('x = 1 + 2 * c;'))
+    assert parser.peek().text == '='
+    parser.mark()
+    parser.consume()
+    parser.consume()
+    first = show(parser.expression())
+    parser.reset()
+    assert parser.lookahead.text == 'x'
+    assert show(parser.parse()) == f'x = {first};'
+
+    # Positions refer to the offending token, not to how far the buffer
+    # has read ahead.
+    parser = Parser(Lexer('a = 1;\nb = ;\nc = 2;\nd = 3;'))
+    parser.statement()
+    parser.peek(6)
+    with pytest.raises(SyntaxError, match='on line 2'):
+        parser.parse()
+
+    # Also once a stream lexer has moved on to later windows.
+    source = 'a = 1;\n' * 50 + 'b = ;\n' + 'c = 2;\n' * 10
+    parser = Parser(StreamLexer.from_file(io.StringIO(source), 8))
+    for _ in range(50):
+        parser.statement()
+    parser.peek(7)
+    with pytest.raises(SyntaxError, match='on line 51'):
+        parser.parse()
@@ -0,0 +1,434 @@
+import pickle
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from graph_compiler.regex_parsing import (
+    AMBIGUOUS,
+    LiveGraph,
+    RelationView,
+    RegexElement,
+    RelationEngine,
+    bounded_expansions,
+    expand_regex,
+    NO_MATCH,
+    SubsetGraph,
+    check_dotstar,
+    check_equal,
+    check_expand,
+    check_fixed,
+    check_match,
+    check_prefixes,
+    check_suffixes,
+    fold,
+    literal_prefix,
+)
+
+
+# Cumulative microseconds `python -X importtime` may report for the module.
+IMPORT_BUDGET_US = 60_000
+
+
+def test_import_is_cheap_and_silent():
+    script = (
+        "import sys, graph_compiler.regex_parsing\n"
+        "heavy = [m for m in sys.modules if m.split('.')[0] in ('rich', 'beartype')]\n"
+        "assert not heavy, heavy\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout == ''
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                timings[name.strip()] = int(cumulative)
+    assert timings['graph_compiler.regex_parsing'] < IMPORT_BUDGET_US
+
+
+TESTS = [
+    check_expand,
+    check_prefixes,
+    check_fixed,
+    check_dotstar,
+    check_suffixes,
+    check_equal,
+    check_match,
+]
+
+MAC_EXPRESSIONS = [
+    '..:..:..:..:..:..',
+    '^00:11:22:..:..:..',
+    '..:..:..:33:44:55$',
+]
+
+MAC_TEXTS = [
+    '00:11:22:33:44:55',
+    '00:11:22:99:44:55',
+    'aa:bb:cc:33:44:55',
+    'aa:bb:cc:dd:ee:ff',
+    'zz',
+]
+
+
+def outcome(match, text):
+    try:
+        result = match(text)
+    except Exception:
+        return 'ambiguous'
+    if isinstance(result, list):
+        result = result[0] if result else None
+    return result.expression if result else None
+
+
+def test_frozen_graph_matches_subset_graph():
+    sg = SubsetGraph(TESTS)
+    for expression in MAC_EXPRESSIONS:
+        sg.add_expression(expression)
+
+    frozen = sg.freeze()
+    for text in MAC_TEXTS:
+        assert outcome(frozen.match, text) == outcome(sg.match, text)
+    assert outcome(frozen.match, MAC_TEXTS[0]) == 'ambiguous'
+
+    sg.add_expression('^00:11:22:33:44:55$')
+    frozen = sg.freeze()
+    for text in MAC_TEXTS:
+        assert outcome(frozen.match, text) == outcome(sg.match, text)
+    assert outcome(frozen.match, MAC_TEXTS[0]) == '^00:11:22:33:44:55$'
+
+
+def test_frozen_graph_keeps_groups_apart():
+    cases = [
+        (['(a)\\1x', '(b)\\1y'], ['aax', 'bby', 'abx', 'aay']),
+        (['(?P<oct>..):00', '(?P<oct>..):11', '(?i)x'], ['12:00', '12:11', '12:22', 'X']),
+    ]
+    for expressions, texts in cases:
+        sg = SubsetGraph(TESTS)
+        sg.add_expressions(expressions)
+        frozen = sg.freeze()
+        live = LiveGraph(TESTS)
+        live.add_expressions(expressions)
+        expected = [outcome(sg.match, text) for text in texts]
+        assert [outcome(frozen.match, text) for text in texts] == expected
+        assert [outcome(live.match, text) for text in texts] == expected
+        assert [
+            expressions[code] if code >= 0 else None for code in sg.match_many(texts)
+        ] == expected
+    assert expected == ['(?P<oct>..):00', '(?P<oct>..):11', None, '(?i)x']
+
+
+def test_frozen_graph_agrees_with_subset_graph():
+    rng = random.Random(11)
+    atoms = ['a', 'b', 'k', 's', 'i', '.', 'İ', 'ſ', '\u212a', 'ß', '[ab]', '(a|b)', '\\d']
+    quantifiers = ['', '', '', '*', '+', '?', '{1,2}']
+    expressions = []
+    for _ in range(60):
+        body = ''.join(rng.choice(atoms) + rng.choice(quantifiers) for _ in range(rng.randrange(1, 5)))
+        expressions.append(rng.choice(['', '^']) + body + rng.choice(['', '', '$', '.*']))
+    expressions += ['(a)\\1', '(?P<x>b)k', '^İstanbul', '^ſtraße', '^\u212aelvin']
+    texts = [
+        ''.join(rng.choice('abksiIKS1İıſß\u212a') for _ in range(rng.randrange(1, 6)))
+        for _ in range(300)
+    ] + ['istanbul', 'ISTANBUL', 'İstanbul', 'straSSe', 'strasse', 'kelvin', 'KELVIN', 'bbk']
+
+    sg = SubsetGraph(TESTS)
+    live = LiveGraph(TESTS)
+    for start in range(0, len(expressions), 16):
+        sg.add_expressions(expressions[start:start + 16])
+        live.add_expressions(expressions[start:start + 16])
+    for frozen in (sg.freeze(), live.current.frozen):
+        for text in texts:
+            assert sorted(e.index for e in sg.match(text, False)) == frozen.most_specific(text)
+            assert outcome(frozen.match, text) == outcome(sg.match, text)
+    assert any(sg.match(text, False) for text in texts)
+
+
+def test_fold():
+    assert fold('ABC') == 'abc'
+    assert fold('İstanbul') == 'istanbul'
+    assert fold('ſ\u212aI') == 'ski'
+    assert len(fold('İİ')) == 2
+
+
+def test_literal_prefix():
+    assert literal_prefix('^host01\\..*') == 'host01.'
+    assert literal_prefix('^00:11:22:..:..:..') == '00:11:22:'
+    assert literal_prefix('abc*') == 'ab'
+    assert literal_prefix('ab{2}c') == 'a'
+    assert literal_prefix('x\\d+') == 'x'
+    assert literal_prefix('ab|cd') == ''
+    assert literal_prefix('(\\d+)') == ''
+
+
+def test_match_many():
+    sg = SubsetGraph(TESTS)
+    for expression in MAC_EXPRESSIONS:
+        sg.add_expression(expression)
+
+    texts = MAC_TEXTS * 3 + [None]
+    expected = []
+    for text in texts:
+        result = outcome(sg.match, text) if text is not None else None
+        if result == 'ambiguous':
+            expected.append(AMBIGUOUS)
+        elif result is None:
+            expected.append(NO_MATCH)
+        else:
+            expected.append(MAC_EXPRESSIONS.index(result))
+
+    assert list(sg.match_many(texts)) == expected
+    assert list(sg.match_many(texts, workers=2)) == expected
+
+    frozen = pickle.loads(pickle.dumps(sg.freeze()))
+    assert list(frozen.match_many(texts)) == expected
+
+
+def test_match_cache():
+    sg = SubsetGraph(TESTS, cache_size=2)
+    for expression in MAC_EXPRESSIONS:
+        sg.add_expression(expression)
+
+    for text in MAC_TEXTS[1:4] + MAC_TEXTS[1:2]:
+        sg.match(text)
+    assert (sg.cache.hits, sg.cache.misses, sg.cache.evictions) == (0, 4, 2)
+    assert [e.expression for e in sg.match(MAC_TEXTS[1])] == [MAC_EXPRESSIONS[1]]
+    assert sg.cache.hits == 1
+
+    # Ambiguity is re-checked on every hit, strict or not.
+    assert len(sg.match(MAC_TEXTS[0], strict=False)) == 2
+    assert outcome(sg.match, MAC_TEXTS[0]) == 'ambiguous'
+    assert sg.cache.hits == 2
+
+    sg.add_expression('^00:11:22:33:44:55$')
+    assert outcome(sg.match, MAC_TEXTS[0]) == '^00:11:22:33:44:55$'
+    assert sg.cache.hits == 2
+
+
+def test_indexed_insertion():
+    tests = [check_prefixes, check_suffixes, check_equal, check_fixed, check_dotstar, check_match]
+    expressions = MAC_EXPRESSIONS + ['^00:11:22:33:44:55$'] + [
+        f"^host{idx:02d}\\..*" for idx in range(20)
+    ] + ['^host0.*', '^host.*', '^host05\\.example$', '^hostess']
+
+    graphs = [SubsetGraph(tests), SubsetGraph(tests, indexed=True)]
+    for sg in graphs:
+        for expression in expressions:
+            sg.add_expression(expression)
+        assert sg.roots == [e for e in sg.elements if not e.supersets]
+
+    def relations(sg):
+        return [
+            (
+                sorted(e.expression for e in element.supersets),
+                sorted(e.expression for e in element.subsets),
+            )
+            for element in sg.elements
+        ]
+
+    plain, indexed = graphs
+    assert relations(indexed) == relations(plain)
+    assert [e.expression for e in indexed.roots] == [e.expression for e in plain.roots]
+
+
+def test_indexed_insertion_keeps_test_order():
+    # check_expand runs before check_prefixes here, so nothing may be skipped.
+    expressions = ['ab{1,2}', 'abb', '^host.*', '^host01\\..*', '^hostess', 'xyz']
+    graphs = [SubsetGraph(TESTS), SubsetGraph(TESTS, indexed=True)]
+    for sg in graphs:
+        sg.add_expressions(expressions)
+
+    plain, indexed = graphs
+    assert indexed.filters == (False, False)
+    assert SubsetGraph(TESTS[1:], indexed=True).filters == (True, False)
+    for a, b in zip(plain.elements, indexed.elements):
+        assert [e.expression for e in a.subsets] == [e.expression for e in b.subsets]
+    assert 'abb' in [e.expression for e in indexed.elements[0].subsets]
+    assert [e.expression for e in indexed.match('abb')] == ['abb']
+
+
+def test_adjacency_storage():
+    sg = SubsetGraph(TESTS)
+    for expression in ['^a.*', '^ab', '^a.*', '^ac$']:
+        sg.add_expression(expression)
+    broad, narrow, again, last = sg.elements
+
+    assert [e.index for e in sg.elements] == [0, 1, 2, 3]
+    assert isinstance(broad.subsets, RelationView)
+    assert list(sg.adjacency.targets('subsets', broad.index)) == [1, 3]
+    assert narrow in broad.subsets and broad in narrow.supersets
+    assert broad not in broad.subsets and len(narrow.subsets) == 0
+    # Equal elements share one set of edges rather than copies.
+    assert sg.adjacency.slots[again.index] == sg.adjacency.slots[broad.index]
+    assert last in again.subsets
+    assert [e.expression for e in sg.match('abc')] == ['^ab']
+
+    standalone = RegexElement('x')
+    standalone.subsets.add(broad)
+    assert broad in standalone.subsets and not standalone.supersets
+
+
+def test_relation_engine_matches_tests():
+    expressions = MAC_EXPRESSIONS + [
+        '^00:11:22:33:44:55$', 'ab{1,3}c', 'abbc', 'a.{2,2}c', '^host\\..*', '^host\\.x',
+        'x(/.*)?', 'x/y', '(ab){1,2}',
+    ]
+    elements = [RegexElement(expression) for expression in expressions]
+    for test in TESTS:
+        engine = RelationEngine([test])
+        for a in elements:
+            for b in elements:
+                assert engine.compare(a, b) == test(a.expression, b.expression)
+        assert engine.stats[test].calls == len(elements) ** 2
+
+
+def test_relation_engine_memoizes_pairs():
+    engine = RelationEngine(TESTS)
+    sg = SubsetGraph(TESTS, relations=engine)
+    for expression in MAC_EXPRESSIONS * 2:
+        sg.add_expression(expression)
+
+    assert engine.pair_hits > 0
+    assert sum(stats.calls for stats in engine.stats.values()) > 0
+    assert 'check_expand' in engine.report()
+
+    # The memo keeps only the most recent pairs.
+    engine = RelationEngine(TESTS, cache_size=32)
+    sg = SubsetGraph(TESTS, relations=engine)
+    sg.add_expressions([f"^host{idx}\\..*" for idx in range(20)] + ['^host19\\..*'])
+    assert len(engine.pairs) == 32 and engine.compared > 32
+    assert engine.pair_hits > 0
+
+
+def test_expand_regex():
+    assert list(expand_regex('ab{1,3}c')) == ['abc', 'abbc', 'abbbc']
+    assert list(expand_regex('(ab){1,2}x.{0,1}')) == ['abx', 'abx.', 'ababx', 'ababx.']
+    assert bounded_expansions('a{1,3}', limit=3) == {'a', 'aa', 'aaa'}
+    assert bounded_expansions('a{1,4}', limit=3) is None
+    # Duplicates count against the limit, so the set is never cut short.
+    assert bounded_expansions('a{0,2}a{0,2}', limit=9) == {'a' * n for n in range(5)}
+    assert bounded_expansions('a{0,2}a{0,2}', limit=8) is None
+    assert bounded_expansions('a{0,40}a{0,40}') is None
+    assert check_expand('a{0,40}a{0,40}', 'a{0,80}') is None
+
+
+def test_check_expand_falls_back_to_ranges():
+    wide = '(ab){1,20}x{1,20}y{1,20}'
+    assert check_expand(wide, '(ab){2,10}x{1,20}y{5,5}') == 'superset'
+    assert check_expand('(ab){2,10}x{1,20}y{5,5}', wide) == 'subset'
+    # Ranges that only overlap prove nothing: the languages may be equal.
+    assert check_expand(wide, '(ab){5,30}x{1,20}y{2,5}') is None
+    assert check_expand('a{1,30}a{2,20}', 'a{2,20}a{1,30}', limit=10) is None
+    assert check_expand(wide, '(ab){21,30}x{1,20}y{2,5}') is None
+    assert check_expand(wide, '(ab){1,20}z{1,20}y{1,20}') is None
+    assert check_expand('a{1,3}', 'a{2,2}', limit=2) == 'superset'
+
+
+def test_live_graph_answers_as_subset_graph():
+    expressions = ['^ab', 'a.', 'a...', 'a.$', '(a)\\1', 'a.*']
+    texts = ['axxb', 'ab', 'abc', 'aa', 'AX', 'b']
+    sg = SubsetGraph(TESTS)
+    sg.add_expressions(expressions)
+    live = LiveGraph(TESTS, cache_size=4)
+    live.add_expressions(expressions[:3])
+    live.add_expressions(expressions[3:])
+    for graph in (live, sg.freeze()):
+        for text in texts:
+            assert outcome(graph.match, text) == outcome(sg.match, text)
+            assert sorted(e.expression for e in graph.match(text, False)) == sorted(
+                e.expression for e in sg.match(text, False)
+            )
+    # The heuristic tests take ``a.$`` for a superset of ``a.``, so the walk
+    # down never reaches the more specific ``a...``.
+    assert outcome(live.match, 'axxb') == 'a.*'
+    assert live.current.frozen.cache.hits > 0
+
+    # A failing batch publishes nothing and leaves nothing behind.
+    before = live.current
+    with pytest.raises(re.error):
+        live.add_expressions(['^b.', 'a.c', '(unclosed'])
+    assert live.current is before
+    assert [e.expression for e in live._graph.elements] == expressions
+    assert [e.expression for e in live._graph.roots] == [e.expression for e in sg.roots]
+    assert [
+        sorted(e.expression for e in element.subsets) for element in live._graph.elements
+    ] == [sorted(e.expression for e in element.subsets) for element in sg.elements]
+    live.add_expressions(['^b.', 'a.c'])
+    sg.add_expressions(['^b.', 'a.c'])
+    for text in texts + ['bc', 'abc']:
+        assert outcome(live.match, text) == outcome(sg.match, text)
+
+
+def test_live_graph_extends_its_snapshot():
+    live = LiveGraph(TESTS)
+    live.add_expressions(f"^host{idx}\\..*" for idx in range(100))
+    first = live.current.frozen
+    live.add_expression('^host7\\.x')
+    second = live.current.frozen
+    # Only the bucket that gained an element is compiled again.
+    changed = [p for p in second.buckets if second.buckets[p] is not first.buckets.get(p)]
+    assert changed == ['host7.x']
+    assert [e.expression for e in first.match('host7.x')] == ['^host7\\..*']
+    assert [e.expression for e in second.match('host7.x')] == ['^host7\\.x']
+
+
+def test_live_graph_concurrent_reads():
+    expressions = [
+        f"^host{idx // 4}.*" if idx % 4 == 0 else f"^host{idx // 4}{idx % 4}\\..*"
+        for idx in range(48)
+    ]
+    texts = [f"host{idx // 4}{idx % 4}.x" for idx in range(48)] + ['zz']
+    live = LiveGraph(TESTS)
+    done = threading.Event()
+    reads: list[tuple[int, str, str | None]] = []
+    latencies: list[float] = []
+    errors: list[str] = []
+
+    def reader(offset):
+        seen = 0
+        idx = offset
+        while not done.is_set():
+            text = texts[idx % len(texts)]
+            idx += 1
+            start = time.perf_counter()
+            version = live.current
+            result = outcome(version.frozen.match, text)
+            latencies.append(time.perf_counter() - start)
+            if version.number < seen:
+                errors.append(f"version went back from {seen} to {version.number}")
+            seen = version.number
+            reads.append((version.size, text, result))
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for start in range(0, len(expressions), 6):
+        live.add_expressions(expressions[start:start + 6])
+        time.sleep(0.005)
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len({size for size, _, _ in reads}) > 1
+    assert live.current.number == 8 and live.current.size == len(expressions)
+    # Every read saw exactly what a graph of that many rules answers.
+    expected = {}
+    for size in {size for size, _, _ in reads}:
+        sg = SubsetGraph(TESTS)
+        sg.add_expressions(expressions[:size])
+        expected[size] = {text: outcome(sg.match, text) for text in texts}
+    assert all(expected[size][text] == result for size, text, result in reads)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{len(reads)} reads under write load, p99 latency {p99 * 1e6:.0f}us")
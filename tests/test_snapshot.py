@@ -0,0 +1,114 @@
+from graph_compiler.regex_parsing import (
+    SubsetGraph,
+    check_dotstar,
+    check_equal,
+    check_expand,
+    check_fixed,
+    check_match,
+    check_prefixes,
+    check_suffixes,
+)
+from graph_compiler.snapshot import RELATIONS, load_graph, save_graph
+
+
+TESTS = [
+    check_expand,
+    check_prefixes,
+    check_fixed,
+    check_dotstar,
+    check_suffixes,
+    check_equal,
+    check_match,
+]
+
+EXPRESSIONS = [
+    '..:..:..:..:..:..',
+    '^00:11:22:..:..:..',
+    '..:..:..:33:44:55$',
+    '^00:11:22:33:44:55$',
+    '^host.*',
+    '^host\\.x',
+    'ab{1,3}c',
+    'abbc',
+    'café',
+    'ab{1,3}c',
+]
+
+TEXTS = ['00:11:22:33:44:55', 'aa:bb:cc:dd:ee:ff', 'host.x', 'abbc', 'café', 'zz']
+
+
+def relations(graph):
+    return {
+        (element.expression, name): sorted(other.expression for other in getattr(element, name))
+        for element in graph.elements
+        for name in RELATIONS
+    }
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'graph.gsg')
+    graph = SubsetGraph(TESTS)
+    for expression in EXPRESSIONS:
+        graph.add_expression(expression)
+    save_graph(graph, path)
+
+    loaded = load_graph(path, TESTS)
+    # Nothing beyond the expressions is decoded until it is needed.
+    assert all(edges is None for edges in loaded.adjacency.edges['subsets'])
+    assert all('compiled' not in vars(element) for element in loaded.elements)
+
+    assert [e.expression for e in loaded.elements] == EXPRESSIONS
+    assert [e.expression for e in loaded.roots] == [e.expression for e in graph.roots]
+    assert loaded.generation == graph.generation
+    for text in TEXTS:
+        assert (
+            [e.expression for e in loaded.match(text, strict=False)] ==
+            [e.expression for e in graph.match(text, strict=False)]
+        )
+    assert relations(loaded) == relations(graph)
+    # Equal elements still share their edges, also ones added later.
+    assert list(loaded.adjacency.slots) == list(graph.adjacency.slots)
+    assert loaded.adjacency.slots[9] == loaded.adjacency.slots[6]
+    for target in (graph, loaded):
+        target.add_expression('abc')
+    assert relations(loaded) == relations(graph)
+
+
+def test_loaded_graph_takes_new_expressions(tmp_path):
+    path = str(tmp_path / 'graph.gsg')
+    graph = SubsetGraph(TESTS, indexed=True)
+    for expression in EXPRESSIONS[:4]:
+        graph.add_expression(expression)
+    save_graph(graph, path)
+
+    loaded = load_graph(path, TESTS, indexed=True)
+    for expression in EXPRESSIONS[4:]:
+        graph.add_expression(expression)
+        loaded.add_expression(expression)
+    assert relations(loaded) == relations(graph)
+    assert [e.expression for e in loaded.roots] == [e.expression for e in graph.roots]
+    assert list(loaded.adjacency.slots)[-1] == list(loaded.adjacency.slots)[6]
+
+
+def test_loaded_graph_freezes_from_saved_layout(tmp_path):
+    path = str(tmp_path / 'graph.gsg')
+    graph = SubsetGraph(TESTS)
+    graph.add_expressions(EXPRESSIONS + ['(a)\\1', '^host7\\.x'])
+    save_graph(graph, path)
+
+    frozen = graph.freeze()
+    loaded = load_graph(path, TESTS).freeze()
+
+    def layout(frozen):
+        return {
+            prefix: [(chunk.indices, chunk.solo) for chunk in chunks]
+            for prefix, chunks in frozen.buckets.items()
+        }
+
+    assert layout(loaded) == layout(frozen)
+    # Chunks are only compiled once a lookup reaches them.
+    assert all(chunk.pattern is None for chunks in loaded.buckets.values() for chunk in chunks)
+    texts = TEXTS + ['aa', 'host7.x', 'HOST.X']
+    for strict in (True, False):
+        assert list(loaded.match_many(texts, strict)) == list(frozen.match_many(texts, strict))
+    assert any(chunk.pattern is not None for chunk in loaded.buckets['host'])